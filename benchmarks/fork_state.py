@@ -0,0 +1,45 @@
+"""Compare ways of branching a GameState: ``python benchmarks/fork_state.py``."""
+
+from __future__ import annotations
+
+import copy
+import timeit
+from collections.abc import Callable
+from functools import partial
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    Buy,
+    GameState,
+    apply_command,
+    clone_state,
+    create_default_state,
+    state_from_dict,
+    state_to_dict,
+)
+
+
+def _played_state(array_market: bool) -> GameState:
+    state = create_default_state(seed=1, array_market=array_market)
+    apply_command(state, Buy(good_name="coffee", quantity=5))
+    apply_command(state, AdvanceDay(days=60))
+    return state
+
+
+def main(number: int = 2_000) -> None:
+    for array_market in (False, True):
+        state = _played_state(array_market)
+        candidates: dict[str, Callable[[], GameState]] = {
+            "deepcopy": partial(copy.deepcopy, state),
+            "dict round-trip": partial(lambda s: state_from_dict(state_to_dict(s)), state),
+            "fork": partial(clone_state, state),
+        }
+        backend = "array" if array_market else "list"
+        print(f"{backend} market, {len(state.event_log)} events:")
+        for name, fork in candidates.items():
+            seconds = min(timeit.repeat(fork, number=number, repeat=3)) / number
+            print(f"  {name:<16} {seconds * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Commands/sec through GameStore with and without persistence.
+
+``python benchmarks/store_throughput.py`` plays buy/sell commands round-robin
+over a set of games, first in memory only, then with each storage backend
+behind the write-behind queue, and reports throughput plus the time the final
+flush took.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+from open_arbitrage.api import CreateGamePayload, GameStore
+from open_arbitrage.engine import Buy, Sell
+from open_arbitrage.engine.core import Command
+from open_arbitrage.storage import DirectoryBackend, SQLiteBackend, StorageBackend
+
+
+def run(storage: StorageBackend | None, *, games: int = 100, commands: int = 20_000) -> None:
+    store = GameStore(storage=storage)
+    ids = [store.create(CreateGamePayload(seed=seed))[0] for seed in range(games)]
+    store.flush()
+    plays: list[Command] = [
+        Buy(good_name="coffee", quantity=1),
+        Sell(good_name="coffee", quantity=1),
+    ]
+    started = time.perf_counter()
+    for index in range(commands):
+        store.run_command(ids[index % games], plays[(index // games) % 2])
+    elapsed = time.perf_counter() - started
+    flush_started = time.perf_counter()
+    store.close()
+    flushed = time.perf_counter() - flush_started
+    name = type(storage).__name__ if storage else "in-memory"
+    print(
+        f"{name:<18} {commands / elapsed:>10,.0f} commands/s   final flush {flushed * 1e3:6.1f} ms"
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        run(None)
+        run(DirectoryBackend(Path(tmp) / "games"))
+        run(SQLiteBackend(Path(tmp) / "games.sqlite3"))
+
+
+if __name__ == "__main__":
+    main()
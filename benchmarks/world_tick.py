@@ -0,0 +1,45 @@
+"""Advance many games one day each: ``python benchmarks/world_tick.py``."""
+
+from __future__ import annotations
+
+import time
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    GameState,
+    World,
+    apply_command,
+    create_default_state,
+)
+
+
+def _games(count: int) -> list[GameState]:
+    games = [create_default_state(seed=seed, array_market=True) for seed in range(count)]
+    for state in games:
+        state.rules.max_days = 10**9
+    return games
+
+
+def main(days: int = 20) -> None:
+    for count in (100, 1_000, 5_000):
+        games = _games(count)
+        start = time.perf_counter()
+        for _ in range(days):
+            for state in games:
+                apply_command(state, AdvanceDay())
+        one_by_one = (time.perf_counter() - start) / days
+
+        world, games = World(), _games(count)
+        world.tick(games)  # joining stacks the boards once
+        start = time.perf_counter()
+        for _ in range(days):
+            world.tick(games)
+        ticked = (time.perf_counter() - start) / days
+        print(
+            f"{count:>5} games: advance_day each {one_by_one * 1e3:8.2f} ms/day"
+            f"  world tick {ticked * 1e3:8.2f} ms/day  ({one_by_one / ticked:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,70 @@
 
 Exposes the engine as a multi-game REST service. Each call to ``POST /games``
 creates an isolated, server-side game session addressed by ``game_id``; the
-engine owns all state, the HTTP layer is a thin, thread-safe façade.
+engine owns all state, the HTTP layer is a thin, thread-safe façade. Handlers
+are coroutines: commands run on the event loop in short time slices, so a long
+advance never stalls other requests, and long-polls wait on the loop without
+holding a thread.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
 import threading
+import time
 import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any, Literal, TypeVar
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 from .engine import (
     AdvanceDay,
     Buy,
+    DeltaTracker,
     GameState,
     RepayLoan,
-    Rules,
     Sell,
+    StateTemplates,
+    Stepper,
     Travel,
+    World,
     apply_command,
     create_default_state,
+    start_command,
+    state_from_bytes,
+    state_to_bytes,
     state_to_dict,
 )
-from .engine.core import Command
+from .engine.core import Command, validate_state_fields
+from .eventlog import EventFeed, EventLogWriter
+from .jobs import Job, JobLimitError, JobManager
+from .sharding import ShardConfig, ShardRouter
+from .storage import DirectoryBackend, SQLiteBackend, StorageBackend, WriteBehind
 
-app = FastAPI(title="Open Arbitrage API", version="0.2.0")
+_T = TypeVar("_T")
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    _store.start()
+    yield
+    _jobs.close()
+    _store.close()
+
+
+app = FastAPI(title="Open Arbitrage API", version="0.2.0", lifespan=_lifespan)
 
 
 class CreateGamePayload(BaseModel):
@@ -48,106 +82,1132 @@ class CommandPayload(BaseModel):
     args: dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchPayload(BaseModel):
+    commands: list[CommandPayload] = Field(..., min_length=1, max_length=1_000)
+    on_error: Literal["stop", "skip"] = "stop"
+
+
+@dataclass
+class _Session:
+    """One game, the locks that serialize commands against it, and its event feed.
+
+    ``lock`` guards the state itself. Coroutines hold ``alock`` for a whole
+    command and take ``lock`` only for each slice of it, which the storage
+    writer's snapshot or a job's slice holds for moments at most, so the event
+    loop never waits on a whole command. A batch keeps ``lock`` from its first
+    slice to its last, yielding the loop in between. ``evicted`` marks a session
+    that was spilled to disk after a caller looked it up; such callers look
+    the game up again, which loads it back. ``pins`` counts commands running
+    in slices: a pinned game is never evicted.
+    """
+
+    state: GameState
+    feed: EventFeed
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    alock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    closed: bool = False
+    evicted: bool = False
+    pins: int = 0
+    last_used: float = 0.0
+
+
+# The RNG state only matters for resuming a game elsewhere; HTTP clients opt in to it.
+_HTTP_DEFAULT_EXCLUDE = frozenset({"rng_state"})
+
+
+@dataclass
+class StateView:
+    """Which top-level state keys an HTTP response carries (see ``state_to_dict``)."""
+
+    fields: list[str] | None = None
+    exclude: frozenset[str] = _HTTP_DEFAULT_EXCLUDE
+
+    def render(self, state: GameState) -> dict[str, Any]:
+        return state_to_dict(state, fields=self.fields, exclude=self.exclude)
+
+
+def _split_names(raw: str) -> list[str]:
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def _state_view(
+    fields: Annotated[
+        str | None, Query(description="Comma-separated state keys to return (default: all)")
+    ] = None,
+    exclude: Annotated[
+        str | None, Query(description="Comma-separated state keys to omit (default: rng_state)")
+    ] = None,
+) -> StateView:
+    selected = _split_names(fields) if fields is not None else None
+    if exclude is not None:
+        excluded = frozenset(_split_names(exclude))
+    else:
+        excluded = _HTTP_DEFAULT_EXCLUDE - set(selected or ())
+    try:
+        validate_state_fields([*(selected or ()), *excluded])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StateView(fields=selected, exclude=excluded)
+
+
+StateViewParam = Annotated[StateView, Depends(_state_view)]
+
+
 class GameStore:
-    """Thread-safe registry of in-memory game sessions."""
+    """Thread-safe registry of game sessions.
+
+    The registry lock only guards lookup, create, delete and eviction; commands
+    run under a per-game lock, so independent games progress concurrently.
+
+    With a ``storage`` backend (``spill_dir`` is shorthand for a
+    :class:`DirectoryBackend`), games outlive the process: every change is
+    queued on a :class:`WriteBehind` that snapshots and writes dirty games in
+    the background, and games already in storage are known from the start.
+    Storage also allows bounding resident games: beyond ``max_sessions`` the
+    least recently used game, and any game idle for ``idle_ttl`` seconds, is
+    dropped from memory and loaded back on its next access, invisibly to
+    clients apart from the latency. Games busy running a command stay resident.
+    Eviction runs as games are accessed and, on a sweeper thread, every
+    ``idle_ttl`` seconds, so idle games leave memory on an idle server too.
 
-    def __init__(self, event_log_path: Path | None = None) -> None:
-        self._games: dict[str, GameState] = {}
+    Every command method has a coroutine twin (``arun_command`` and so on)
+    for the HTTP handlers. Those run commands on the event loop through a
+    :class:`~open_arbitrage.engine.Stepper`, ``slice_seconds`` at a time,
+    letting other requests in between slices while later commands on the same
+    game wait their turn. :meth:`run_sliced` does the same for worker threads.
+    The plain sync methods hold the game's lock for a whole command, so keep
+    them off the event loop.
+
+    ``owns`` restricts the store to one shard's games (see
+    :mod:`open_arbitrage.sharding`): new ids are drawn until ``owns`` accepts
+    one, and games in storage that belong to other shards are ignored.
+
+    With ``tick_interval`` the store runs a world clock: from :meth:`start` on,
+    every ``tick_interval`` seconds a background thread calls :meth:`tick`,
+    which advances every ongoing game one day in one batched step, and new
+    games get array-backed markets so their boards stack. The clock needs every game in
+    memory, so it does not combine with ``max_sessions`` or ``idle_ttl``.
+
+    New games are cheap to create in bursts: seeded games are cloned from
+    cached starting states (:class:`~open_arbitrage.engine.StateTemplates`),
+    and with ``seedless_pool`` up to that many seedless games are kept ready,
+    topped up by a background thread from :meth:`start` on (the app starts it
+    when it begins serving, so merely importing the module builds nothing).
+    """
+
+    def __init__(
+        self,
+        event_log_path: Path | None = None,
+        *,
+        feed_retention: int = 1_000,
+        storage: StorageBackend | None = None,
+        spill_dir: Path | None = None,
+        write_interval: float = 0.05,
+        max_sessions: int | None = None,
+        idle_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        owns: Callable[[str], bool] | None = None,
+        slice_seconds: float = 0.0005,
+        tick_interval: float | None = None,
+        seedless_pool: int = 0,
+    ) -> None:
+        if spill_dir is not None:
+            if storage is not None:
+                raise ValueError("Pass either storage or spill_dir, not both")
+            storage = DirectoryBackend(spill_dir)
+        if (max_sessions is not None or idle_ttl is not None) and storage is None:
+            raise ValueError("max_sessions and idle_ttl require storage or a spill_dir")
+        if max_sessions is not None and max_sessions < 1:
+            raise ValueError("max_sessions must be positive")
+        if idle_ttl is not None and idle_ttl <= 0:
+            raise ValueError("idle_ttl must be positive")
+        if tick_interval is not None:
+            if tick_interval <= 0:
+                raise ValueError("tick_interval must be positive")
+            if max_sessions is not None or idle_ttl is not None:
+                raise ValueError("tick_interval cannot be combined with max_sessions or idle_ttl")
+        if seedless_pool < 0:
+            raise ValueError("seedless_pool must not be negative")
+        # Resident sessions, least recently used first.
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        # Games leaving memory: out of the registry, snapshot not yet queued.
+        self._spilling: dict[str, _Session] = {}
+        # Games coming back: out of ``_spilled``, set once they are resident (or gone).
+        self._loading: dict[str, threading.Event] = {}
+        # Games in storage but not in memory.
+        self._spilled: set[str] = set(storage.ids()) if storage else set()
+        if owns is not None:
+            self._spilled = set(filter(owns, self._spilled))
+        self._owns = owns
         self._lock = threading.Lock()
         self.event_log_path = event_log_path
+        self.feed_retention = feed_retention
+        self._storage = WriteBehind(storage, interval=write_interval) if storage else None
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._event_writer = EventLogWriter(event_log_path) if event_log_path else None
+        # Longest a command holds the event loop (or a game's lock) before yielding.
+        self.slice_seconds = slice_seconds
+        self._world = World()
+        self._tick_lock = threading.Lock()
+        self.ticks = 0
+        self.tick_interval = tick_interval
+        self._world_clock = _Clock(self.tick, tick_interval) if tick_interval is not None else None
+        self._sweeper = (
+            _Sweeper(self._evict, idle_ttl)
+            if storage is not None and (max_sessions is not None or idle_ttl is not None)
+            else None
+        )
+        self._templates = StateTemplates()
+        self._seedless = (
+            _SeedlessPool(seedless_pool, array_market=tick_interval is not None)
+            if seedless_pool
+            else None
+        )
 
     def create(self, payload: CreateGamePayload) -> tuple[str, GameState]:
-        rules = Rules()
+        if payload.seed is None and self._seedless is not None:
+            state = self._seedless.take()
+        else:
+            state = self._templates.create(
+                payload.seed, array_market=self.tick_interval is not None
+            )
+        rules = state.rules
         if payload.travel_cost is not None:
             rules.travel_cost = payload.travel_cost
         if payload.trade_spread is not None:
             rules.trade_spread = payload.trade_spread
         if payload.inventory_capacity is not None:
-            rules.inventory_capacity = payload.inventory_capacity
+            rules.inventory_capacity = state.inventory.capacity = payload.inventory_capacity
         if payload.win_net_worth is not None:
             rules.win_net_worth = payload.win_net_worth
         if payload.max_days is not None:
             rules.max_days = payload.max_days
 
         game_id = uuid.uuid4().hex
-        state = create_default_state(seed=payload.seed, rules=rules)
+        while self._owns is not None and not self._owns(game_id):
+            game_id = uuid.uuid4().hex
+        session = self._new_session(state)
         with self._lock:
-            self._games[game_id] = state
+            self._sessions[game_id] = session
+        self._evict()
+        self._mark_dirty(game_id, session)
         return game_id, state
 
     def get(self, game_id: str) -> GameState:
-        with self._lock:
-            state = self._games.get(game_id)
-        if state is None:
-            raise HTTPException(status_code=404, detail="Game not found")
-        return state
+        return self._session(game_id).state
 
     def delete(self, game_id: str) -> None:
-        with self._lock:
-            if self._games.pop(game_id, None) is None:
-                raise HTTPException(status_code=404, detail="Game not found")
+        session = self._detach(game_id)
+        if session is not None:
+            with session.lock:
+                self._close_locked(game_id, session)
+
+    async def adelete(self, game_id: str) -> None:
+        session = self._detach(game_id)
+        if session is not None:
+            async with session.alock, self._aheld(session):
+                self._close_locked(game_id, session)
 
     def ids(self) -> list[str]:
         with self._lock:
-            return list(self._games)
+            return [*self._sessions, *self._spilling, *self._loading, *self._spilled]
+
+    def resident_ids(self) -> list[str]:
+        """Ids of the games currently held in memory, least recently used first."""
+        with self._lock:
+            return list(self._sessions)
 
     def run_command(self, game_id: str, command: Command) -> GameState:
+        with self._locked(game_id) as session:
+            self._apply(game_id, session, command)
+            return session.state
+
+    async def arun_command(self, game_id: str, command: Command) -> GameState:
+        async with self._alocked(game_id) as session:
+            await self._aexecute(game_id, session, command)
+            return session.state
+
+    async def arun_rendered(
+        self, game_id: str, command: Command, view: StateView
+    ) -> dict[str, Any]:
+        """Apply ``command`` and render the state it left, under the game's lock.
+
+        Jobs and the world clock change games from other threads; rendering
+        under the lock keeps them from changing the state mid-serialization.
+        """
+        async with self._alocked(game_id) as session:
+            await self._aexecute(game_id, session, command)
+            async with self._aheld(session):
+                return view.render(session.state)
+
+    async def arender(self, game_id: str, view: StateView) -> dict[str, Any]:
+        """Render the game under its lock, between commands (or slices) of other clients."""
+        while True:
+            session = await self._asession(game_id)
+            async with self._aheld(session):
+                if session.evicted:
+                    continue
+                if session.closed:
+                    raise HTTPException(status_code=404, detail="Game not found")
+                return view.render(session.state)
+
+    async def awatch(self, game_id: str, view: StateView) -> tuple[dict[str, Any], DeltaTracker]:
+        """Render the game once and start tracking changes from that same instant."""
+        async with self._alocked(game_id) as session, self._aheld(session):
+            return view.render(session.state), DeltaTracker(session.state)
+
+    async def arun_tracked(
+        self, game_id: str, command: Command, tracker: DeltaTracker
+    ) -> dict[str, Any]:
+        """Apply ``command`` and return what changed since ``tracker`` last looked.
+
+        The delta is taken under the game's lock, so it also covers changes made
+        by other clients in between, and never a half-applied command.
+        """
+        async with self._alocked(game_id) as session:
+            await self._aexecute(game_id, session, command)
+            async with self._aheld(session):
+                return tracker.diff(session.state)
+
+    def run_batch(
+        self, game_id: str, commands: Sequence[Command], *, stop_on_error: bool
+    ) -> tuple[GameState, list[str | None]]:
+        """Apply ``commands`` in order under one acquisition of the game's lock.
+
+        Returns the state and one entry per command attempted: ``None`` on
+        success, else the error message. With ``stop_on_error`` the list ends at
+        the first failure; otherwise failing commands are skipped.
+        """
+        with self._locked(game_id) as session:
+            errors = self._apply_batch(game_id, session, commands, stop_on_error)
+            return session.state, errors
+
+    async def arun_batch(
+        self, game_id: str, commands: Sequence[Command], *, stop_on_error: bool
+    ) -> tuple[GameState, list[str | None]]:
+        """:meth:`run_batch` for the event loop, still under one acquisition of the game's lock."""
+        async with self._alocked(game_id) as session:
+            return await _to_completion(
+                self._aapply_batch(game_id, session, commands, stop_on_error, lambda state: state)
+            )
+
+    async def arun_batch_rendered(
+        self, game_id: str, commands: Sequence[Command], view: StateView, *, stop_on_error: bool
+    ) -> tuple[dict[str, Any], list[str | None]]:
+        """:meth:`arun_batch`, rendering the final state before letting go of the game's lock."""
+        async with self._alocked(game_id) as session:
+            return await _to_completion(
+                self._aapply_batch(game_id, session, commands, stop_on_error, view.render)
+            )
+
+    def run_sliced(
+        self,
+        game_id: str,
+        command: Command,
+        *,
+        should_stop: Callable[[], bool] | None = None,
+        progress: Callable[[Stepper], None] | None = None,
+    ) -> bool:
+        """Run ``command`` ``slice_seconds`` at a time, letting go of the game in between.
+
+        For worker threads (see :mod:`open_arbitrage.jobs`): other clients of
+        the game act between slices, and the game stays in memory until the
+        command is over. ``progress`` sees the stepper after every slice.
+        Returns ``False`` if ``should_stop`` ended the command early (the days
+        already run stay applied); raises ``ValueError`` for an invalid command.
+        """
+        with self._pinned(game_id) as session:
+            stepper = self._slice(game_id, session, command, None, should_stop)
+            while True:
+                if progress is not None:
+                    progress(stepper)
+                if stepper.finished:
+                    return True
+                if should_stop is not None and should_stop():
+                    return False
+                time.sleep(0)  # hand the GIL to request handlers between slices
+                self._slice(game_id, session, command, stepper, should_stop)
+
+    def tick(self) -> int:
+        """Advance every ongoing game in memory one day; returns how many advanced.
+
+        For each game this is exactly an ``advance_day`` command, with its
+        events published and its save queued the same way, but prices move in
+        one vectorized step for all of them. The tick holds all their locks at
+        once, so it lands between the commands (or slices) of each game; the
+        event loop never blocks on those locks for long (see :meth:`_aheld`).
+        """
+        with self._tick_lock:
+            with self._lock:
+                sessions = list(self._sessions.items())
+            held: list[tuple[str, _Session]] = []
+            try:
+                for game_id, session in sessions:
+                    session.lock.acquire()
+                    held.append((game_id, session))
+                live = [
+                    (game_id, session, session.state.event_log.last_seq)
+                    for game_id, session in held
+                    if not (session.closed or session.evicted)
+                ]
+                advanced = self._world.tick([session.state for _, session, _ in live])
+                ticked = {id(state) for state in advanced}
+                for game_id, session, last_seq in live:
+                    if id(session.state) in ticked:
+                        self._publish_new_events(game_id, session, last_seq)
+                        self._mark_dirty(game_id, session)
+                self.ticks += 1
+                return len(advanced)
+            finally:
+                for _, session in held:
+                    session.lock.release()
+
+    def read_events(self, game_id: str, since: int, timeout: float = 0.0) -> list[dict[str, Any]]:
+        """Events newer than ``since`` from the game's feed, long-polling up to ``timeout``.
+
+        Waits on the feed only, never on the game's lock, so pollers do not
+        hold up commands.
+        """
+        return self._session(game_id).feed.read(since, timeout)
+
+    async def aread_events(
+        self, game_id: str, since: int, timeout: float = 0.0
+    ) -> list[dict[str, Any]]:
+        session = await self._asession(game_id)
+        return await session.feed.read_async(since, timeout)
+
+    async def aget(self, game_id: str) -> GameState:
+        return (await self._asession(game_id)).state
+
+    def _session(self, game_id: str) -> _Session:
+        """Look ``game_id`` up, loading it back from storage if it was spilled.
+
+        Storage is read and decoded outside the registry lock; lookups of a
+        game on its way out or in wait for that game alone.
+        """
+        while True:
+            load = None
+            with self._lock:
+                session = self._sessions.get(game_id)
+                if session is not None:
+                    session.last_used = self._clock()
+                    self._sessions.move_to_end(game_id)
+                    break
+                spilling = self._spilling.get(game_id)
+                loading = self._loading.get(game_id)
+                if spilling is None and loading is None:
+                    if game_id not in self._spilled:
+                        break
+                    self._spilled.discard(game_id)
+                    load = self._loading[game_id] = threading.Event()
+            if load is not None:
+                session = self._rehydrate(game_id, load)
+                break
+            if spilling is not None:
+                with spilling.lock:
+                    pass  # held until its snapshot is queued; then load it back
+            elif loading is not None:
+                loading.wait()
+        self._evict()
+        if session is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return session
+
+    async def _asession(self, game_id: str) -> _Session:
+        # Reading storage, or waiting for another lookup to, stays off the loop.
+        if game_id in self._spilled or game_id in self._spilling or game_id in self._loading:
+            return await run_in_threadpool(self._session, game_id)
+        return self._session(game_id)
+
+    @contextmanager
+    def _locked(self, game_id: str) -> Iterator[_Session]:
+        """Hold ``game_id``'s own lock (never the registry lock) around a block."""
+        while True:
+            session = self._session(game_id)
+            with session.lock:
+                if session.evicted:
+                    continue
+                if session.closed:
+                    raise HTTPException(status_code=404, detail="Game not found")
+                yield session
+                return
+
+    @contextmanager
+    def _pinned(self, game_id: str) -> Iterator[_Session]:
+        """Keep ``game_id`` resident around a block that takes its lock slice by slice."""
+        session = self._session(game_id)
+        while not self._pin(session):
+            session = self._session(game_id)
+        try:
+            yield session
+        finally:
+            self._unpin(session)
+
+    @asynccontextmanager
+    async def _alocked(self, game_id: str) -> AsyncIterator[_Session]:
+        """Hold ``game_id``'s ``alock`` around a block, keeping the game resident.
+
+        The block takes ``lock`` itself, around each slice of work.
+        """
+        session = await self._asession(game_id)
+        while not self._pin(session):
+            session = await self._asession(game_id)
+        try:
+            async with session.alock:
+                if session.closed:
+                    raise HTTPException(status_code=404, detail="Game not found")
+                yield session
+        finally:
+            self._unpin(session)
+
+    def _pin(self, session: _Session) -> bool:
+        """Pin ``session`` unless it was evicted since it was looked up."""
         with self._lock:
-            state = self._games.get(game_id)
-            if state is None:
-                raise HTTPException(status_code=404, detail="Game not found")
-            before_len = len(state.event_log)
+            if session.evicted:
+                return False
+            session.pins += 1
+            return True
+
+    def _unpin(self, session: _Session) -> None:
+        with self._lock:
+            session.pins -= 1
+
+    @asynccontextmanager
+    async def _aheld(self, session: _Session) -> AsyncIterator[None]:
+        """Hold ``session.lock`` from the event loop, blocking it ``slice_seconds`` at most.
+
+        A tick holds every game's lock for a whole batched step; rather than
+        stall all requests until it ends, give the loop back between attempts.
+        """
+        while not session.lock.acquire(timeout=self.slice_seconds):
+            await asyncio.sleep(0)
+        try:
+            yield
+        finally:
+            session.lock.release()
+
+    def _slice(
+        self,
+        game_id: str,
+        session: _Session,
+        command: Command,
+        stepper: Stepper | None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> Stepper:
+        """Start ``command`` unless ``stepper`` is given, then run it for up to ``slice_seconds``.
+
+        Takes the game's lock for the slice only. Raises ``ValueError`` for an
+        invalid command.
+        """
+        with session.lock:
+            return self._slice_locked(game_id, session, command, stepper, should_stop)
+
+    async def _aslice(
+        self, game_id: str, session: _Session, command: Command, stepper: Stepper | None
+    ) -> Stepper:
+        """:meth:`_slice` for the event loop, which it does not block on the game's lock."""
+        async with self._aheld(session):
+            return self._slice_locked(game_id, session, command, stepper)
+
+    def _slice_locked(
+        self,
+        game_id: str,
+        session: _Session,
+        command: Command,
+        stepper: Stepper | None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> Stepper:
+        if session.closed:
+            raise HTTPException(status_code=404, detail="Game not found")
+        last_seq = session.state.event_log.last_seq
+        if stepper is None:
+            stepper = start_command(session.state, command)
+        stepper.step(deadline=time.monotonic() + self.slice_seconds, should_stop=should_stop)
+        self._publish_new_events(game_id, session, last_seq)
+        self._mark_dirty(game_id, session)
+        return stepper
+
+    async def _aexecute(self, game_id: str, session: _Session, command: Command) -> None:
+        """Run ``command`` in slices on the loop, yielding to other coroutines in between.
+
+        The first slice runs inline, which finishes most commands. If the
+        caller is cancelled (the client went away) the command still runs to
+        the end, with the game held until then.
+        """
+        try:
+            stepper = await self._aslice(game_id, session, command, None)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if not stepper.finished:
+            await _to_completion(self._afinish(game_id, session, command, stepper))
+
+    async def _afinish(
+        self, game_id: str, session: _Session, command: Command, stepper: Stepper
+    ) -> None:
+        while not stepper.finished:
+            await asyncio.sleep(0)
             try:
-                apply_command(state, command)
-            except ValueError as exc:
+                await self._aslice(game_id, session, command, stepper)
+            except ValueError as exc:  # e.g. a job ended the game between slices
                 raise HTTPException(status_code=400, detail=str(exc)) from exc
-            self._persist_new_events(game_id, state, before_len)
-            return state
 
-    def _persist_new_events(self, game_id: str, state: GameState, previous_len: int) -> None:
-        if not self.event_log_path:
+    async def _aapply_batch(
+        self,
+        game_id: str,
+        session: _Session,
+        commands: Sequence[Command],
+        stop_on_error: bool,
+        result: Callable[[GameState], _T],
+    ) -> tuple[_T, list[str | None]]:
+        """Run ``commands`` in slices, holding the game's lock from the first to ``result``.
+
+        The loop serves other requests between slices, but jobs and the world
+        clock, which take the lock, cannot land between the batch's commands.
+        """
+        errors: list[str | None] = []
+        async with self._aheld(session):
+            for command in commands:
+                try:
+                    stepper = self._slice_locked(game_id, session, command, None)
+                    while not stepper.finished:
+                        await asyncio.sleep(0)
+                        stepper = self._slice_locked(game_id, session, command, stepper)
+                except ValueError as exc:
+                    errors.append(str(exc))
+                    if stop_on_error:
+                        break
+                else:
+                    errors.append(None)
+            return result(session.state), errors
+
+    def _detach(self, game_id: str) -> _Session | None:
+        """Remove ``game_id`` from the registry; returns its session if resident."""
+        with self._lock:
+            # A game mid-spill or mid-load counts as spilled; it will not be resident now.
+            spilled = (
+                game_id in self._spilled
+                or self._spilling.pop(game_id, None) is not None
+                or self._loading.pop(game_id, None) is not None
+            )
+            self._spilled.discard(game_id)
+            session = self._sessions.pop(game_id, None)
+            if session is None and not spilled:
+                raise HTTPException(status_code=404, detail="Game not found")
+            if session is None and self._storage is not None:
+                self._storage.delete(game_id)
+        return session
+
+    def _close_locked(self, game_id: str, session: _Session) -> None:
+        # Under the game lock, so no command can queue a save after the delete.
+        session.closed = True
+        if self._storage is not None:
+            self._storage.delete(game_id)
+        session.feed.close()
+
+    def _new_session(self, state: GameState) -> _Session:
+        return _Session(state, EventFeed(self.feed_retention), last_used=self._clock())
+
+    def _rehydrate(self, game_id: str, loaded: threading.Event) -> _Session | None:
+        """Load a game marked in ``_loading`` back into the registry, then set ``loaded``."""
+        session = None
+        try:
+            data = self._storage.read(game_id) if self._storage else None
+            if data is not None:
+                state = state_from_bytes(data)
+                session = self._new_session(state)
+                # Readers resuming from a cursor still see the events the game kept.
+                session.feed.publish(list(state.event_log))
+        except BaseException:
+            with self._lock:
+                if self._loading.pop(game_id, None) is not None:
+                    self._spilled.add(game_id)  # the next lookup tries again
+            raise
+        else:
+            with self._lock:
+                if self._loading.pop(game_id, None) is None:
+                    session = None  # deleted meanwhile
+                elif session is not None:
+                    self._sessions[game_id] = session
+        finally:
+            loaded.set()
+        return session
+
+    def _evict(self) -> None:
+        """Spill LRU games over ``max_sessions`` and games idle past ``idle_ttl`` to storage.
+
+        Victims leave the registry under its lock but are serialized after it
+        is released, each under its own lock, which lookups of that game wait
+        on. On the event loop the work is handed to the sweeper thread.
+        """
+        if self._sweeper is None or self._storage is None:
+            return
+        if _on_event_loop():
+            self._sweeper.wake()
             return
-        new_events = state.event_log[previous_len:]
+        with self._lock:
+            victims = self._pick_victims_locked()
+        for game_id, session in victims:
+            try:
+                data: bytes | None = state_to_bytes(session.state)
+            except Exception:
+                logger.exception("Could not spill game %s; keeping it in memory", game_id)
+                data = None
+            with self._lock:
+                if self._spilling.pop(game_id, None) is None:
+                    pass  # deleted meanwhile
+                elif data is None:
+                    session.evicted = False
+                    self._sessions[game_id] = session
+                    self._sessions.move_to_end(game_id, last=False)
+                else:
+                    self._storage.put(game_id, data)
+                    self._spilled.add(game_id)
+            if session.evicted:
+                session.feed.close()
+            session.lock.release()
+
+    def _pick_victims_locked(self) -> list[tuple[str, _Session]]:
+        """Move games due for eviction to ``_spilling``, returned with their locks held."""
+        overflow = len(self._sessions) - (self.max_sessions or len(self._sessions))
+        cutoff = None if self.idle_ttl is None else self._clock() - self.idle_ttl
+        victims: list[tuple[str, _Session]] = []
+        newest = next(reversed(self._sessions), None)
+        for game_id, session in self._sessions.items():
+            idle = cutoff is not None and session.last_used <= cutoff
+            if game_id == newest and not idle:
+                break  # just accessed: the caller is about to use it
+            if overflow <= len(victims) and not idle:
+                break
+            if session.pins or not session.lock.acquire(blocking=False):
+                continue  # mid-command: keep it resident
+            session.evicted = True
+            victims.append((game_id, session))
+        for game_id, session in victims:
+            del self._sessions[game_id]
+            self._spilling[game_id] = session
+        return victims
+
+    def start(self) -> None:
+        """Start the world clock and the seedless pool, if any; calling it again does nothing."""
+        if self._world_clock is not None:
+            self._world_clock.start()
+        if self._seedless is not None:
+            self._seedless.start()
+
+    def flush(self) -> None:
+        """Block until queued storage writes and event log lines are on disk."""
+        if self._storage is not None:
+            self._storage.flush()
+        if self._event_writer is not None:
+            self._event_writer.flush()
+
+    def close(self) -> None:
+        """Stop background work (world clock, sweeper, game pool, storage and event log writers)."""
+        if self._world_clock is not None:
+            self._world_clock.stop()
+        if self._sweeper is not None:
+            self._sweeper.stop()
+        if self._seedless is not None:
+            self._seedless.close()
+        try:
+            if self._storage is not None:
+                self._storage.close()
+        finally:
+            if self._event_writer is not None:
+                self._event_writer.close()
+
+    def _apply(self, game_id: str, session: _Session, command: Command) -> None:
+        last_seq = session.state.event_log.last_seq
+        try:
+            apply_command(session.state, command)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        self._publish_new_events(game_id, session, last_seq)
+        self._mark_dirty(game_id, session)
+
+    def _apply_batch(
+        self, game_id: str, session: _Session, commands: Sequence[Command], stop_on_error: bool
+    ) -> list[str | None]:
+        errors: list[str | None] = []
+        last_seq = session.state.event_log.last_seq
+        for command in commands:
+            try:
+                apply_command(session.state, command)
+            except ValueError as exc:
+                errors.append(str(exc))
+                if stop_on_error:
+                    break
+            else:
+                errors.append(None)
+        self._publish_new_events(game_id, session, last_seq)
+        self._mark_dirty(game_id, session)
+        return errors
+
+    def _mark_dirty(self, game_id: str, session: _Session) -> None:
+        """Queue a save of ``session``; callers hold its lock (or it is not yet shared)."""
+        if self._storage is not None:
+            self._storage.mark_dirty(game_id, lambda: _snapshot(session))
+
+    def _publish_new_events(self, game_id: str, session: _Session, since_seq: int) -> None:
+        new_events = session.state.event_log.events_since(since_seq)
         if not new_events:
             return
-        self.event_log_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.event_log_path.open("a", encoding="utf-8") as handle:
-            for event in new_events:
-                handle.write(json.dumps({"game_id": game_id, **event}) + "\n")
+        session.feed.publish(new_events)
+        if self._event_writer is not None:
+            self._event_writer.submit(game_id, new_events)
+
+
+class _Clock:
+    """Calls ``tick`` every ``interval`` seconds on a background thread, from :meth:`start` on."""
+
+    def __init__(self, tick: Callable[[], object], interval: float) -> None:
+        self._tick = tick
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="world-clock", daemon=True)
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if not self._stopping.is_set() and self._thread.ident is None:
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._start_lock:
+            self._stopping.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        due = time.monotonic() + self.interval
+        while not self._stopping.wait(max(due - time.monotonic(), 0.0)):
+            self._tick()
+            # Keep to the schedule; after an overrun, tick again right away once.
+            due = max(due + self.interval, time.monotonic())
+
+
+class _Sweeper:
+    """Calls ``sweep`` every ``interval`` seconds (if any) and soon after :meth:`wake`."""
+
+    def __init__(self, sweep: Callable[[], object], interval: float | None) -> None:
+        self._sweep = sweep
+        self.interval = interval
+        self._wanted = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wanted.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wanted.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            self._wanted.wait(self.interval)
+            self._wanted.clear()
+            if self._stopping:
+                return
+            try:
+                self._sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+
+class _SeedlessPool:
+    """Up to ``size`` ready seedless games (default rules), refilled on a background thread.
+
+    The pool stays empty until :meth:`start`; :meth:`take` builds games on the spot until then.
+    """
+
+    def __init__(self, size: int, *, array_market: bool) -> None:
+        self.size = size
+        self.array_market = array_market
+        self._ready: deque[GameState] = deque()
+        self._wanted = threading.Event()
+        self._wanted.set()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="seedless-pool", daemon=True)
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if not self._stopping and self._thread.ident is None:
+                self._thread.start()
+
+    def take(self) -> GameState:
+        """A ready game, or a freshly built one when the pool has run dry."""
+        try:
+            state = self._ready.popleft()
+        except IndexError:
+            state = create_default_state(array_market=self.array_market)
+        self._wanted.set()
+        return state
+
+    def close(self) -> None:
+        with self._start_lock:
+            self._stopping = True
+        self._wanted.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wanted.wait()
+            self._wanted.clear()
+            while len(self._ready) < self.size and not self._stopping:
+                self._ready.append(create_default_state(array_market=self.array_market))
+                time.sleep(0)  # hand the GIL back to request handlers between games
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def _to_completion(work: Coroutine[Any, Any, _T]) -> _T:
+    """Await ``work``; if the caller is cancelled, still let it finish first."""
+    task = asyncio.ensure_future(work)
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if not task.done():
+            await asyncio.wait([task])
 
 
 _event_log_path_env = os.environ.get("OPEN_ARBITRAGE_EVENT_LOG_PATH")
+_spill_dir_env = os.environ.get("OPEN_ARBITRAGE_SPILL_DIR")
+_db_path_env = os.environ.get("OPEN_ARBITRAGE_DB_PATH")
+_max_sessions_env = os.environ.get("OPEN_ARBITRAGE_MAX_SESSIONS")
+_idle_ttl_env = os.environ.get("OPEN_ARBITRAGE_IDLE_TTL")
+_job_workers_env = os.environ.get("OPEN_ARBITRAGE_JOB_WORKERS")
+_tick_seconds_env = os.environ.get("OPEN_ARBITRAGE_TICK_SECONDS")
+_seedless_pool_env = os.environ.get("OPEN_ARBITRAGE_SEEDLESS_POOL")
+_shard = ShardConfig.from_env()
+_event_log_path = Path(_event_log_path_env) if _event_log_path_env else None
+if _shard is not None and _event_log_path is not None:
+    # One file per shard: processes appending to one file could interleave lines.
+    _event_log_path = _event_log_path.with_stem(f"{_event_log_path.stem}.{_shard.name}")
 _store = GameStore(
-    event_log_path=Path(_event_log_path_env) if _event_log_path_env else None,
+    event_log_path=_event_log_path,
+    storage=SQLiteBackend(Path(_db_path_env)) if _db_path_env else None,
+    spill_dir=Path(_spill_dir_env) if _spill_dir_env else None,
+    max_sessions=int(_max_sessions_env) if _max_sessions_env else None,
+    idle_ttl=float(_idle_ttl_env) if _idle_ttl_env else None,
+    owns=_shard.owns if _shard else None,
+    tick_interval=float(_tick_seconds_env) if _tick_seconds_env else None,
+    seedless_pool=int(_seedless_pool_env) if _seedless_pool_env else 256,
 )
+_jobs = JobManager(_store, max_workers=int(_job_workers_env) if _job_workers_env else 2)
+if _shard is not None:
+    app.add_middleware(ShardRouter, shard=_shard)
 
 
 @app.post("/games", status_code=201)
-def create_game(payload: CreateGamePayload) -> dict[str, Any]:
-    game_id, state = _store.create(payload)
-    return {"game_id": game_id, "state": state_to_dict(state)}
+async def create_game(payload: CreateGamePayload, view: StateViewParam) -> dict[str, Any]:
+    game_id, _ = _store.create(payload)
+    return {"game_id": game_id, "state": await _store.arender(game_id, view)}
 
 
 @app.get("/games")
-def list_games() -> dict[str, list[str]]:
+async def list_games() -> dict[str, list[str]]:
     return {"games": _store.ids()}
 
 
 @app.get("/games/{game_id}")
-def get_game(game_id: str) -> dict[str, Any]:
-    return state_to_dict(_store.get(game_id))
+async def get_game(game_id: str, view: StateViewParam) -> dict[str, Any]:
+    return await _store.arender(game_id, view)
 
 
 @app.delete("/games/{game_id}", status_code=204)
-def delete_game(game_id: str) -> None:
-    _store.delete(game_id)
+async def delete_game(game_id: str) -> None:
+    await _store.adelete(game_id)
+
+
+@app.get("/games/{game_id}/events")
+async def get_events(
+    game_id: str,
+    since: Annotated[int, Query(ge=0, description="Last event seq already seen")] = 0,
+    timeout: Annotated[
+        float, Query(ge=0, le=30, description="Seconds to wait for a new event (long-poll)")
+    ] = 0.0,
+) -> dict[str, Any]:
+    """Events with ``seq > since``, oldest first.
+
+    ``cursor`` is the ``since`` to send next. ``truncated`` is true when events
+    between ``since`` and the first returned one are no longer retained.
+    """
+    events = await _store.aread_events(game_id, since, timeout)
+    return {
+        "events": events,
+        "cursor": events[-1]["seq"] if events else since,
+        "truncated": bool(events) and events[0]["seq"] > since + 1,
+    }
 
 
 @app.post("/games/{game_id}/commands")
-def post_command(game_id: str, payload: CommandPayload) -> dict[str, Any]:
+async def post_command(
+    game_id: str, payload: CommandPayload, view: StateViewParam
+) -> dict[str, Any]:
     command = _to_command(payload)
-    state = _store.run_command(game_id, command)
-    return state_to_dict(state)
+    return await _store.arun_rendered(game_id, command, view)
+
+
+@app.post("/games/{game_id}/commands/batch")
+async def post_command_batch(
+    game_id: str, payload: BatchPayload, view: StateViewParam
+) -> dict[str, Any]:
+    """Apply an ordered list of commands and return per-command status plus one final state.
+
+    Each result is ``{"index", "status"}`` with status ``ok``, ``error`` (plus
+    ``detail``) or ``not_run``. ``on_error="stop"`` halts at the first failing
+    command; ``"skip"`` carries on with the rest.
+    """
+    stop_on_error = payload.on_error == "stop"
+    results: list[dict[str, Any]] = [
+        {"index": index, "status": "not_run"} for index in range(len(payload.commands))
+    ]
+    commands: list[Command] = []
+    positions: list[int] = []
+    for index, item in enumerate(payload.commands):
+        try:
+            commands.append(_to_command(item))
+        except HTTPException as exc:
+            results[index] = {"index": index, "status": "error", "detail": exc.detail}
+        except ValueError as exc:
+            results[index] = {"index": index, "status": "error", "detail": str(exc)}
+        else:
+            positions.append(index)
+            continue
+        if stop_on_error:
+            break
+
+    state, errors = await _store.arun_batch_rendered(
+        game_id, commands, view, stop_on_error=stop_on_error
+    )
+    for index, error in zip(positions, errors, strict=False):
+        if error is None:
+            results[index] = {"index": index, "status": "ok"}
+        else:
+            results[index] = {"index": index, "status": "error", "detail": error}
+            if stop_on_error:
+                for later in results[index + 1 :]:
+                    later.pop("detail", None)
+                    later["status"] = "not_run"
+    return {"results": results, "state": state}
+
+
+@app.post("/games/{game_id}/jobs", status_code=202)
+async def post_job(game_id: str, payload: BatchPayload) -> dict[str, Any]:
+    """Queue commands (the batch shape) to run in the background and return the job.
+
+    Every command is validated before anything is queued; long advances run in
+    small chunks, so other clients of the game are never held up for long.
+    Poll ``GET /games/{game_id}/jobs/{job_id}`` for progress and results.
+    """
+    commands: list[Command] = []
+    for index, item in enumerate(payload.commands):
+        try:
+            commands.append(_to_command(item))
+        except HTTPException as exc:
+            raise HTTPException(status_code=400, detail=f"commands[{index}]: {exc.detail}") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"commands[{index}]: {exc}") from exc
+    await _store.aget(game_id)  # 404 before anything is queued
+    try:
+        job = _jobs.submit(game_id, commands, stop_on_error=payload.on_error == "stop")
+    except JobLimitError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    return job.to_dict()
+
+
+@app.get("/games/{game_id}/jobs")
+async def list_jobs(game_id: str) -> dict[str, list[dict[str, Any]]]:
+    return {"jobs": [job.to_dict() for job in _jobs.for_game(game_id)]}
+
+
+@app.get("/games/{game_id}/jobs/{job_id}")
+async def get_job(game_id: str, job_id: str) -> dict[str, Any]:
+    """Status, ``progress`` (commands and days done of total) and per-command results."""
+    return _game_job(game_id, _jobs.get(job_id)).to_dict()
+
+
+@app.post("/games/{game_id}/jobs/{job_id}/cancel")
+async def cancel_job(game_id: str, job_id: str) -> dict[str, Any]:
+    """Stop the job within its current slice; what already ran stays applied."""
+    _game_job(game_id, _jobs.get(job_id))
+    return _game_job(game_id, _jobs.cancel(job_id)).to_dict()
+
+
+def _game_job(game_id: str, job: Job | None) -> Job:
+    if job is None or job.game_id != game_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _snapshot(session: _Session) -> bytes | None:
+    """Serialize a resident game between commands (``None`` once it has left memory)."""
+    with session.lock:
+        if session.closed or session.evicted:
+            return None
+        return state_to_bytes(session.state)
+
+
+# Close code for a socket whose game does not exist (4000-4999 are application codes).
+_WS_GAME_NOT_FOUND = 4404
+
+
+@app.websocket("/games/{game_id}/ws")
+async def game_socket(websocket: WebSocket, game_id: str) -> None:
+    """Interactive session: send commands, receive only what each one changed.
+
+    The server first sends ``{"type": "state", "state": {...}}`` (the usual
+    HTTP state, without ``rng_state``). Each client message is a command in the
+    ``POST /commands`` shape, optionally with an ``"id"`` that is echoed back.
+    Replies are ``{"type": "delta", "delta": {...}}`` (see ``DeltaTracker``)
+    or ``{"type": "error", "detail": ...}``.
+    """
+    await websocket.accept()
+    try:
+        state, tracker = await _store.awatch(game_id, StateView())
+    except HTTPException as exc:
+        await websocket.send_json({"type": "error", "detail": exc.detail})
+        await websocket.close(code=_WS_GAME_NOT_FOUND)
+        return
+    await websocket.send_json({"type": "state", "state": state})
+
+    while True:
+        try:
+            raw = await websocket.receive_text()
+        except WebSocketDisconnect:
+            return
+        reply: dict[str, Any]
+        message: Any = None
+        try:
+            message = json.loads(raw)
+            command = _to_command(CommandPayload.model_validate(message))
+            delta = await _store.arun_tracked(game_id, command, tracker)
+        except HTTPException as exc:
+            reply = {"type": "error", "detail": exc.detail}
+            if exc.status_code == 404:
+                await websocket.send_json(reply)
+                await websocket.close(code=_WS_GAME_NOT_FOUND)
+                return
+        except ValueError as exc:  # bad JSON, payload validation, or command arguments
+            reply = {"type": "error", "detail": str(exc)}
+        else:
+            reply = {"type": "delta", "delta": delta}
+        if isinstance(message, dict) and "id" in message:
+            reply["id"] = message["id"]
+        await websocket.send_json(reply)
 
 
 def _to_command(payload: CommandPayload) -> Command:
@@ -164,7 +1224,10 @@ def _to_command(payload: CommandPayload) -> Command:
     if kind == "travel":
         return Travel(destination_index=int(args.get("destination_index", -1)))
     if kind == "advance_day":
-        return AdvanceDay(days=int(args.get("days", 1)))
+        exact = args.get("exact", True)
+        if not isinstance(exact, bool):
+            raise HTTPException(status_code=400, detail="exact must be a boolean")
+        return AdvanceDay(days=int(args.get("days", 1)), exact=exact)
     if kind == "repay":
         return RepayLoan(amount=float(args.get("amount", 0)))
     raise HTTPException(status_code=400, detail="Unsupported command type")
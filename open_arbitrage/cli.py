@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
+from pathlib import Path
 from typing import Any
 
 import typer
@@ -26,6 +29,7 @@ from .engine import (
     net_worth,
     state_to_dict,
 )
+from .sharding import ShardSupervisor
 
 app = typer.Typer(add_completion=False, help="Open Arbitrage game CLI (engine-based loop)")
 
@@ -35,11 +39,11 @@ _DEFAULTS = Rules()
 def _best_alternative_market(state: GameState, good_name: str) -> tuple[str, float] | None:
     """Return the (city, bid) with the highest sell price excluding the current city."""
     best: tuple[str, float] | None = None
+    column = state.market.good_index(good_name)
     for index, city in enumerate(state.cities):
         if index == state.city_index:
             continue
-        quote = state.market.quote(index, good_name)
-        bid = quote.value * (1.0 - state.rules.trade_spread)
+        bid = state.market.boards[index][column].value * (1.0 - state.rules.trade_spread)
         if best is None or bid > best[1]:
             best = (city, bid)
     return best
@@ -201,6 +205,29 @@ def dump_state(
     console.print_json(json.dumps(state_to_dict(state)))
 
 
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to listen on"),
+    port: int = typer.Option(8000, "--port", "-p", help="TCP port shared by all shards"),
+    shards: int = typer.Option(
+        os.cpu_count() or 1, "--shards", "-n", help="API processes (default: one per core)"
+    ),
+    socket_dir: str | None = typer.Option(
+        None, "--socket-dir", help="Where shards put their unix sockets (default: a temp dir)"
+    ),
+) -> None:
+    """Run the HTTP API as one process per shard, each owning part of the games."""
+    sockets = Path(socket_dir or tempfile.mkdtemp(prefix="open-arbitrage-"))
+    supervisor = ShardSupervisor(shards, host=host, port=port, socket_dir=sockets)
+    supervisor.start()
+    bound_host, bound_port = supervisor.address
+    typer.echo(f"Serving {shards} shards on http://{bound_host}:{bound_port} ({sockets})")
+    try:
+        supervisor.wait()
+    finally:
+        supervisor.stop()
+
+
 def main() -> None:
     app()
 
@@ -1,9 +1,11 @@
 """Game engine: state, commands, and pure logic (UI-agnostic)."""
 
-from ..market import Good, Market, Quote, build_market
+from ..market import ArrayMarket, Good, Market, MarketStack, Quote, build_market
 from .core import (
     AdvanceDay,
     Buy,
+    CompiledRules,
+    EventLog,
     GameOutcome,
     GameState,
     Inventory,
@@ -12,37 +14,59 @@ from .core import (
     Rules,
     Sell,
     SetSeed,
+    Stepper,
     Travel,
     apply_command,
     ask_price,
     bid_price,
+    clone_state,
     create_default_state,
     net_worth,
+    start_command,
     state_from_dict,
     state_to_dict,
 )
+from .delta import DeltaTracker
+from .opportunities import Opportunity, scan_opportunities
+from .snapshot import state_from_bytes, state_to_bytes
+from .templates import StateTemplates
+from .world import World
 
 __all__ = [
     "AdvanceDay",
+    "ArrayMarket",
     "Buy",
+    "CompiledRules",
+    "DeltaTracker",
+    "EventLog",
     "GameOutcome",
     "GameState",
     "Good",
     "Inventory",
     "LoanAccount",
     "Market",
+    "MarketStack",
+    "Opportunity",
     "Quote",
     "RepayLoan",
     "Rules",
     "Sell",
     "SetSeed",
+    "StateTemplates",
+    "Stepper",
     "Travel",
+    "World",
     "apply_command",
     "ask_price",
     "bid_price",
     "build_market",
+    "clone_state",
     "create_default_state",
     "net_worth",
+    "scan_opportunities",
+    "start_command",
+    "state_from_bytes",
     "state_from_dict",
+    "state_to_bytes",
     "state_to_dict",
 ]
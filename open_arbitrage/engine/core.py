@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import copy
 import random
-from collections.abc import Sequence
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Any
+from itertools import accumulate, islice
+from typing import Any, ClassVar, overload
 
-from ..market import Good, Market, Quote, build_market
+import numpy as np
+
+from ..market import ArrayMarket, Good, Market, Quote, build_market
 
 DEFAULT_GOODS: list[Good] = [
     Good("coffee", 10.00),
@@ -38,6 +46,11 @@ class LoanAccount:
         for _ in range(days):
             self.balance += self.balance * self.rate
 
+    def compound_closed_form(self, days: int) -> None:
+        """:meth:`compound` as ``balance * (1 + rate) ** days``, equal up to float rounding."""
+        if days > 0:
+            self.balance *= (1.0 + self.rate) ** days
+
     def repay(self, amount: float) -> float:
         if amount <= 0:
             raise ValueError("Repayment must be positive")
@@ -80,6 +93,101 @@ class Inventory:
         return self.holdings.get(good_name, 0)
 
 
+Event = dict[str, Any]
+
+
+class EventLog:
+    """Bounded ring buffer of events, each stamped with a sequence number.
+
+    Every appended event gets ``event["seq"]``, starting at 1 and never
+    reused; once ``limit`` events are held the oldest drop off in O(1). Reads
+    behave like a list of the retained events (``len``, iteration, indexing,
+    slicing, ``==``), and :meth:`events_since` returns the events a reader has
+    not seen yet without scanning the ones it has.
+    """
+
+    def __init__(self, events: Iterable[Event] = (), *, limit: int | None = None) -> None:
+        self._events: deque[Event] = deque(maxlen=_ring_size(limit))
+        self.next_seq = 1
+        for event in events:
+            if "seq" not in event:  # saved before events carried sequence numbers
+                event = {**event, "seq": self.next_seq}
+            self._events.append(event)
+            self.next_seq = event["seq"] + 1
+
+    @property
+    def limit(self) -> int | None:
+        return self._events.maxlen
+
+    @limit.setter
+    def limit(self, limit: int | None) -> None:
+        size = _ring_size(limit)
+        if size != self._events.maxlen:
+            self._events = deque(self._events, maxlen=size)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest event ever appended (0 if none)."""
+        return self.next_seq - 1
+
+    def append(self, event: Event) -> Event:
+        event["seq"] = self.next_seq
+        self.next_seq += 1
+        self._events.append(event)
+        return event
+
+    def events_since(self, seq: int) -> list[Event]:
+        """Retained events with a sequence number greater than ``seq``, oldest first.
+
+        Costs O(new events); events already dropped from the ring are skipped.
+        """
+        count = min(self.last_seq - seq, len(self._events))
+        if count <= 0:
+            return []
+        newest_first = list(islice(reversed(self._events), count))
+        newest_first.reverse()
+        return newest_first
+
+    def copy(self) -> EventLog:
+        clone = EventLog(limit=self.limit)
+        clone._events.extend(self._events)
+        clone.next_seq = self.next_seq
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._events)
+
+    @overload
+    def __getitem__(self, index: int) -> Event: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Event]: ...
+
+    def __getitem__(self, index: int | slice) -> Event | list[Event]:
+        if isinstance(index, slice):
+            return list(self._events)[index]
+        return self._events[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EventLog):
+            return self.next_seq == other.next_seq and list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"EventLog({list(self._events)!r}, limit={self.limit!r})"
+
+
+def _ring_size(limit: int | None) -> int | None:
+    return limit if limit and limit > 0 else None
+
+
 class GameOutcome(StrEnum):
     ONGOING = "ongoing"
     WON = "won"
@@ -88,6 +196,15 @@ class GameOutcome(StrEnum):
 
 @dataclass
 class Rules:
+    """Tunable game rules.
+
+    Every attribute assignment bumps a revision counter, which is how games
+    notice they must recompile their :class:`CompiledRules`. Replace mappings
+    such as ``daily_event_weights`` wholesale; in-place edits go unnoticed.
+    """
+
+    _revision: ClassVar[int] = 0
+
     travel_cost: float = 60.0
     travel_time_days: int = 1
     inventory_capacity: int | None = 100
@@ -102,6 +219,8 @@ class Rules:
     daily_event_chance: float = 0.3
     travel_event_chance: float = 0.2
     event_log_limit: int | None = 200
+    # How events consume randomness (see RNG_SCHEMES); saves without one replay as 1.
+    rng_scheme: int = 2
     daily_event_weights: dict[str, float] = field(
         default_factory=lambda: {
             "demand_spike": 1.4,
@@ -134,6 +253,97 @@ class Rules:
         }
     )
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        super().__setattr__("_revision", self._revision + 1)
+
+    def copy(self) -> Rules:
+        """Independent copy, mappings included (cheaper than building ``Rules()``)."""
+        clone = copy.copy(self)
+        vars(clone).update(
+            {name: dict(value) for name, value in vars(self).items() if isinstance(value, dict)}
+        )
+        return clone
+
+
+# RNG consumption schemes. Each scheme is frozen once released, so a saved game
+# keeps replaying exactly under the scheme it was started with.
+#   1: theft draws one rng.choices per stolen unit; spoilage uses rng.choices
+#      and rng.uniform.
+#   2: theft and spoilage each take one rng.getrandbits(64) to seed a NumPy
+#      generator that draws the whole loss (theft is one multivariate
+#      hypergeometric draw over holdings), whatever the inventory size.
+RNG_SCHEMES: tuple[int, ...] = (1, 2)
+
+
+@dataclass(frozen=True)
+class _WeightTable:
+    """Positive weights as parallel key/cumulative-sum tuples, sampled by bisection."""
+
+    keys: tuple[str, ...]
+    cumulative: tuple[float, ...]
+    total: float
+
+    @classmethod
+    def from_weights(cls, weights: Mapping[str, float]) -> _WeightTable:
+        positive = {key: weight for key, weight in weights.items() if weight > 0}
+        return cls(
+            keys=tuple(positive),
+            cumulative=tuple(accumulate(positive.values())),
+            total=sum(positive.values()),
+        )
+
+    def choose(self, rng: random.Random) -> str | None:
+        """One ``rng.uniform(0, total)`` draw (none when empty)."""
+        if not self.keys:
+            return None
+        index = bisect_left(self.cumulative, rng.uniform(0, self.total))
+        return self.keys[index] if index < len(self.keys) else None
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """Event tables derived from :class:`Rules` for one game's cities and goods.
+
+    Built once per rules revision so the per-day hot paths do index lookups
+    instead of name lookups and dict rebuilds. Sampling draws exactly what the
+    uncompiled logic drew, in the same order: one ``rng.random()`` for the
+    daily/travel roll, one ``rng.uniform(0, total)`` to pick an event kind and,
+    for spoilage, one ``rng.random()`` via ``rng.choices`` (or ``rng.choice``
+    when no multipliers are configured). Saved games therefore replay
+    unchanged.
+    """
+
+    rules: Rules
+    revision: int
+    daily_chance: tuple[float, ...]
+    daily_events: _WeightTable
+    travel_events: _WeightTable
+    spoilage_weights: dict[str, float] | None
+
+    @classmethod
+    def compile(
+        cls, rules: Rules, cities: Sequence[str], good_names: Iterable[str]
+    ) -> CompiledRules:
+        if rules.daily_event_chance <= 0:
+            daily_chance = tuple(0.0 for _ in cities)
+        else:
+            daily_chance = tuple(
+                max(rules.daily_event_chance * rules.city_event_multipliers.get(city, 1.0), 0.0)
+                for city in cities
+            )
+        multipliers = rules.spoilage_item_multipliers
+        return cls(
+            rules=rules,
+            revision=rules._revision,
+            daily_chance=daily_chance,
+            daily_events=_WeightTable.from_weights(rules.daily_event_weights),
+            travel_events=_WeightTable.from_weights(rules.travel_event_weights),
+            spoilage_weights=(
+                {name: multipliers.get(name, 1.0) for name in good_names} if multipliers else None
+            ),
+        )
+
 
 @dataclass
 class GameState:
@@ -148,12 +358,61 @@ class GameState:
     rules: Rules
     status: GameOutcome = GameOutcome.ONGOING
     seed: int | None = None
-    event_log: list[dict[str, Any]] = field(default_factory=list)
+    event_log: EventLog = field(default_factory=EventLog)
     last_loss_value: float = 0.0
+    _compiled: CompiledRules | None = field(init=False, default=None, repr=False, compare=False)
+
+    def compiled_rules(self) -> CompiledRules:
+        """Event tables for the current rules, recompiled whenever they change."""
+        compiled = self._compiled
+        if (
+            compiled is None
+            or compiled.rules is not self.rules
+            or compiled.revision != self.rules._revision
+        ):
+            compiled = CompiledRules.compile(self.rules, self.cities, self.market.good_names())
+            self._compiled = compiled
+        return compiled
 
     def current_city(self) -> str:
         return self.cities[self.city_index]
 
+    def fork(self) -> GameState:
+        """Independent copy for branching (tree search, what-if evaluation).
+
+        Only the mutable numeric state is copied: cash/loan/inventory, market
+        prices, the event log and the RNG position. ``rules``, ``cities`` and
+        the goods catalog are shared with the original and must be treated as
+        read-only. Both games then play out identically for the same commands.
+        """
+        rng = _rng_at(self.rng.getstate())
+        clone = copy.copy(self)
+        clone.loan = LoanAccount(self.loan.balance, self.loan.rate, self.loan.max_balance)
+        clone.inventory = Inventory(dict(self.inventory.holdings), self.inventory.capacity)
+        clone.market = self.market.copy()
+        clone.rng = rng
+        clone.event_log = self.event_log.copy()
+        return clone
+
+
+class _EventLogAttribute:
+    """``GameState.event_log``; a plain list of events is wrapped in an :class:`EventLog`."""
+
+    def __get__(self, state: GameState | None, owner: type | None = None) -> Any:
+        if state is None:
+            return self
+        return state.__dict__["event_log"]
+
+    def __set__(self, state: GameState, events: Iterable[Event]) -> None:
+        if not isinstance(events, EventLog):
+            rules = state.__dict__.get("rules")
+            events = EventLog(events, limit=rules.event_log_limit if rules else None)
+        state.__dict__["event_log"] = events
+
+
+# Installed after @dataclass so the generated __init__ assigns through it.
+GameState.event_log = _EventLogAttribute()  # type: ignore[assignment]
+
 
 # Commands
 @dataclass
@@ -180,7 +439,16 @@ class RepayLoan:
 
 @dataclass
 class AdvanceDay:
+    """Let ``days`` pass in the current city.
+
+    ``exact=True`` replays day by day on the engine RNG (bit-exact across
+    saves). ``exact=False`` fast-forwards: random numbers are drawn in bulk and
+    interest compounds in closed form, giving a statistically equivalent but
+    different end state for the same seed.
+    """
+
     days: int = 1
+    exact: bool = True
 
 
 @dataclass
@@ -191,30 +459,55 @@ class SetSeed:
 Command = Buy | Sell | Travel | RepayLoan | AdvanceDay | SetSeed
 
 
-def create_default_state(seed: int | None = None, rules: Rules | None = None) -> GameState:
+def create_default_state(
+    seed: int | None = None,
+    rules: Rules | None = None,
+    *,
+    array_market: bool = False,
+) -> GameState:
+    """Build a fresh game; ``array_market`` selects the vectorized market backend."""
     rng = random.Random(seed)
     game_rules = rules or Rules()
-    market = build_market(
+    market: Market = build_market(
         DEFAULT_GOODS,
         DEFAULT_CITIES,
         rng,
         city_price_spread=game_rules.city_price_spread,
     )
+    if array_market:
+        market = ArrayMarket.from_market(market)
+    return _new_game(seed, game_rules, market, rng)
+
+
+def _new_game(seed: int | None, rules: Rules, market: Market, rng: random.Random) -> GameState:
+    """A day-0 game around an already drawn market (``rng`` just past the draw)."""
     return GameState(
         day=0,
         city_index=0,
         cash=2_000.0,
         loan=LoanAccount(balance=10_000.0, rate=0.01, max_balance=200_000.0),
-        inventory=Inventory(capacity=game_rules.inventory_capacity),
+        inventory=Inventory(capacity=rules.inventory_capacity),
         market=market,
         cities=DEFAULT_CITIES,
         rng=rng,
-        rules=game_rules,
+        rules=rules,
         status=GameOutcome.ONGOING,
         seed=seed,
     )
 
 
+def _rng_at(rng_state: tuple[Any, ...]) -> random.Random:
+    """A ``Random`` at ``rng_state``, skipping the OS-entropy seeding ``Random()`` does first."""
+    rng = random.Random.__new__(random.Random)
+    rng.setstate(rng_state)
+    return rng
+
+
+def clone_state(state: GameState) -> GameState:
+    """Functional spelling of :meth:`GameState.fork`."""
+    return state.fork()
+
+
 # --- Pricing helpers ------------------------------------------------------
 
 
@@ -240,40 +533,228 @@ def _fluctuate_world(state: GameState) -> None:
     )
 
 
-def apply_command(state: GameState, command: Command) -> None:
+_FAST_FORWARD_CHUNK_DAYS = 256
+
+
+class Stepper(ABC):
+    """A command in progress, advanced up to a budget of days per :meth:`step`.
+
+    Made by :func:`start_command`. The state is consistent between steps, so a
+    host may serve other commands (on this game or others) in between; running
+    a command in any number of steps, with nothing else in between, gives
+    exactly the state :func:`apply_command` would. ``days_total`` counts the
+    days the command takes (travel includes any weather delay), ``days_done``
+    those already run.
+    """
+
+    def __init__(self, state: GameState, days_total: int) -> None:
+        self.state = state
+        self.days_total = days_total
+        self.days_done = 0
+        self.finished = False
+
+    def step(
+        self,
+        max_days: int | None = None,
+        *,
+        deadline: float | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> bool:
+        """Advance up to ``max_days`` days (default: the rest); return whether the command is done.
+
+        ``deadline`` (a :func:`time.monotonic` value) and ``should_stop`` are
+        checked after every day and end the step early; a step always runs at
+        least one day, so repeated calls make progress. The game's outcome is
+        evaluated once, when the last day has run.
+        """
+        if self.finished:
+            return True
+        if max_days is not None and max_days < 1:
+            raise ValueError("max_days must be positive")
+        _ensure_ongoing(self.state)
+        remaining = self.days_total - self.days_done
+        if remaining > 0:
+            budget = remaining if max_days is None else min(max_days, remaining)
+
+            def keep_going() -> bool:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                return should_stop is None or not should_stop()
+
+            self.days_done += self._advance(budget, keep_going)
+        if self.days_done >= self.days_total:
+            _evaluate_outcome(self.state)
+            self.finished = True
+        return self.finished
+
+    @abstractmethod
+    def _advance(self, budget: int, keep_going: Callable[[], bool]) -> int:
+        """Run between one and ``budget`` days, stopping once ``keep_going()`` is false."""
+
+
+class _Done(Stepper):
+    """A command that took effect in :func:`start_command` and takes no days."""
+
+    def __init__(self, state: GameState) -> None:
+        super().__init__(state, 0)
+        self.finished = True
+
+    def _advance(self, budget: int, keep_going: Callable[[], bool]) -> int:
+        return 0  # pragma: no cover - a finished stepper never advances
+
+
+class _DailySteps(Stepper):
+    """One day at a time through ``daily`` (exact advances, travel)."""
+
+    def __init__(
+        self, state: GameState, days_total: int, daily: Callable[[GameState], None]
+    ) -> None:
+        super().__init__(state, days_total)
+        self._daily = daily
+
+    def _advance(self, budget: int, keep_going: Callable[[], bool]) -> int:
+        advanced = 0
+        while advanced < budget:
+            self._daily(self.state)
+            advanced += 1
+            if not keep_going():
+                break
+        return advanced
+
+
+def _advance_day(state: GameState) -> None:
+    _fluctuate_world(state)
+    _finish_day(state)
+
+
+def _finish_day(state: GameState) -> None:
+    """The rest of an exact day once prices have moved: the daily event, interest, the clock."""
+    _apply_daily_event(state)
+    state.loan.compound(1)
+    state.day += 1
+
+
+def _travel_day(state: GameState) -> None:
+    _fluctuate_world(state)
+    state.loan.compound(1)
+    state.day += 1
+
+
+class _FastForward(Stepper):
+    """Advance with bulk random draws and closed-form interest.
+
+    One 64-bit seed drawn from ``state.rng`` when the command starts drives a
+    NumPy generator that supplies every daily price shock and event roll,
+    ``_FAST_FORWARD_CHUNK_DAYS`` days at a time; a chunk left part-used by a step
+    is kept for the next one. What an event *does* still comes from
+    ``state.rng``. Prices step as arrays (a list-backed market is stepped
+    through a temporary :class:`ArrayMarket`), and the loan compounds in closed
+    form between event days, since events are the only thing that can move it
+    mid-advance. A step shows the accrued balance but keeps the balance it
+    accrued from, so the next step resumes the same closed-form span (unless
+    something else moved the loan in between).
+    """
+
+    def __init__(self, state: GameState, days_total: int) -> None:
+        super().__init__(state, days_total)
+        self._generator = np.random.default_rng(state.rng.getrandbits(64))
+        self._noise: np.ndarray | None = None
+        self._event_days: np.ndarray | None = None
+        self._offset = 0
+        # Loan balance before ``_uncompounded`` days of interest, and the
+        # accrued balance the last step left (to spot outside repayments).
+        self._anchor = state.loan.balance
+        self._uncompounded = 0
+        self._shown = state.loan.balance
+
+    def _advance(self, budget: int, keep_going: Callable[[], bool]) -> int:
+        state = self.state
+        original = state.market
+        market = (
+            original if isinstance(original, ArrayMarket) else ArrayMarket.from_market(original)
+        )
+        state.market = market
+        chance = _daily_event_chance(state)
+        reversion = state.rules.price_reversion
+        volatility = state.rules.price_volatility
+        start_day = state.day
+        noise, event_days, offset = self._noise, self._event_days, self._offset
+        if state.loan.balance == self._shown:
+            state.loan.balance, uncompounded = self._anchor, self._uncompounded
+        else:
+            uncompounded = 0
+        advanced = 0
+        try:
+            while advanced < budget:
+                if noise is None or event_days is None or offset == len(noise):
+                    left = self.days_total - self.days_done - advanced
+                    span = min(_FAST_FORWARD_CHUNK_DAYS, left)
+                    noise = self._generator.standard_normal((span, *market.values.shape))
+                    event_days = self._generator.random(span) < chance
+                    offset = 0
+                market.step(noise[offset], reversion=reversion, volatility=volatility)
+                if event_days[offset]:
+                    state.loan.compound_closed_form(uncompounded)
+                    uncompounded = 0
+                    state.day = start_day + advanced
+                    _trigger_daily_event(state)
+                uncompounded += 1
+                offset += 1
+                advanced += 1
+                if not keep_going():
+                    break
+        finally:
+            self._noise, self._event_days, self._offset = noise, event_days, offset
+            state.market = original
+            if market is not original:
+                market.copy_into(original)
+        self._anchor, self._uncompounded = state.loan.balance, uncompounded
+        state.loan.compound_closed_form(uncompounded)
+        self._shown = state.loan.balance
+        state.day = start_day + advanced
+        return advanced
+
+
+def start_command(state: GameState, command: Command) -> Stepper:
+    """Validate ``command`` and apply all of it but its days; run those with :meth:`Stepper.step`.
+
+    Commands that take no days (and invalid ones, which raise ``ValueError``)
+    are settled here, before the stepper is returned. ``apply_command(state,
+    command)`` is ``start_command(state, command).step()``.
+    """
     _ensure_ongoing(state)
 
-    if isinstance(command, SetSeed):
-        state.rng.seed(command.seed)
-        state.seed = command.seed
-        return
-
     if isinstance(command, AdvanceDay):
         if command.days < 1:
             raise ValueError("Days to advance must be positive")
-        for _ in range(command.days):
-            _fluctuate_world(state)
-            _apply_daily_event(state)
-            state.loan.compound(1)
-            state.day += 1
-        _evaluate_outcome(state)
-        return
+        if command.exact:
+            return _DailySteps(state, command.days, _advance_day)
+        return _FastForward(state, command.days)
 
     if isinstance(command, Travel):
         if command.destination_index < 0 or command.destination_index >= len(state.cities):
             raise ValueError("Invalid destination")
         if command.destination_index == state.city_index:
-            return
+            return _Done(state)
         if state.cash < state.rules.travel_cost:
             raise ValueError("Insufficient cash for travel")
         state.cash -= state.rules.travel_cost
         state.city_index = command.destination_index
         travel_days = state.rules.travel_time_days + _apply_travel_event(state)
-        for _ in range(travel_days):
-            _fluctuate_world(state)
-            state.loan.compound(1)
-            state.day += 1
-        _evaluate_outcome(state)
+        return _DailySteps(state, travel_days, _travel_day)
+
+    _apply_instant(state, command)
+    return _Done(state)
+
+
+def apply_command(state: GameState, command: Command) -> None:
+    start_command(state, command).step()
+
+
+def _apply_instant(state: GameState, command: Command) -> None:
+    if isinstance(command, SetSeed):
+        state.rng.seed(command.seed)
+        state.seed = command.seed
         return
 
     if isinstance(command, Buy):
@@ -314,9 +795,12 @@ def apply_command(state: GameState, command: Command) -> None:
 
 def _inventory_value(state: GameState) -> float:
     """Liquidation value of held goods at the current city's bid prices."""
+    board = state.market.board(state.city_index)
+    good_index = state.market.good_index
+    bid_factor = 1.0 - state.rules.trade_spread
     value = 0.0
     for name, qty in state.inventory.holdings.items():
-        value += bid_price(state, name) * qty
+        value += board[good_index(name)].value * bid_factor * qty
     return value
 
 
@@ -325,20 +809,11 @@ def net_worth(state: GameState) -> float:
 
 
 def _weighted_choice(weights: dict[str, float], rng: random.Random) -> str | None:
-    filtered = {k: v for k, v in weights.items() if v > 0}
-    if not filtered:
-        return None
-    total = sum(filtered.values())
-    roll = rng.uniform(0, total)
-    upto = 0.0
-    for key, weight in filtered.items():
-        upto += weight
-        if roll <= upto:
-            return key
-    return None
+    return _WeightTable.from_weights(weights).choose(rng)
 
 
 def _append_event(state: GameState, kind: str, details: dict[str, Any]) -> None:
+    state.event_log.limit = state.rules.event_log_limit
     state.event_log.append(
         {
             "kind": kind,
@@ -347,21 +822,24 @@ def _append_event(state: GameState, kind: str, details: dict[str, Any]) -> None:
             "details": details,
         }
     )
-    if state.rules.event_log_limit and state.rules.event_log_limit > 0:
-        state.event_log = state.event_log[-state.rules.event_log_limit :]
+
+
+def _daily_event_chance(state: GameState) -> float:
+    """Probability of a daily event in the current city (0 disables the roll)."""
+    return state.compiled_rules().daily_chance[state.city_index]
 
 
 def _apply_daily_event(state: GameState) -> None:
-    if state.rules.daily_event_chance <= 0:
-        return
-    city_multiplier = state.rules.city_event_multipliers.get(state.current_city(), 1.0)
-    effective_chance = state.rules.daily_event_chance * city_multiplier
+    effective_chance = _daily_event_chance(state)
     if effective_chance <= 0:
         return
     if state.rng.random() > effective_chance:
         return
+    _trigger_daily_event(state)
 
-    event_kind = _weighted_choice(state.rules.daily_event_weights, state.rng)
+
+def _trigger_daily_event(state: GameState) -> None:
+    event_kind = state.compiled_rules().daily_events.choose(state.rng)
     if event_kind is None:
         return
 
@@ -387,7 +865,7 @@ def _apply_travel_event(state: GameState) -> int:
     if state.rng.random() > state.rules.travel_event_chance:
         return 0
 
-    event_kind = _weighted_choice(state.rules.travel_event_weights, state.rng)
+    event_kind = state.compiled_rules().travel_events.choose(state.rng)
     if event_kind is None:
         return 0
 
@@ -425,6 +903,43 @@ def _event_theft(state: GameState) -> None:
     total_qty = state.inventory.total_quantity()
     if total_qty == 0:
         return
+    if state.rules.rng_scheme >= 2:
+        removed = _draw_theft(state, total_qty)
+    else:
+        removed = _draw_theft_per_unit(state, total_qty)
+
+    loss_value = 0.0
+    for name, qty in removed.items():
+        loss_value += _mid_price(state, name) * qty
+    state.last_loss_value += loss_value
+
+    _append_event(
+        state,
+        "theft",
+        {
+            "removed": removed,
+            "loss_value": loss_value,
+        },
+    )
+
+
+def _draw_theft(state: GameState, total_qty: int) -> dict[str, int]:
+    """Scheme 2: steal every unit in one draw without replacement."""
+    generator = np.random.default_rng(state.rng.getrandbits(64))
+    to_remove = max(1, int(total_qty * generator.uniform(0.05, 0.2)))
+    names = list(state.inventory.holdings)
+    counts = np.fromiter(state.inventory.holdings.values(), dtype=np.int64, count=len(names))
+    taken = generator.multivariate_hypergeometric(counts, to_remove).tolist()
+    removed: dict[str, int] = {}
+    for name, quantity in zip(names, taken, strict=True):
+        if quantity:
+            state.inventory.remove(name, quantity)
+            removed[name] = quantity
+    return removed
+
+
+def _draw_theft_per_unit(state: GameState, total_qty: int) -> dict[str, int]:
+    """Scheme 1: one weighted draw per stolen unit."""
     fraction = state.rng.uniform(0.05, 0.2)
     to_remove = max(1, int(total_qty * fraction))
 
@@ -441,20 +956,7 @@ def _event_theft(state: GameState) -> None:
         state.inventory.remove(choice, 1)
         removed[choice] = removed.get(choice, 0) + 1
         total_qty -= 1
-
-    loss_value = 0.0
-    for name, qty in removed.items():
-        loss_value += _mid_price(state, name) * qty
-    state.last_loss_value += loss_value
-
-    _append_event(
-        state,
-        "theft",
-        {
-            "removed": removed,
-            "loss_value": loss_value,
-        },
-    )
+    return removed
 
 
 def _event_weather_delay(state: GameState) -> int:
@@ -504,17 +1006,17 @@ def _event_spoilage(state: GameState) -> None:
     if total_qty == 0:
         return
     items = list(state.inventory.holdings.keys())
-    if state.rules.spoilage_item_multipliers:
-        weights = [state.rules.spoilage_item_multipliers.get(name, 1.0) for name in items]
-        good_name = state.rng.choices(items, weights=weights, k=1)[0]
+    spoilage_weights = state.compiled_rules().spoilage_weights
+    weights = (
+        None if spoilage_weights is None else [spoilage_weights.get(name, 1.0) for name in items]
+    )
+    if state.rules.rng_scheme >= 2:
+        drawn = _draw_spoilage(state, items, weights)
     else:
-        good_name = state.rng.choice(items)
-    current_qty = state.inventory.quantity(good_name)
-    if current_qty == 0:
+        drawn = _draw_spoilage_legacy(state, items, weights)
+    if drawn is None:
         return
-    fraction = state.rng.uniform(0.1, 0.3)
-    to_remove = max(1, int(current_qty * fraction))
-    to_remove = min(to_remove, current_qty)
+    good_name, to_remove = drawn
     state.inventory.remove(good_name, to_remove)
     loss_value = _mid_price(state, good_name) * to_remove
     state.last_loss_value += loss_value
@@ -529,11 +1031,44 @@ def _event_spoilage(state: GameState) -> None:
     )
 
 
+def _draw_spoilage(
+    state: GameState, items: list[str], weights: list[float] | None
+) -> tuple[str, int] | None:
+    """Scheme 2: pick the good and the spoiled fraction from one seeded generator."""
+    generator = np.random.default_rng(state.rng.getrandbits(64))
+    if weights is None:
+        index = int(generator.integers(len(items)))
+    else:
+        total = sum(weights)
+        if total <= 0:
+            return None
+        index = int(generator.choice(len(items), p=np.asarray(weights) / total))
+    current_qty = state.inventory.quantity(items[index])
+    if current_qty == 0:
+        return None
+    to_remove = max(1, int(current_qty * generator.uniform(0.1, 0.3)))
+    return items[index], min(to_remove, current_qty)
+
+
+def _draw_spoilage_legacy(
+    state: GameState, items: list[str], weights: list[float] | None
+) -> tuple[str, int] | None:
+    """Scheme 1: ``rng.choices``/``rng.choice`` for the good, then ``rng.uniform``."""
+    if weights is None:
+        good_name = state.rng.choice(items)
+    else:
+        good_name = state.rng.choices(items, weights=weights, k=1)[0]
+    current_qty = state.inventory.quantity(good_name)
+    if current_qty == 0:
+        return None
+    fraction = state.rng.uniform(0.1, 0.3)
+    to_remove = max(1, int(current_qty * fraction))
+    return good_name, min(to_remove, current_qty)
+
+
 def _event_market_shock(state: GameState) -> None:
     multiplier = state.rng.uniform(0.85, 1.15)
-    for board in state.market.boards:
-        for quote in board:
-            _clamp_quote(quote, quote.value * multiplier)
+    state.market.scale_prices(multiplier)
     _append_event(
         state,
         "market_shock",
@@ -623,80 +1158,126 @@ def _decode_rng_state(data: dict[str, Any]) -> tuple[int, tuple[int, ...], float
     )
 
 
-def state_to_dict(state: GameState) -> dict[str, Any]:
+def _quote_to_dict(quote: Quote) -> dict[str, Any]:
     return {
-        "version": STATE_VERSION,
-        "day": state.day,
-        "city_index": state.city_index,
-        "cash": state.cash,
-        "loan": {
-            "balance": state.loan.balance,
-            "rate": state.loan.rate,
-            "max_balance": state.loan.max_balance,
-        },
-        "inventory": {
-            "holdings": state.inventory.holdings,
-            "capacity": state.inventory.capacity,
-        },
-        "market": {
-            "goods": [
-                {
-                    "name": good.name,
-                    "base_value": good.base_value,
-                    "min_value": good.min_value,
-                    "max_value": good.max_value,
-                }
-                for good in state.market.goods
-            ],
-            "boards": [
-                [
-                    {
-                        "good": quote.good,
-                        "value": quote.value,
-                        "base_value": quote.base_value,
-                        "min_value": quote.min_value,
-                        "max_value": quote.max_value,
-                        "last_value": quote.last_value,
-                    }
-                    for quote in board
-                ]
-                for board in state.market.boards
-            ],
-        },
-        "cities": list(state.cities),
-        "rules": {
-            "travel_cost": state.rules.travel_cost,
-            "travel_time_days": state.rules.travel_time_days,
-            "inventory_capacity": state.rules.inventory_capacity,
-            "win_net_worth": state.rules.win_net_worth,
-            "max_days": state.rules.max_days,
-            "trade_spread": state.rules.trade_spread,
-            "price_reversion": state.rules.price_reversion,
-            "price_volatility": state.rules.price_volatility,
-            "city_price_spread": list(state.rules.city_price_spread),
-            "daily_event_chance": state.rules.daily_event_chance,
-            "travel_event_chance": state.rules.travel_event_chance,
-            "event_log_limit": state.rules.event_log_limit,
-            "daily_event_weights": state.rules.daily_event_weights,
-            "travel_event_weights": state.rules.travel_event_weights,
-            "city_event_multipliers": state.rules.city_event_multipliers,
-            "spoilage_item_multipliers": state.rules.spoilage_item_multipliers,
-        },
-        "status": state.status.value,
-        "seed": state.seed,
-        "rng_state": _encode_rng_state(state.rng),
-        "event_log": list(state.event_log),
-        "last_loss_value": state.last_loss_value,
+        "good": quote.good,
+        "value": quote.value,
+        "base_value": quote.base_value,
+        "min_value": quote.min_value,
+        "max_value": quote.max_value,
+        "last_value": quote.last_value,
     }
 
 
-def state_from_dict(payload: dict[str, Any]) -> GameState:
-    if payload.get("version") != STATE_VERSION:
-        raise ValueError("Unsupported state version")
+def _market_to_dict(market: Market) -> dict[str, Any]:
+    return {
+        "backend": "array" if isinstance(market, ArrayMarket) else "list",
+        "goods": [
+            {
+                "name": good.name,
+                "base_value": good.base_value,
+                "min_value": good.min_value,
+                "max_value": good.max_value,
+            }
+            for good in market.goods
+        ],
+        "boards": [[_quote_to_dict(quote) for quote in board] for board in market.boards],
+    }
+
+
+def _rules_to_dict(rules: Rules) -> dict[str, Any]:
+    return {
+        "travel_cost": rules.travel_cost,
+        "travel_time_days": rules.travel_time_days,
+        "inventory_capacity": rules.inventory_capacity,
+        "win_net_worth": rules.win_net_worth,
+        "max_days": rules.max_days,
+        "trade_spread": rules.trade_spread,
+        "price_reversion": rules.price_reversion,
+        "price_volatility": rules.price_volatility,
+        "city_price_spread": list(rules.city_price_spread),
+        "daily_event_chance": rules.daily_event_chance,
+        "travel_event_chance": rules.travel_event_chance,
+        "event_log_limit": rules.event_log_limit,
+        "rng_scheme": rules.rng_scheme,
+        "daily_event_weights": rules.daily_event_weights,
+        "travel_event_weights": rules.travel_event_weights,
+        "city_event_multipliers": rules.city_event_multipliers,
+        "spoilage_item_multipliers": rules.spoilage_item_multipliers,
+    }
+
 
-    raw_rules = payload["rules"]
+# One builder per top-level key, in output order; only selected ones run.
+_STATE_SECTIONS: dict[str, Callable[[GameState], Any]] = {
+    "version": lambda _: STATE_VERSION,
+    "day": lambda state: state.day,
+    "city_index": lambda state: state.city_index,
+    "cash": lambda state: state.cash,
+    "loan": lambda state: {
+        "balance": state.loan.balance,
+        "rate": state.loan.rate,
+        "max_balance": state.loan.max_balance,
+    },
+    "inventory": lambda state: {
+        "holdings": state.inventory.holdings,
+        "capacity": state.inventory.capacity,
+    },
+    "market": lambda state: _market_to_dict(state.market),
+    "cities": lambda state: list(state.cities),
+    "rules": lambda state: _rules_to_dict(state.rules),
+    "status": lambda state: state.status.value,
+    "seed": lambda state: state.seed,
+    "rng_state": lambda state: _encode_rng_state(state.rng),
+    "event_log": lambda state: list(state.event_log),
+    "last_loss_value": lambda state: state.last_loss_value,
+}
+# Derived views that are not part of a full snapshot, built only when asked for.
+_EXTRA_SECTIONS: dict[str, Callable[[GameState], Any]] = {
+    "board": lambda state: [
+        _quote_to_dict(quote) for quote in state.market.board(state.city_index)
+    ],
+}
+STATE_FIELDS: tuple[str, ...] = tuple(_STATE_SECTIONS)
+EXTRA_STATE_FIELDS: tuple[str, ...] = tuple(_EXTRA_SECTIONS)
+
+
+def validate_state_fields(names: Iterable[str]) -> None:
+    unknown = sorted(set(names) - set(STATE_FIELDS) - set(EXTRA_STATE_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown state field(s): {', '.join(unknown)}")
+
+
+def state_to_dict(
+    state: GameState,
+    *,
+    fields: Collection[str] | None = None,
+    exclude: Collection[str] = (),
+) -> dict[str, Any]:
+    """Serialize ``state``; with no arguments the result round-trips via ``state_from_dict``.
+
+    ``fields`` limits the output to those top-level keys (which may include the
+    derived ``board`` view of the current city) and ``exclude`` drops keys. Only
+    the selected sections are computed.
+    """
+    validate_state_fields(exclude)
+    if fields is None:
+        selected: Collection[str] = STATE_FIELDS
+    else:
+        validate_state_fields(fields)
+        selected = fields
+    return {
+        name: build(state)
+        for name, build in (_STATE_SECTIONS | _EXTRA_SECTIONS).items()
+        if name in selected and name not in exclude
+    }
+
+
+def _rules_from_dict(raw_rules: dict[str, Any]) -> Rules:
     spread = raw_rules.get("city_price_spread", [0.7, 1.3])
-    rules = Rules(
+    rng_scheme = raw_rules.get("rng_scheme", 1)
+    if rng_scheme not in RNG_SCHEMES:
+        raise ValueError(f"Unsupported rng_scheme: {rng_scheme}")
+    return Rules(
         travel_cost=raw_rules["travel_cost"],
         travel_time_days=raw_rules["travel_time_days"],
         inventory_capacity=raw_rules.get("inventory_capacity"),
@@ -709,12 +1290,20 @@ def state_from_dict(payload: dict[str, Any]) -> GameState:
         daily_event_chance=raw_rules.get("daily_event_chance", 0.0),
         travel_event_chance=raw_rules.get("travel_event_chance", 0.0),
         event_log_limit=raw_rules.get("event_log_limit"),
+        rng_scheme=rng_scheme,
         daily_event_weights=dict(raw_rules.get("daily_event_weights", {})),
         travel_event_weights=dict(raw_rules.get("travel_event_weights", {})),
         city_event_multipliers=dict(raw_rules.get("city_event_multipliers", {})),
         spoilage_item_multipliers=dict(raw_rules.get("spoilage_item_multipliers", {})),
     )
 
+
+def state_from_dict(payload: dict[str, Any]) -> GameState:
+    if payload.get("version") != STATE_VERSION:
+        raise ValueError("Unsupported state version")
+
+    rules = _rules_from_dict(payload["rules"])
+
     seed = payload.get("seed")
     rng = random.Random()
     if payload.get("rng_state") is not None:
@@ -722,7 +1311,7 @@ def state_from_dict(payload: dict[str, Any]) -> GameState:
     elif seed is not None:
         rng.seed(seed)
 
-    market = Market(
+    market: Market = Market(
         goods=[
             Good(
                 name=good["name"],
@@ -747,6 +1336,8 @@ def state_from_dict(payload: dict[str, Any]) -> GameState:
             for board in payload["market"]["boards"]
         ],
     )
+    if payload["market"].get("backend") == "array":
+        market = ArrayMarket.from_market(market)
 
     state = GameState(
         day=payload["day"],
@@ -767,7 +1358,7 @@ def state_from_dict(payload: dict[str, Any]) -> GameState:
         rules=rules,
         status=GameOutcome(payload.get("status", GameOutcome.ONGOING.value)),
         seed=seed,
-        event_log=list(payload.get("event_log", [])),
+        event_log=EventLog(payload.get("event_log", []), limit=rules.event_log_limit),
         last_loss_value=payload.get("last_loss_value", 0.0),
     )
 
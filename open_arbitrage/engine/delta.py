@@ -0,0 +1,69 @@
+"""State deltas: report only what changed since a client last looked."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .core import GameState
+
+
+class DeltaTracker:
+    """Remember what a client has seen of one game and diff against it.
+
+    Tracks the scalars, loan balance, holdings, every city's mid prices and the
+    newest event ``seq``. :meth:`diff` returns only the keys that changed (same
+    names as ``state_to_dict``) and then treats the new state as seen, so
+    consecutive diffs never repeat themselves.
+    """
+
+    def __init__(self, state: GameState) -> None:
+        self._day = state.day
+        self._city_index = state.city_index
+        self._cash = state.cash
+        self._loan = state.loan.balance
+        self._status = state.status
+        self._holdings = dict(state.inventory.holdings)
+        self._prices = state.market.mid_prices()
+        self._last_seq = state.event_log.last_seq
+
+    def diff(self, state: GameState) -> dict[str, Any]:
+        """Changes since the previous call (or construction); ``{}`` if none.
+
+        ``board`` lists changed cells as ``{"city_index", "good", "value"}``;
+        ``events`` lists the new event log entries still retained.
+        """
+        delta: dict[str, Any] = {}
+        if state.day != self._day:
+            delta["day"] = self._day = state.day
+        if state.city_index != self._city_index:
+            delta["city_index"] = self._city_index = state.city_index
+        if state.cash != self._cash:
+            delta["cash"] = self._cash = state.cash
+        if state.loan.balance != self._loan:
+            self._loan = state.loan.balance
+            delta["loan"] = {"balance": self._loan}
+        if state.status is not self._status:
+            self._status = state.status
+            delta["status"] = self._status.value
+        if state.inventory.holdings != self._holdings:
+            self._holdings = dict(state.inventory.holdings)
+            delta["inventory"] = {"holdings": dict(self._holdings)}
+
+        prices = state.market.mid_prices()
+        cities, goods = np.nonzero(prices != self._prices)
+        if len(cities):
+            names = state.market.good_names()
+            delta["board"] = [
+                {"city_index": city, "good": names[good], "value": value}
+                for city, good, value in zip(
+                    cities.tolist(), goods.tolist(), prices[cities, goods].tolist(), strict=True
+                )
+            ]
+        self._prices = prices
+
+        if state.event_log.last_seq != self._last_seq:
+            delta["events"] = state.event_log.events_since(self._last_seq)
+            self._last_seq = state.event_log.last_seq
+        return delta
@@ -0,0 +1,67 @@
+"""Arbitrage scanner: rank every (buy city, sell city, good) trip at once."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .core import GameState
+
+
+@dataclass
+class Opportunity:
+    """Buy ``good`` at ``buy_city_index``'s ask, carry it, sell at ``sell_city_index``'s bid."""
+
+    buy_city_index: int
+    sell_city_index: int
+    good: str
+    ask: float
+    bid: float
+    profit_per_unit: float
+
+
+def scan_opportunities(
+    state: GameState, top_k: int = 10, *, lot_size: int | None = None
+) -> list[Opportunity]:
+    """Return the ``top_k`` most profitable trips, best first.
+
+    Profit per unit is the sell city's bid minus the buy city's ask (so the
+    ``trade_spread`` is paid on both legs) minus ``travel_cost`` spread over a
+    lot of ``lot_size`` units (default: the inventory capacity, or 1 when it is
+    unbounded). The whole cities x cities x goods profit tensor is computed in
+    one vectorized pass; only strictly profitable trips between distinct cities
+    are returned, ties broken by (buy city, sell city, good) order.
+    """
+    if top_k < 1:
+        raise ValueError("top_k must be positive")
+    lot = lot_size if lot_size is not None else state.rules.inventory_capacity or 1
+    if lot < 1:
+        raise ValueError("lot_size must be positive")
+
+    mids = state.market.mid_prices()
+    asks = mids * (1.0 + state.rules.trade_spread)
+    bids = mids * (1.0 - state.rules.trade_spread)
+    profit = bids[np.newaxis, :, :] - asks[:, np.newaxis, :] - state.rules.travel_cost / lot
+    cities = np.arange(mids.shape[0])
+    profit[cities, cities, :] = -np.inf
+
+    flat = profit.ravel()
+    candidates = np.flatnonzero(flat > 0.0)
+    if candidates.size > top_k:
+        keep = np.argpartition(-flat[candidates], top_k - 1)[:top_k]
+        candidates = np.sort(candidates[keep])
+    ranked = candidates[np.argsort(-flat[candidates], kind="stable")]
+
+    names = state.market.good_names()
+    return [
+        Opportunity(
+            buy_city_index=int(buy),
+            sell_city_index=int(sell),
+            good=names[good],
+            ask=float(asks[buy, good]),
+            bid=float(bids[sell, good]),
+            profit_per_unit=float(profit[buy, sell, good]),
+        )
+        for buy, sell, good in zip(*np.unravel_index(ranked, profit.shape), strict=True)
+    ]
@@ -0,0 +1,119 @@
+"""Compact, versioned binary snapshots of a :class:`GameState`.
+
+Layout (all integers and floats little-endian)::
+
+    b"OASN"                      magic
+    u16 format version, u32 N    header length in bytes
+    N bytes                      UTF-8 JSON header: rules, goods catalog, cities,
+                                 scalars, inventory, event log (``state_to_dict``
+                                 minus the boards and RNG words)
+    u32 cities, u32 goods
+    f64[5, cities, goods]        value, base_value, min_value, max_value, last_value
+    u32 W, u32[W]                Mersenne Twister state words (incl. position)
+
+Decoding is the exact inverse: ``state_to_dict(state_from_bytes(state_to_bytes(s)))``
+equals ``state_to_dict(s)``, and play continues identically.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+
+import numpy as np
+
+from ..market import ArrayMarket
+from .core import GameState, state_from_dict, state_to_dict
+
+SNAPSHOT_MAGIC = b"OASN"
+SNAPSHOT_VERSION = 1
+
+_PREFIX = struct.Struct("<4sHI")
+_SHAPE = struct.Struct("<II")
+_COUNT = struct.Struct("<I")
+
+
+def state_to_bytes(state: GameState) -> bytes:
+    header = state_to_dict(state, exclude=("market", "rng_state"))
+    market = state.market
+    arrays = market if isinstance(market, ArrayMarket) else ArrayMarket.from_market(market)
+    header["market"] = {
+        "backend": "array" if arrays is market else "list",
+        "goods": [
+            {
+                "name": good.name,
+                "base_value": good.base_value,
+                "min_value": good.min_value,
+                "max_value": good.max_value,
+            }
+            for good in market.goods
+        ],
+    }
+    rng_version, internal, gauss_next = state.rng.getstate()
+    header["rng"] = {"version": rng_version, "gauss_next": gauss_next}
+
+    encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    planes = np.stack(
+        [
+            arrays.values,
+            arrays.base_values,
+            arrays.min_values,
+            arrays.max_values,
+            arrays.last_values,
+        ]
+    ).astype("<f8", copy=False)
+    words = np.asarray(internal, dtype="<u4")
+    return b"".join(
+        [
+            _PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(encoded_header)),
+            encoded_header,
+            _SHAPE.pack(*arrays.values.shape),
+            planes.tobytes(),
+            _COUNT.pack(words.size),
+            words.tobytes(),
+        ]
+    )
+
+
+def state_from_bytes(data: bytes) -> GameState:
+    try:
+        magic, version, header_length = _PREFIX.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an Open Arbitrage snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version")
+        offset = _PREFIX.size
+        header = json.loads(data[offset : offset + header_length])
+        offset += header_length
+        cities, goods = _SHAPE.unpack_from(data, offset)
+        offset += _SHAPE.size
+        cells = 5 * cities * goods
+        planes = np.frombuffer(data, dtype="<f8", count=cells, offset=offset)
+        offset += planes.nbytes
+        (word_count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        words = np.frombuffer(data, dtype="<u4", count=word_count, offset=offset)
+        offset += words.nbytes
+    except (struct.error, ValueError) as exc:
+        raise ValueError(f"Corrupt snapshot: {exc}") from exc
+    if offset != len(data):
+        raise ValueError("Corrupt snapshot: trailing bytes")
+
+    rng = header.pop("rng")
+    market = header.pop("market")
+    header["market"] = {"goods": market["goods"], "boards": []}
+    header["rng_state"] = {
+        "version": rng["version"],
+        "internal": words.tolist(),
+        "gauss_next": rng["gauss_next"],
+    }
+    state = state_from_dict(header)
+
+    values, base_values, min_values, max_values, last_values = planes.astype(np.float64).reshape(
+        5, cities, goods
+    )
+    arrays = ArrayMarket(
+        state.market.goods, values, base_values, min_values, max_values, last_values
+    )
+    state.market = arrays if market["backend"] == "array" else arrays.to_market()
+    return state
@@ -0,0 +1,67 @@
+"""Template states: new seeded games cloned from a cached pristine copy."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from ..market import Market
+from .core import GameState, Rules, _new_game, _rng_at, create_default_state
+
+# What a new game reads from its rules before play starts, besides keeping them.
+_TemplateKey = tuple[int, tuple[float, float], bool]
+
+
+@dataclass(frozen=True)
+class _Template:
+    market: Market  # pristine; only ever copied
+    rng_state: tuple[Any, ...]
+
+
+class StateTemplates:
+    """Hands out new seeded games as clones of cached day-0 states.
+
+    :meth:`create` is a drop-in for :func:`create_default_state`: the game it
+    returns is identical, down to the RNG position, but a seed seen before
+    costs a copy of its market instead of drawing and building one. Templates
+    are keyed by seed, market backend and the rules' fingerprint for creation
+    (only ``city_price_spread`` shapes the starting board); the newest
+    ``max_templates`` are kept. Without ``rules`` a game gets a copy of
+    default ones. Seedless games are built fresh every time. Safe to share
+    between threads.
+    """
+
+    def __init__(self, max_templates: int = 1_024) -> None:
+        if max_templates < 1:
+            raise ValueError("max_templates must be positive")
+        self.max_templates = max_templates
+        self._templates: OrderedDict[_TemplateKey, _Template] = OrderedDict()
+        self._default_rules = Rules()  # only ever copied
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def create(
+        self, seed: int | None = None, rules: Rules | None = None, *, array_market: bool = False
+    ) -> GameState:
+        game_rules = rules or self._default_rules.copy()
+        if seed is None:
+            return create_default_state(rules=game_rules, array_market=array_market)
+        low, high = game_rules.city_price_spread
+        key = (seed, (low, high), array_market)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+        if template is None:
+            pristine = create_default_state(seed, game_rules, array_market=array_market)
+            template = _Template(pristine.market.copy(), pristine.rng.getstate())
+            with self._lock:
+                self._templates[key] = template
+                while len(self._templates) > self.max_templates:
+                    self._templates.popitem(last=False)
+            return pristine
+        return _new_game(seed, game_rules, template.market.copy(), _rng_at(template.rng_state))
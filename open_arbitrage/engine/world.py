@@ -0,0 +1,80 @@
+"""Lockstep play: many games advanced one day at a time, their boards stacked."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from ..market import ArrayMarket, MarketStack
+from .core import GameOutcome, GameState, _evaluate_outcome, _finish_day
+
+
+class World:
+    """Games that advance together, one exact day per :meth:`tick`.
+
+    Boards are stacked by shape in :class:`~open_arbitrage.market.MarketStack`
+    s, so one vectorized step moves the prices of every game; the rest of the
+    day (each game's own random draws, its events, interest and outcome) stays
+    per game. For each game a tick is exactly ``apply_command(state,
+    AdvanceDay())``. A game joins on its first tick; a list-backed market
+    switches to :class:`~open_arbitrage.market.ArrayMarket` then (same
+    dynamics, different draws from then on).
+    """
+
+    def __init__(self) -> None:
+        self._stacks: dict[tuple[int, int], MarketStack] = {}
+        self._members: dict[int, GameState] = {}  # id(state.market) -> state
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def tick(self, states: Iterable[GameState]) -> list[GameState]:
+        """Advance every ongoing game in ``states`` one day; return the games advanced.
+
+        Members missing from ``states``, and finished games, leave the world
+        first. Joining and leaving repoint market arrays, so the caller must
+        keep all of ``states`` to itself until the tick returns.
+        """
+        ongoing = [state for state in states if state.status is GameOutcome.ONGOING]
+        self._sync(ongoing)
+        for stack in self._stacks.values():
+            members = [self._members[id(market)] for market in stack.markets]
+            noise = np.empty((len(members), *stack.shape))
+            for row, state in enumerate(members):
+                # As ArrayMarket.fluctuate draws it, from the game's own RNG.
+                generator = np.random.default_rng(state.rng.getrandbits(64))
+                generator.standard_normal(out=noise[row])
+            stack.step(
+                noise,
+                reversion=np.array([state.rules.price_reversion for state in members]),
+                volatility=np.array([state.rules.price_volatility for state in members]),
+            )
+        for state in ongoing:
+            _finish_day(state)
+            _evaluate_outcome(state)
+        return ongoing
+
+    def _sync(self, ongoing: list[GameState]) -> None:
+        wanted: set[int] = set()
+        joining: list[tuple[ArrayMarket, GameState]] = []
+        for state in ongoing:
+            if isinstance(state.market, ArrayMarket):
+                market = state.market
+            else:
+                market = ArrayMarket.from_market(state.market)
+                state.market = market
+            wanted.add(id(market))
+            if id(market) not in self._members:
+                joining.append((market, state))
+        for stack in self._stacks.values():
+            for member in stack.markets:
+                if id(member) not in wanted:
+                    stack.discard(member)
+                    del self._members[id(member)]
+        for market, state in joining:
+            shape = market.values.shape
+            if shape not in self._stacks:
+                self._stacks[shape] = MarketStack(*shape)
+            self._stacks[shape].add(market)
+            self._members[id(market)] = state
@@ -0,0 +1,174 @@
+"""Gym-style vectorized environment: N games in, NumPy arrays out.
+
+Actions are an integer array of shape ``(N, 3)``: ``(kind, target, amount)``
+with ``kind`` one of :class:`Action`. ``target`` is a good index for buy/sell
+and a city index for travel; ``amount`` is the quantity, days to advance, or
+cash to repay. Observations are packed straight from the engine objects into
+arrays (no ``state_to_dict``), and rewards are net-worth deltas.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from enum import IntEnum
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .engine import (
+    AdvanceDay,
+    ArrayMarket,
+    Buy,
+    GameOutcome,
+    GameState,
+    RepayLoan,
+    Rules,
+    Sell,
+    StateTemplates,
+    Travel,
+    apply_command,
+)
+from .engine.core import Command
+
+Observation = dict[str, npt.NDArray[Any]]
+
+_OUTCOME_CODES = {GameOutcome.ONGOING: 0, GameOutcome.WON: 1, GameOutcome.LOST: -1}
+
+
+class Action(IntEnum):
+    ADVANCE = 0
+    BUY = 1
+    SELL = 2
+    TRAVEL = 3
+    REPAY = 4
+
+
+class VectorEnv:
+    """Hold ``num_envs`` games and step them together.
+
+    Finished games are left as they are: stepping them is a no-op with zero
+    reward until the next :meth:`reset`.
+    """
+
+    def __init__(
+        self, num_envs: int, *, rules: Rules | None = None, array_market: bool = True
+    ) -> None:
+        if num_envs < 1:
+            raise ValueError("num_envs must be positive")
+        self.num_envs = num_envs
+        self.rules = rules or Rules()
+        self.array_market = array_market
+        self.states: list[GameState] = []
+        # Episodes usually replay the same seeds; later resets clone those games.
+        self._templates = StateTemplates(max_templates=max(num_envs, 1_024))
+        self.good_names: list[str] = []
+        self._worth = np.zeros(num_envs, dtype=np.float64)
+
+    def reset(self, seeds: Sequence[int | None]) -> Observation:
+        if len(seeds) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} seeds, got {len(seeds)}")
+        self.states = [
+            self._templates.create(seed, self.rules, array_market=self.array_market)
+            for seed in seeds
+        ]
+        self.good_names = self.states[0].market.good_names()
+        observation = self._observe()
+        self._worth = _net_worth(observation)
+        return observation
+
+    def step(
+        self, actions: npt.ArrayLike
+    ) -> tuple[Observation, npt.NDArray[np.float64], npt.NDArray[np.bool_], Observation]:
+        """Apply one action per game; returns ``(observation, reward, done, info)``.
+
+        ``info["invalid"]`` flags actions the engine rejected (the game is left
+        unchanged, as with any rejected command).
+        """
+        if not self.states:
+            raise RuntimeError("Call reset() before step()")
+        batch = np.asarray(actions, dtype=np.int64)
+        if batch.shape != (self.num_envs, 3):
+            raise ValueError(f"actions must have shape ({self.num_envs}, 3)")
+
+        invalid = np.zeros(self.num_envs, dtype=np.bool_)
+        for index, (state, (kind, target, amount)) in enumerate(
+            zip(self.states, batch.tolist(), strict=True)
+        ):
+            if state.status is not GameOutcome.ONGOING:
+                continue
+            try:
+                apply_command(state, self._decode(kind, target, amount))
+            except (ValueError, IndexError):
+                invalid[index] = True
+
+        observation = self._observe()
+        worth = _net_worth(observation)
+        reward = worth - self._worth
+        self._worth = worth
+        done = observation["status"] != 0
+        return observation, reward, done, {"invalid": invalid}
+
+    def _decode(self, kind: int, target: int, amount: int) -> Command:
+        if kind == Action.ADVANCE:
+            return AdvanceDay(days=max(amount, 1))
+        if kind == Action.BUY:
+            return Buy(good_name=self._good_name(target), quantity=amount)
+        if kind == Action.SELL:
+            return Sell(good_name=self._good_name(target), quantity=amount)
+        if kind == Action.TRAVEL:
+            return Travel(destination_index=target)
+        if kind == Action.REPAY:
+            return RepayLoan(amount=float(amount))
+        raise ValueError(f"Unknown action kind: {kind}")
+
+    def _good_name(self, target: int) -> str:
+        # Negative indexes would wrap around to the last goods.
+        if not 0 <= target < len(self.good_names):
+            raise ValueError(f"Unknown good index: {target}")
+        return self.good_names[target]
+
+    def _observe(self) -> Observation:
+        count, goods = self.num_envs, len(self.good_names)
+        mid = np.empty((count, goods), dtype=np.float64)
+        holdings = np.zeros((count, goods), dtype=np.int64)
+        cash = np.empty(count, dtype=np.float64)
+        loan = np.empty(count, dtype=np.float64)
+        day = np.empty(count, dtype=np.int64)
+        city = np.empty(count, dtype=np.int64)
+        status = np.empty(count, dtype=np.int8)
+
+        for row, state in enumerate(self.states):
+            market = state.market
+            if isinstance(market, ArrayMarket):
+                mid[row] = market.values[state.city_index]
+            else:
+                mid[row] = [quote.value for quote in market.board(state.city_index)]
+            for name, quantity in state.inventory.holdings.items():
+                holdings[row, market.good_index(name)] = quantity
+            cash[row] = state.cash
+            loan[row] = state.loan.balance
+            day[row] = state.day
+            city[row] = state.city_index
+            status[row] = _OUTCOME_CODES[state.status]
+
+        spread = self.rules.trade_spread
+        return {
+            "bid": mid * (1.0 - spread),
+            "ask": mid * (1.0 + spread),
+            "holdings": holdings,
+            "cash": cash,
+            "loan": loan,
+            "day": day,
+            "city": city,
+            "status": status,
+        }
+
+
+def _net_worth(observation: Observation) -> npt.NDArray[np.float64]:
+    worth: npt.NDArray[np.float64] = (
+        observation["cash"]
+        + (observation["bid"] * observation["holdings"]).sum(axis=1)
+        - observation["loan"]
+    )
+    return worth
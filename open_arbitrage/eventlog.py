@@ -0,0 +1,217 @@
+"""Event fan-out for the HTTP service: a JSONL file writer and in-memory feeds.
+
+Commands only enqueue their new events; a single daemon thread serializes them,
+batches the lines and appends them through one file handle that stays open
+between writes, so the request path never touches the filesystem.
+:class:`EventFeed` keeps each game's recent events in memory for clients that
+poll (or long-poll, from a thread or an event loop) for what is new since
+their cursor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Sequence
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EventLogWriter:
+    """Append events from every game to one JSONL file, in batches.
+
+    Buffered lines are written and flushed when ``batch_size`` lines are
+    pending, when the oldest pending line is ``flush_interval`` seconds old, on
+    :meth:`flush`, and on :meth:`close`. The file (and its parent directory) is
+    created on the first write, so a writer that never sees events leaves no
+    trace on disk. A batch that cannot be written is logged and dropped; the
+    next :meth:`flush` or :meth:`close` re-raises the error.
+    """
+
+    def __init__(self, path: Path, *, batch_size: int = 256, flush_interval: float = 0.5) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._handle: IO[str] | None = None
+        self._closed = False
+        self._error: Exception | None = None
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, game_id: str, events: Iterable[dict[str, Any]]) -> None:
+        """Queue ``events`` for ``game_id``; returns immediately."""
+        if self._closed:
+            raise RuntimeError("Event log writer is closed")
+        self._queue.put((game_id, list(events)))
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is on disk.
+
+        Raises the first write error since the previous flush, if any.
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Flush pending events, stop the writer thread and close the file."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        pending: list[str] = []
+        deadline = 0.0
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, tuple):
+                game_id, events = item
+                try:
+                    lines = [json.dumps({"game_id": game_id, **event}) + "\n" for event in events]
+                except (TypeError, ValueError) as exc:
+                    self._fail(exc, "Failed to serialize events of game %s", game_id)
+                    continue
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.extend(lines)
+                if len(pending) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            try:
+                self._write(pending)
+            except Exception as exc:
+                self._fail(exc, "Failed to write %d event log line(s)", len(pending))
+            pending = []
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                if self._handle is not None:
+                    try:
+                        self._handle.close()
+                    except Exception as exc:
+                        self._fail(exc, "Failed to close the event log")
+                return
+
+    def _fail(self, exc: Exception, message: str, *args: object) -> None:
+        # Keep the thread alive; the first error goes to the next flush() or close().
+        logger.error(message, *args, exc_info=exc)
+        if self._error is None:
+            self._error = exc
+
+    def _write(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("a", encoding="utf-8", buffering=1 << 16)
+        self._handle.write("".join(lines))
+        self._handle.flush()
+
+
+class EventFeed:
+    """One game's recent events, readable by sequence cursor (``event["seq"]``).
+
+    Retains the newest ``retention`` events independently of the game's own
+    ``event_log_limit``. Readers pass the last sequence number they have seen
+    and may block until something newer is published or the feed is closed;
+    :meth:`read_async` waits on a future instead of a thread, so any number of
+    long-polls can be pending on one event loop.
+    """
+
+    def __init__(self, retention: int = 1_000) -> None:
+        if retention < 1:
+            raise ValueError("retention must be positive")
+        self._events: deque[dict[str, Any]] = deque(maxlen=retention)
+        self._last_seq = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self._waiters: dict[asyncio.Future[None], asyncio.AbstractEventLoop] = {}
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def publish(self, events: Sequence[dict[str, Any]]) -> None:
+        """Append already-sequenced events (in order) and wake waiting readers."""
+        if not events:
+            return
+        with self._changed:
+            self._events.extend(events)
+            self._last_seq = events[-1]["seq"]
+            self._wake_locked()
+
+    def read(self, since: int, timeout: float = 0.0) -> list[dict[str, Any]]:
+        """Retained events newer than ``since``, waiting up to ``timeout`` seconds for one."""
+        with self._changed:
+            if timeout > 0:
+                self._changed.wait_for(lambda: self._last_seq > since or self._closed, timeout)
+            count = min(self._last_seq - since, len(self._events))
+            if count <= 0:
+                return []
+            newest_first = list(islice(reversed(self._events), count))
+        newest_first.reverse()
+        return newest_first
+
+    async def read_async(self, since: int, timeout: float = 0.0) -> list[dict[str, Any]]:
+        """:meth:`read` for coroutines: waits on the running loop, not in a thread."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._changed:
+                remaining = deadline - loop.time()
+                if self._last_seq > since or self._closed or remaining <= 0:
+                    break
+                woken = loop.create_future()
+                self._waiters[woken] = loop
+            try:
+                await asyncio.wait_for(woken, remaining)
+            except TimeoutError:
+                with self._changed:
+                    self._waiters.pop(woken, None)
+        return self.read(since)
+
+    def close(self) -> None:
+        """Release every blocked reader; later reads return immediately."""
+        with self._changed:
+            self._closed = True
+            self._wake_locked()
+
+    def _wake_locked(self) -> None:
+        self._changed.notify_all()
+        for future, loop in self._waiters.items():
+            loop.call_soon_threadsafe(_resolve, future)
+        self._waiters.clear()
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
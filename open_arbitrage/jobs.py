@@ -0,0 +1,229 @@
+"""Background jobs: long advances and scripted command sequences off the request path.
+
+A job is an ordered list of commands for one game, run on a small, bounded
+worker pool. Each command runs through :meth:`GameStore.run_sliced
+<open_arbitrage.api.GameStore.run_sliced>`, a short slice at a time under the
+game's lock, so other clients of the same game interleave between slices and
+never wait more than one; the result is the same as running the command in
+one go. Between slices a job records its progress, and cancelling it stops the
+current slice.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+from fastapi import HTTPException
+
+from .engine import AdvanceDay, Stepper
+from .engine.core import Command
+
+if TYPE_CHECKING:
+    from .api import GameStore
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+_FINAL = frozenset({JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+class JobLimitError(RuntimeError):
+    """Raised by :meth:`JobManager.submit` when too many jobs are waiting."""
+
+
+@dataclass
+class Job:
+    """One submitted job; read it through :meth:`JobManager.get` for a consistent copy."""
+
+    id: str
+    game_id: str
+    commands: Sequence[Command]
+    stop_on_error: bool
+    status: JobStatus = JobStatus.QUEUED
+    # One entry per command attempted: None on success, else the error message.
+    errors: list[str | None] = field(default_factory=list)
+    days_done: int = 0
+    # Why the job failed as a whole (e.g. its game was deleted).
+    error: str | None = None
+
+    @property
+    def days_total(self) -> int:
+        return sum(command.days for command in self.commands if isinstance(command, AdvanceDay))
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINAL
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON view: status, progress and per-command results (batch-style)."""
+        results: list[dict[str, Any]] = []
+        for index in range(len(self.commands)):
+            if index < len(self.errors):
+                error = self.errors[index]
+                result = {"index": index, "status": "ok" if error is None else "error"}
+                if error is not None:
+                    result["detail"] = error
+            else:
+                result = {"index": index, "status": "not_run" if self.finished else "pending"}
+            results.append(result)
+        return {
+            "job_id": self.id,
+            "game_id": self.game_id,
+            "status": self.status.value,
+            "progress": {
+                "commands_done": len(self.errors),
+                "commands_total": len(self.commands),
+                "days_done": self.days_done,
+                "days_total": self.days_total,
+            },
+            "results": results,
+            "error": self.error,
+        }
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class JobManager:
+    """Run :class:`Job` s for a :class:`~open_arbitrage.api.GameStore` on ``max_workers`` threads.
+
+    At most ``max_queued`` jobs may wait for a worker. Finished jobs stay
+    readable until ``retention`` newer ones have finished.
+    """
+
+    def __init__(
+        self,
+        store: GameStore,
+        *,
+        max_workers: int = 2,
+        max_queued: int = 100,
+        retention: int = 1_000,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        self.store = store
+        self.max_queued = max_queued
+        self.retention = retention
+        self._jobs: dict[str, Job] = {}
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._cancel: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="game-job")
+
+    def submit(self, game_id: str, commands: Sequence[Command], *, stop_on_error: bool) -> Job:
+        job = Job(uuid.uuid4().hex, game_id, list(commands), stop_on_error)
+        with self._lock:
+            queued = sum(1 for other in self._jobs.values() if other.status is JobStatus.QUEUED)
+            if queued >= self.max_queued:
+                raise JobLimitError("Too many queued jobs")
+            self._jobs[job.id] = job
+            self._cancel[job.id] = threading.Event()
+            snapshot = _copy(job)
+        self._executor.submit(self._run, job)
+        return snapshot
+
+    def get(self, job_id: str) -> Job | None:
+        """A snapshot of the job, or ``None`` if unknown (or long finished)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else _copy(job)
+
+    def for_game(self, game_id: str) -> list[Job]:
+        with self._lock:
+            return [_copy(job) for job in self._jobs.values() if job.game_id == game_id]
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Stop the job within its current slice; a queued job never starts."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._cancel[job_id].set()
+            if job.status is JobStatus.QUEUED:
+                self._finish_locked(job, JobStatus.CANCELLED)
+        return self.get(job_id)
+
+    def close(self) -> None:
+        """Cancel every job and wait for the running ones to stop."""
+        with self._lock:
+            for job_id in list(self._jobs):
+                self._cancel[job_id].set()
+        self._executor.shutdown()
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            if job.finished:
+                return
+            job.status = JobStatus.RUNNING
+        status, error = JobStatus.SUCCEEDED, None
+        try:
+            for command in job.commands:
+                outcome = self._run_command(job, command)
+                with self._lock:
+                    job.errors.append(outcome)
+                if outcome is not None and job.stop_on_error:
+                    status = JobStatus.FAILED
+                    break
+        except _Cancelled:
+            status = JobStatus.CANCELLED
+        except HTTPException as exc:  # e.g. the game was deleted
+            status, error = JobStatus.FAILED, str(exc.detail)
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            status, error = JobStatus.FAILED, str(exc) or type(exc).__name__
+        with self._lock:
+            job.error = error
+            self._finish_locked(job, status)
+
+    def _run_command(self, job: Job, command: Command) -> str | None:
+        cancelled = self._cancel[job.id]
+        if cancelled.is_set():
+            raise _Cancelled
+        days_before = job.days_done
+
+        def progress(stepper: Stepper) -> None:
+            if isinstance(command, AdvanceDay):
+                with self._lock:
+                    job.days_done = days_before + stepper.days_done
+
+        try:
+            finished = self.store.run_sliced(
+                job.game_id, command, should_stop=cancelled.is_set, progress=progress
+            )
+        except ValueError as exc:
+            return str(exc)
+        if not finished:
+            raise _Cancelled
+        return None
+
+    def _finish_locked(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        self._finished[job.id] = None
+        while len(self._finished) > self.retention:
+            old_id, _ = self._finished.popitem(last=False)
+            del self._jobs[old_id]
+            del self._cancel[old_id]
+
+
+def _copy(job: Job) -> Job:
+    return replace(job, errors=list(job.errors))
+
+
+__all__ = ["Job", "JobLimitError", "JobManager", "JobStatus"]
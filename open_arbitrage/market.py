@@ -5,15 +5,28 @@ for every good, so a trader can buy where a good is cheap and sell where it is
 dear. Prices follow a bounded, mean-reverting random walk in log space, which
 keeps them strictly positive, anchored to a city-specific long-run mean, and
 deterministic for a given seeded RNG.
+
+Two interchangeable backends exist: :class:`Market` keeps one :class:`Quote`
+per (city, good) and steps them one by one, while :class:`ArrayMarket` keeps
+the same numbers in ``float64`` arrays of shape ``(cities, goods)`` and steps
+the whole world with a single vectorized update. A :class:`MarketStack` goes
+one step further and stacks many games' array markets, so one update steps
+them all.
 """
 
 from __future__ import annotations
 
+import copy
 from collections.abc import Sequence
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from math import exp, log
 from random import Random
 
+import numpy as np
+import numpy.typing as npt
+
+FloatArray = npt.NDArray[np.float64]
+
 
 @dataclass
 class Good:
@@ -61,25 +74,67 @@ class Market:
     """The full market: a goods catalog and one quote board per city.
 
     ``boards[city_index][good_index]`` aligns with the engine's ``cities`` tuple
-    and ``goods`` catalog.
+    and ``goods`` catalog. A good-name -> column index is built once at
+    construction, so price lookups cost the same for any catalog size; the
+    catalog is fixed for the lifetime of the market.
     """
 
     goods: list[Good]
     boards: list[list[Quote]]
+    _good_index: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._good_index = _index_goods(self.goods)
 
     def good_names(self) -> list[str]:
         return [good.name for good in self.goods]
 
+    def good_index(self, good_name: str) -> int:
+        """Column of ``good_name`` in every board."""
+        try:
+            return self._good_index[good_name]
+        except KeyError:
+            raise ValueError(f"Unknown good: {good_name}") from None
+
     def board(self, city_index: int) -> list[Quote]:
         if city_index < 0 or city_index >= len(self.boards):
             raise ValueError("Invalid city index")
         return self.boards[city_index]
 
     def quote(self, city_index: int, good_name: str) -> Quote:
-        for quote in self.board(city_index):
-            if quote.good == good_name:
-                return quote
-        raise ValueError(f"Unknown good: {good_name}")
+        board = self.board(city_index)
+        return board[self.good_index(good_name)]
+
+    def copy(self) -> Market:
+        """Independent quote boards over the same (shared, fixed) goods catalog."""
+        clone = copy.copy(self)
+        clone.boards = [
+            [
+                Quote(
+                    quote.good,
+                    quote.value,
+                    quote.base_value,
+                    quote.min_value,
+                    quote.max_value,
+                    quote.last_value,
+                )
+                for quote in board
+            ]
+            for board in self.boards
+        ]
+        return clone
+
+    def scale_prices(self, multiplier: float) -> None:
+        """Multiply every mid price in every city, clamped to each quote's bounds."""
+        for board in self.boards:
+            for quote in board:
+                quote.value = min(max(quote.value * multiplier, quote.min_value), quote.max_value)
+
+    def mid_prices(self) -> FloatArray:
+        """Current mid prices as a new ``(cities, goods)`` array."""
+        return np.array(
+            [[quote.value for quote in board] for board in self.boards], dtype=np.float64
+        ).reshape(len(self.boards), len(self.goods))
 
     def fluctuate(self, rng: Random, *, reversion: float, volatility: float) -> None:
         """Advance every city's prices by one step (the whole world moves)."""
@@ -88,6 +143,10 @@ class Market:
                 _step_quote(quote, rng, reversion=reversion, volatility=volatility)
 
 
+def _index_goods(goods: Sequence[Good]) -> dict[str, int]:
+    return {good.name: index for index, good in enumerate(goods)}
+
+
 def _step_quote(quote: Quote, rng: Random, *, reversion: float, volatility: float) -> None:
     """Bounded, mean-reverting geometric step.
 
@@ -103,6 +162,313 @@ def _step_quote(quote: Quote, rng: Random, *, reversion: float, volatility: floa
     quote.value = min(max(candidate, quote.min_value), quote.max_value)
 
 
+def _step_log_prices(
+    values: FloatArray,
+    base_values: FloatArray,
+    min_values: FloatArray,
+    max_values: FloatArray,
+    last_values: FloatArray,
+    noise: FloatArray,
+    *,
+    reversion: float | FloatArray,
+    volatility: float | FloatArray,
+) -> None:
+    """Vectorized :func:`_step_quote` over whole price arrays, updated in place.
+
+    ``noise`` holds standard-normal draws with the same shape as ``values``;
+    ``reversion`` and ``volatility`` may be arrays that broadcast against it.
+    """
+    np.copyto(last_values, values)
+    log_values = np.log(values)
+    log_values += reversion * (np.log(base_values) - log_values) + volatility * noise
+    np.exp(log_values, out=values)
+    np.clip(values, min_values, max_values, out=values)
+
+
+class _QuoteView(Quote):
+    """A live :class:`Quote` view onto one cell of an :class:`ArrayMarket`.
+
+    Reads and writes go straight to the backing arrays, so engine code that
+    mutates quotes (events, clamping) works unchanged on either backend.
+    """
+
+    def __init__(self, market: ArrayMarket, city_index: int, good_index: int) -> None:
+        self.good = market.goods[good_index].name
+        self._market = market
+        self._cell = (city_index, good_index)
+
+    @property
+    def value(self) -> float:
+        return float(self._market.values[self._cell])
+
+    @value.setter
+    def value(self, value: float) -> None:
+        self._market.values[self._cell] = value
+
+    @property
+    def base_value(self) -> float:
+        return float(self._market.base_values[self._cell])
+
+    @base_value.setter
+    def base_value(self, value: float) -> None:
+        self._market.base_values[self._cell] = value
+
+    @property
+    def min_value(self) -> float:
+        return float(self._market.min_values[self._cell])
+
+    @min_value.setter
+    def min_value(self, value: float) -> None:
+        self._market.min_values[self._cell] = value
+
+    @property
+    def max_value(self) -> float:
+        return float(self._market.max_values[self._cell])
+
+    @max_value.setter
+    def max_value(self, value: float) -> None:
+        self._market.max_values[self._cell] = value
+
+    @property
+    def last_value(self) -> float:
+        return float(self._market.last_values[self._cell])
+
+    @last_value.setter
+    def last_value(self, value: float) -> None:
+        self._market.last_values[self._cell] = value
+
+
+class ArrayMarket(Market):
+    """Array-backed market: same interface as :class:`Market`, vectorized stepping.
+
+    ``values``, ``base_values``, ``min_values``, ``max_values`` and
+    ``last_values`` are contiguous ``float64`` arrays of shape
+    ``(cities, goods)``. ``board()``/``quote()`` hand out live :class:`Quote`
+    views onto those arrays; the views are only materialized on first use, so
+    a market that is just stepped never allocates per-cell objects.
+    """
+
+    def __init__(
+        self,
+        goods: Sequence[Good],
+        values: FloatArray,
+        base_values: FloatArray,
+        min_values: FloatArray,
+        max_values: FloatArray,
+        last_values: FloatArray,
+    ) -> None:
+        shape = (len(values), len(goods))
+        arrays = (values, base_values, min_values, max_values, last_values)
+        if any(array.shape != shape for array in arrays):
+            raise ValueError("Price arrays must have shape (cities, goods)")
+        self.goods = list(goods)
+        self._good_index = _index_goods(self.goods)
+        self.values, self.base_values, self.min_values, self.max_values, self.last_values = (
+            np.ascontiguousarray(array, dtype=np.float64) for array in arrays
+        )
+        self._boards: list[list[Quote]] | None = None
+
+    @classmethod
+    def from_market(cls, market: Market) -> ArrayMarket:
+        """Copy a list-backed market into arrays (values are preserved exactly)."""
+
+        def column(attr: str) -> FloatArray:
+            return np.array(
+                [[getattr(quote, attr) for quote in board] for board in market.boards],
+                dtype=np.float64,
+            ).reshape(len(market.boards), len(market.goods))
+
+        return cls(
+            market.goods,
+            values=column("value"),
+            base_values=column("base_value"),
+            min_values=column("min_value"),
+            max_values=column("max_value"),
+            last_values=column("last_value"),
+        )
+
+    def to_market(self) -> Market:
+        """Copy the arrays back into a list-backed :class:`Market`."""
+        return Market(
+            goods=list(self.goods),
+            boards=[
+                [
+                    Quote(
+                        good=quote.good,
+                        value=quote.value,
+                        base_value=quote.base_value,
+                        min_value=quote.min_value,
+                        max_value=quote.max_value,
+                        last_value=quote.last_value,
+                    )
+                    for quote in board
+                ]
+                for board in self.boards
+            ],
+        )
+
+    @property
+    def boards(self) -> list[list[Quote]]:
+        if self._boards is None:
+            cities, goods = self.values.shape
+            self._boards = [
+                [_QuoteView(self, city, good) for good in range(goods)] for city in range(cities)
+            ]
+        return self._boards
+
+    @boards.setter
+    def boards(self, boards: list[list[Quote]]) -> None:
+        raise AttributeError("ArrayMarket boards are views; assign to the price arrays instead")
+
+    def copy(self) -> ArrayMarket:
+        """Copy the price arrays; the goods catalog and index are shared."""
+        clone = copy.copy(self)
+        clone._boards = None
+        clone.values = self.values.copy()
+        clone.base_values = self.base_values.copy()
+        clone.min_values = self.min_values.copy()
+        clone.max_values = self.max_values.copy()
+        clone.last_values = self.last_values.copy()
+        return clone
+
+    def scale_prices(self, multiplier: float) -> None:
+        np.clip(self.values * multiplier, self.min_values, self.max_values, out=self.values)
+
+    def mid_prices(self) -> FloatArray:
+        return self.values.copy()
+
+    def copy_into(self, market: Market) -> None:
+        """Write the current and previous prices back into a list-backed market."""
+        for board, values, last_values in zip(
+            market.boards, self.values.tolist(), self.last_values.tolist(), strict=True
+        ):
+            for quote, value, last_value in zip(board, values, last_values, strict=True):
+                quote.value = value
+                quote.last_value = last_value
+
+    def fluctuate(self, rng: Random, *, reversion: float, volatility: float) -> None:
+        """Advance every city's prices with one vectorized step.
+
+        Shocks come from a NumPy generator seeded with 64 bits drawn from
+        ``rng``, so the engine RNG remains the single source of randomness (and
+        of save/load determinism). The price path is statistically the same as
+        :class:`Market`'s but not draw-for-draw identical to it.
+        """
+        noise = np.random.default_rng(rng.getrandbits(64)).standard_normal(self.values.shape)
+        self.step(noise, reversion=reversion, volatility=volatility)
+
+    def step(self, noise: FloatArray, *, reversion: float, volatility: float) -> None:
+        """One mean-reverting step driven by caller-supplied standard-normal ``noise``."""
+        _step_log_prices(
+            self.values,
+            self.base_values,
+            self.min_values,
+            self.max_values,
+            self.last_values,
+            noise,
+            reversion=reversion,
+            volatility=volatility,
+        )
+
+
+_PRICE_ARRAYS = ("values", "base_values", "min_values", "max_values", "last_values")
+
+
+class MarketStack:
+    """Same-shaped :class:`ArrayMarket` s whose price arrays are rows of shared arrays.
+
+    Adding a market moves its arrays into one row of ``(markets, cities,
+    goods)`` arrays and points the market at views of that row, so
+    :meth:`step` moves every member's prices with one vectorized update while
+    each member keeps working as an ordinary market. Adding and removing
+    members repoints those views (of the moved rows too), so only do it while
+    nothing else is using the members.
+    """
+
+    def __init__(self, cities: int, goods: int) -> None:
+        self.shape = (cities, goods)
+        self._arrays = {name: np.empty((0, cities, goods)) for name in _PRICE_ARRAYS}
+        self._markets: list[ArrayMarket] = []
+        self._rows: dict[int, int] = {}  # id(market) -> row
+
+    def __len__(self) -> int:
+        return len(self._markets)
+
+    def __contains__(self, market: object) -> bool:
+        return id(market) in self._rows
+
+    @property
+    def markets(self) -> list[ArrayMarket]:
+        """Members in row order (the order :meth:`step` expects ``noise`` in)."""
+        return list(self._markets)
+
+    def add(self, market: ArrayMarket) -> None:
+        if market.values.shape != self.shape:
+            raise ValueError("Market shape does not match the stack")
+        if market in self:
+            return
+        row = len(self._markets)
+        if row == len(self._arrays["values"]):
+            self._grow(max(2 * row, 8))
+        self._rows[id(market)] = row
+        self._markets.append(market)
+        for name, array in self._arrays.items():
+            array[row] = getattr(market, name)
+            setattr(market, name, array[row])
+
+    def discard(self, market: ArrayMarket) -> None:
+        """Remove ``market``, handing it private copies of its arrays (no-op for non-members)."""
+        row = self._rows.pop(id(market), None)
+        if row is None:
+            return
+        for name in _PRICE_ARRAYS:
+            setattr(market, name, getattr(market, name).copy())
+        last = self._markets.pop()
+        if last is not market:  # fill the hole with the last row
+            self._markets[row] = last
+            self._rows[id(last)] = row
+            for name, array in self._arrays.items():
+                array[row] = array[len(self._markets)]
+                setattr(last, name, array[row])
+
+    def step(
+        self,
+        noise: FloatArray,
+        *,
+        reversion: float | FloatArray,
+        volatility: float | FloatArray,
+    ) -> None:
+        """:meth:`ArrayMarket.step` for every member at once.
+
+        ``noise`` has shape ``(len(self), cities, goods)``; ``reversion`` and
+        ``volatility`` are scalars or hold one value per member.
+        """
+        count = len(self._markets)
+        if noise.shape != (count, *self.shape):
+            raise ValueError("noise must have shape (markets, cities, goods)")
+        rows = {name: array[:count] for name, array in self._arrays.items()}
+        _step_log_prices(
+            rows["values"],
+            rows["base_values"],
+            rows["min_values"],
+            rows["max_values"],
+            rows["last_values"],
+            noise,
+            reversion=np.reshape(reversion, (-1, 1, 1)),
+            volatility=np.reshape(volatility, (-1, 1, 1)),
+        )
+
+    def _grow(self, capacity: int) -> None:
+        count = len(self._markets)
+        for name, old in list(self._arrays.items()):
+            new = np.empty((capacity, *self.shape))
+            new[:count] = old[:count]
+            self._arrays[name] = new
+        for row, market in enumerate(self._markets):
+            for name, array in self._arrays.items():
+                setattr(market, name, array[row])
+
+
 def build_market(
     goods: Sequence[Good],
     cities: Sequence[str],
@@ -0,0 +1,460 @@
+"""Sharded deployment: one API process per core, each owning part of the games.
+
+Game ids are partitioned over ``shard-0 … shard-{n-1}`` by a consistent hash
+ring. Every shard accepts connections on the shared public port and also
+listens on its own unix socket in ``socket_dir``. :class:`ShardRouter` serves
+requests for the shard's own games and forwards everything else to the owner
+over that socket (WebSockets included), so any process can answer any
+request. New games are always created on the shard that receives the request;
+their ids are drawn so that the ring maps them back to it.
+
+Shards that share a storage backend (``OPEN_ARBITRAGE_DB_PATH`` or
+``OPEN_ARBITRAGE_SPILL_DIR``) load only the games they own, so restarting with
+a different shard count moves games to their new owners.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import re
+import socket
+import threading
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from websockets.asyncio.client import ClientConnection, unix_connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+# Marks a request one shard sent to another; the receiver always serves it locally.
+FORWARDED_HEADER = "x-open-arbitrage-shard"
+
+_GAME_PATH = re.compile(r"^/games/([^/]+)")
+_EVERY_SHARD = "*"
+# Not passed through a proxy hop (RFC 9110 §7.6.1); bodies are re-framed instead.
+_HOP_BY_HOP = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-connection",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+        "content-length",
+    }
+)
+# Safe to send again when a pooled connection fails after the request went out.
+_RETRYABLE_METHODS = frozenset({"GET", "HEAD"})
+# Long-polls may legitimately hold a forwarded request for up to 30 s.
+_FORWARD_TIMEOUT = 60.0
+# WebSocket close code when the owning shard cannot be reached.
+_WS_SHARD_UNAVAILABLE = 1011
+
+
+def _hash(key: str) -> int:
+    # Stable across processes, unlike the built-in (randomized) ``hash``.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring: each node owns the keys hashing just below its points.
+
+    Every node is placed ``points`` times around the ring, which evens out the
+    share each one gets. Adding or removing a node only moves the keys that
+    node gains or loses.
+    """
+
+    def __init__(self, nodes: Sequence[str], *, points: int = 64) -> None:
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        if points < 1:
+            raise ValueError("points must be positive")
+        ring = sorted((_hash(f"{node}#{point}"), node) for node in nodes for point in range(points))
+        self.nodes = list(nodes)
+        self._hashes = [position for position, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+@dataclass(frozen=True)
+class ShardConfig:
+    """This process's place in a sharded deployment."""
+
+    index: int
+    count: int
+    socket_dir: Path
+    ring: HashRing = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.count < 1:
+            raise ValueError("count must be positive")
+        if not 0 <= self.index < self.count:
+            raise ValueError("index must be in range(count)")
+        object.__setattr__(self, "ring", HashRing([shard_name(i) for i in range(self.count)]))
+
+    @property
+    def name(self) -> str:
+        return shard_name(self.index)
+
+    @property
+    def peers(self) -> list[str]:
+        return [node for node in self.ring.nodes if node != self.name]
+
+    def owner(self, game_id: str) -> str:
+        return self.ring.owner(game_id)
+
+    def owns(self, game_id: str) -> bool:
+        return self.ring.owner(game_id) == self.name
+
+    def socket_path(self, name: str) -> Path:
+        return self.socket_dir / f"{name}.sock"
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> ShardConfig | None:
+        """Read ``OPEN_ARBITRAGE_SHARD_{INDEX,COUNT,SOCKET_DIR}``; ``None`` when unsharded."""
+        count = environ.get("OPEN_ARBITRAGE_SHARD_COUNT")
+        if not count:
+            return None
+        return cls(
+            index=int(environ.get("OPEN_ARBITRAGE_SHARD_INDEX", "0")),
+            count=int(count),
+            socket_dir=Path(environ.get("OPEN_ARBITRAGE_SHARD_SOCKET_DIR", ".")),
+        )
+
+
+def shard_name(index: int) -> str:
+    return f"shard-{index}"
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path) -> None:
+        super().__init__("localhost", timeout=_FORWARD_TIMEOUT)
+        self.path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+_Response = tuple[int, list[tuple[bytes, bytes]], bytes]
+
+
+class ShardRouter:
+    """ASGI middleware that sends each game's requests to the shard owning it.
+
+    Requests under ``/games/{game_id}`` for another shard's game are replayed
+    over that shard's unix socket (kept-alive connections are pooled per
+    peer); WebSockets are proxied frame by frame. ``GET /games`` merges the
+    ids of every shard. Anything else, and anything already forwarded, runs
+    on the wrapped app. An unreachable owner yields 503 (close code 1011 on a
+    WebSocket).
+    """
+
+    def __init__(self, app: ASGIApp, shard: ShardConfig) -> None:
+        self.app = app
+        self.shard = shard
+        self._idle: dict[str, list[_UnixHTTPConnection]] = {}
+        self._idle_lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        owner = self._route(scope)
+        if owner is None:
+            await self.app(scope, receive, send)
+        elif owner == _EVERY_SHARD:
+            await self._list_games(scope, receive, send)
+        elif scope["type"] == "http":
+            await self._forward_http(scope, receive, send, owner)
+        else:
+            await self._forward_websocket(scope, receive, send, owner)
+
+    def _route(self, scope: Scope) -> str | None:
+        """The shard to forward to, ``_EVERY_SHARD``, or ``None`` to serve locally."""
+        if scope["type"] not in ("http", "websocket") or _is_forwarded(scope):
+            return None
+        path: str = scope["path"]
+        if scope["type"] == "http" and scope["method"] == "GET" and path.rstrip("/") == "/games":
+            return _EVERY_SHARD
+        match = _GAME_PATH.match(path)
+        if match is None or self.shard.owns(match[1]):
+            return None
+        return self.shard.owner(match[1])
+
+    async def _forward_http(self, scope: Scope, receive: Receive, send: Send, owner: str) -> None:
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        try:
+            status, headers, payload = await run_in_threadpool(
+                self._exchange, owner, scope["method"], _target(scope), _headers(scope), bytes(body)
+            )
+        except OSError:
+            status, headers, payload = _unavailable(owner)
+        await _respond(send, status, headers, payload)
+
+    async def _list_games(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = _headers(scope)
+
+        async def fetch(peer: str) -> _Response:
+            try:
+                return await run_in_threadpool(self._exchange, peer, "GET", "/games", headers, b"")
+            except OSError:
+                return _unavailable(peer)
+
+        local = await _capture(self.app, scope, receive)
+        responses = [local, *await asyncio.gather(*map(fetch, self.shard.peers))]
+        failed = next((response for response in responses if response[0] != 200), None)
+        if failed is not None:
+            status, headers, payload = failed
+        else:
+            games = [game for _, _, data in responses for game in json.loads(data)["games"]]
+            status, headers = 200, [(b"content-type", b"application/json")]
+            payload = json.dumps({"games": list(dict.fromkeys(games))}).encode()
+        await _respond(send, status, headers, payload)
+
+    def _exchange(
+        self, owner: str, method: str, target: str, headers: list[tuple[bytes, bytes]], body: bytes
+    ) -> _Response:
+        """One request/response with ``owner`` (blocking; runs in the thread pool)."""
+        with self._idle_lock:
+            idle = self._idle.setdefault(owner, [])
+            connection = idle.pop() if idle else None
+        reused = connection is not None
+        if connection is None:
+            connection = _UnixHTTPConnection(self.shard.socket_path(owner))
+        sent = False
+        try:
+            connection.putrequest(method, target, skip_host=True, skip_accept_encoding=True)
+            for name, value in headers:
+                connection.putheader(name.decode("latin-1"), value)
+            connection.putheader(FORWARDED_HEADER, self.shard.name)
+            connection.putheader("content-length", str(len(body)))
+            connection.endheaders(body)
+            sent = True
+            response = connection.getresponse()
+            payload = response.read()
+        except ConnectionError:
+            connection.close()
+            # The peer dropped an idle keep-alive connection. Retry on a fresh one
+            # only if it cannot have run the request: the write itself failed, or
+            # running it twice is harmless. A command must never run twice.
+            if reused and (not sent or method in _RETRYABLE_METHODS):
+                return self._exchange(owner, method, target, headers, body)
+            raise
+        except BaseException:
+            connection.close()
+            raise
+        # Pooled even if the peer closed it: http.client reconnects on the next request.
+        with self._idle_lock:
+            self._idle[owner].append(connection)
+        reply_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in response.getheaders()
+            if name.lower() not in _HOP_BY_HOP
+        ]
+        return response.status, reply_headers, payload
+
+    async def _forward_websocket(
+        self, scope: Scope, receive: Receive, send: Send, owner: str
+    ) -> None:
+        await receive()  # websocket.connect
+        try:
+            upstream = await unix_connect(
+                str(self.shard.socket_path(owner)),
+                f"ws://localhost{_target(scope)}",
+                additional_headers={FORWARDED_HEADER: self.shard.name},
+                proxy=None,
+                compression=None,
+            )
+        except (OSError, InvalidHandshake):
+            await send({"type": "websocket.close", "code": _WS_SHARD_UNAVAILABLE})
+            return
+        await send({"type": "websocket.accept"})
+        async with upstream:
+            pumps = [
+                asyncio.ensure_future(_client_to_upstream(receive, upstream)),
+                asyncio.ensure_future(_upstream_to_client(upstream, send)),
+            ]
+            _, pending = await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+            for pump in pending:
+                pump.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def close(self) -> None:
+        """Close pooled peer connections."""
+        with self._idle_lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+async def _client_to_upstream(receive: Receive, upstream: ClientConnection) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        text = message.get("text")
+        await upstream.send(text if text is not None else message["bytes"])
+
+
+async def _upstream_to_client(upstream: ClientConnection, send: Send) -> None:
+    try:
+        async for data in upstream:
+            key = "text" if isinstance(data, str) else "bytes"
+            await send({"type": "websocket.send", key: data})
+    except ConnectionClosed:
+        pass
+    await send({"type": "websocket.close", "code": upstream.close_code or 1000})
+
+
+async def _capture(app: ASGIApp, scope: Scope, receive: Receive) -> _Response:
+    response: dict[str, Any] = {"body": b""}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response.update(status=message["status"], headers=message.get("headers", []))
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    headers = [(name, value) for name, value in response["headers"] if name != b"content-length"]
+    return response["status"], headers, response["body"]
+
+
+async def _respond(
+    send: Send, status: int, headers: list[tuple[bytes, bytes]], payload: bytes
+) -> None:
+    headers = [*headers, (b"content-length", str(len(payload)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _is_forwarded(scope: Scope) -> bool:
+    marker = FORWARDED_HEADER.encode()
+    return any(name == marker for name, _ in scope["headers"])
+
+
+def _target(scope: Scope) -> str:
+    path: bytes = scope.get("raw_path") or scope["path"].encode()
+    query: bytes = scope.get("query_string", b"")
+    return (path + b"?" + query if query else path).decode("latin-1")
+
+
+def _headers(scope: Scope) -> list[tuple[bytes, bytes]]:
+    return [
+        (name, value)
+        for name, value in scope["headers"]
+        if name.decode("latin-1").lower() not in _HOP_BY_HOP
+    ]
+
+
+def _unavailable(owner: str) -> _Response:
+    payload = json.dumps({"detail": f"Shard unavailable: {owner}"}).encode()
+    return 503, [(b"content-type", b"application/json")], payload
+
+
+class ShardSupervisor:
+    """Start ``count`` API processes that share one listening TCP socket.
+
+    The kernel hands each new connection to whichever shard accepts it first;
+    the shards' :class:`ShardRouter` takes care of the rest. Each child serves
+    ``open_arbitrage.api:app`` with its shard settings in the environment, so
+    the other ``OPEN_ARBITRAGE_*`` variables apply to every shard.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        socket_dir: Path,
+        log_level: str = "info",
+    ) -> None:
+        if count < 1:
+            raise ValueError("count must be positive")
+        self.count = count
+        self.socket_dir = socket_dir
+        self.log_level = log_level
+        self._listener = socket.create_server((host, port))
+        self.processes: list[BaseProcess] = []
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._listener.getsockname()[:2]
+        return host, port
+
+    def start(self) -> None:
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.count):
+            process = context.Process(
+                target=_run_shard,
+                args=(index, self.count, self.socket_dir, self._listener, self.log_level),
+                name=shard_name(index),
+            )
+            process.start()
+            self.processes.append(process)
+
+    def wait(self) -> None:
+        for process in self.processes:
+            process.join()
+
+    def stop(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self._listener.close()
+
+
+def _run_shard(  # pragma: no cover - runs in the shard process
+    index: int, count: int, socket_dir: Path, listener: socket.socket, log_level: str
+) -> None:
+    import uvicorn
+
+    os.environ.update(
+        OPEN_ARBITRAGE_SHARD_INDEX=str(index),
+        OPEN_ARBITRAGE_SHARD_COUNT=str(count),
+        OPEN_ARBITRAGE_SHARD_SOCKET_DIR=str(socket_dir),
+    )
+    path = socket_dir / f"{shard_name(index)}.sock"
+    path.unlink(missing_ok=True)
+    local = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    local.bind(str(path))
+    config = uvicorn.Config("open_arbitrage.api:app", log_level=log_level)
+    uvicorn.Server(config).run(sockets=[listener, local])
+
+
+__all__ = [
+    "FORWARDED_HEADER",
+    "HashRing",
+    "ShardConfig",
+    "ShardRouter",
+    "ShardSupervisor",
+    "shard_name",
+]
@@ -0,0 +1,172 @@
+"""Headless batch simulator: play complete games under a policy across many seeds.
+
+A *policy* is any picklable callable taking the live :class:`GameState` and
+returning the commands to apply next (an empty sequence means "advance one
+day"). Games run in a process pool, but each game depends only on its seed, the
+rules and the policy, so results are identical for any worker count as long as
+the policy itself is deterministic.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import numpy.typing as npt
+
+from .engine import (
+    AdvanceDay,
+    GameOutcome,
+    GameState,
+    Rules,
+    apply_command,
+    create_default_state,
+    net_worth,
+)
+from .engine.core import Command
+
+Policy = Callable[[GameState], Sequence[Command]]
+
+
+@dataclass
+class GameResult:
+    seed: int
+    status: GameOutcome
+    net_worth: float
+    days: int
+    turns: int
+    rejected_commands: int
+
+
+@dataclass
+class SimulationReport:
+    """Per-seed results (in seed order) plus aggregate outcome statistics."""
+
+    results: list[GameResult]
+
+    @property
+    def win_rate(self) -> float:
+        return sum(result.status is GameOutcome.WON for result in self.results) / len(self.results)
+
+    @property
+    def net_worths(self) -> npt.NDArray[np.float64]:
+        return np.array([result.net_worth for result in self.results], dtype=np.float64)
+
+    @property
+    def days_survived(self) -> npt.NDArray[np.int64]:
+        return np.array([result.days for result in self.results], dtype=np.int64)
+
+    def summary(self) -> dict[str, float]:
+        worths = self.net_worths
+        days = self.days_survived
+        p10, p50, p90 = np.percentile(worths, [10, 50, 90])
+        return {
+            "games": float(len(self.results)),
+            "win_rate": self.win_rate,
+            "loss_rate": sum(r.status is GameOutcome.LOST for r in self.results)
+            / len(self.results),
+            "net_worth_mean": float(worths.mean()),
+            "net_worth_std": float(worths.std()),
+            "net_worth_min": float(worths.min()),
+            "net_worth_p10": float(p10),
+            "net_worth_median": float(p50),
+            "net_worth_p90": float(p90),
+            "net_worth_max": float(worths.max()),
+            "days_mean": float(days.mean()),
+            "days_min": float(days.min()),
+            "days_max": float(days.max()),
+        }
+
+
+def play_game(
+    policy: Policy,
+    seed: int,
+    *,
+    rules: Rules | None = None,
+    array_market: bool = False,
+    max_turns: int = 100_000,
+) -> GameResult:
+    """Play one game to completion (or ``max_turns`` policy calls).
+
+    Commands the engine rejects are counted and skipped; the rest of that
+    turn's commands still run. A turn in which nothing was applied advances one
+    day, so a stuck policy cannot stall the clock.
+    """
+    state = create_default_state(seed=seed, rules=rules, array_market=array_market)
+    turns = 0
+    rejected = 0
+    while state.status is GameOutcome.ONGOING and turns < max_turns:
+        turns += 1
+        applied = 0
+        for command in policy(state):
+            try:
+                apply_command(state, command)
+            except ValueError:
+                rejected += 1
+            else:
+                applied += 1
+            if state.status is not GameOutcome.ONGOING:
+                break
+        if not applied and state.status is GameOutcome.ONGOING:
+            apply_command(state, AdvanceDay())
+    return GameResult(
+        seed=seed,
+        status=state.status,
+        net_worth=net_worth(state),
+        days=state.day,
+        turns=turns,
+        rejected_commands=rejected,
+    )
+
+
+def _play_chunk(
+    seeds: Sequence[int],
+    policy: Policy,
+    rules: Rules | None,
+    array_market: bool,
+    max_turns: int,
+) -> list[GameResult]:
+    return [
+        play_game(policy, seed, rules=rules, array_market=array_market, max_turns=max_turns)
+        for seed in seeds
+    ]
+
+
+def simulate(
+    policy: Policy,
+    seeds: Sequence[int],
+    *,
+    rules: Rules | None = None,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    array_market: bool = False,
+    max_turns: int = 100_000,
+) -> SimulationReport:
+    """Play one game per seed and aggregate the outcomes.
+
+    ``workers`` defaults to the CPU count; ``workers=1`` runs in-process (no
+    pickling, handy for debugging policies). Seeds are shipped to workers in
+    chunks of ``chunk_size`` to amortize inter-process overhead.
+    """
+    if not seeds:
+        raise ValueError("At least one seed is required")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    worker_count = workers if workers is not None else os.cpu_count() or 1
+    if worker_count < 1:
+        raise ValueError("workers must be positive")
+
+    chunks = [seeds[start : start + chunk_size] for start in range(0, len(seeds), chunk_size)]
+    run = partial(
+        _play_chunk, policy=policy, rules=rules, array_market=array_market, max_turns=max_turns
+    )
+    if worker_count == 1 or len(chunks) == 1:
+        batches = [run(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(worker_count, len(chunks))) as executor:
+            batches = list(executor.map(run, chunks))
+    return SimulationReport(results=[result for batch in batches for result in batch])
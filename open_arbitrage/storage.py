@@ -0,0 +1,296 @@
+"""Pluggable persistence for :class:`~open_arbitrage.api.GameStore`.
+
+A backend stores one opaque snapshot (``state_to_bytes``) per game id.
+:class:`WriteBehind` sits in front of it: the request path only marks a game
+dirty, and one background thread coalesces every change made since its last
+pass into a single batched write, so commands never wait on disk.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Produces a game's current snapshot, or None when there is nothing to save.
+Snapshot = Callable[[], bytes | None]
+# Queued work per game: a snapshot to write, a way to take one, or None to delete.
+_Pending = bytes | Snapshot | None
+
+
+class StorageBackend(ABC):
+    """Key-value store of game snapshots. Implementations must be thread-safe."""
+
+    @abstractmethod
+    def read(self, game_id: str) -> bytes | None: ...
+
+    @abstractmethod
+    def write(self, snapshots: Mapping[str, bytes]) -> None:
+        """Insert or replace several snapshots at once."""
+
+    @abstractmethod
+    def delete(self, game_ids: Iterable[str]) -> None: ...
+
+    @abstractmethod
+    def ids(self) -> list[str]: ...
+
+    def close(self) -> None:  # noqa: B027 - optional hook
+        """Release resources; the default backend holds none."""
+
+
+class MemoryBackend(StorageBackend):
+    """Snapshots in a dict: persistence semantics without a disk (tests, benchmarks)."""
+
+    def __init__(self) -> None:
+        self._snapshots: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def read(self, game_id: str) -> bytes | None:
+        with self._lock:
+            return self._snapshots.get(game_id)
+
+    def write(self, snapshots: Mapping[str, bytes]) -> None:
+        with self._lock:
+            self._snapshots.update(snapshots)
+
+    def delete(self, game_ids: Iterable[str]) -> None:
+        with self._lock:
+            for game_id in game_ids:
+                self._snapshots.pop(game_id, None)
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return list(self._snapshots)
+
+
+class DirectoryBackend(StorageBackend):
+    """One ``<game_id>.oasn`` file per game, replaced atomically on write."""
+
+    suffix = ".oasn"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def read(self, game_id: str) -> bytes | None:
+        try:
+            return self._file(game_id).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def write(self, snapshots: Mapping[str, bytes]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        for game_id, data in snapshots.items():
+            target = self._file(game_id)
+            partial = target.with_suffix(".tmp")
+            partial.write_bytes(data)
+            partial.replace(target)
+
+    def delete(self, game_ids: Iterable[str]) -> None:
+        for game_id in game_ids:
+            self._file(game_id).unlink(missing_ok=True)
+
+    def ids(self) -> list[str]:
+        if not self.path.is_dir():
+            return []
+        return [file.stem for file in self.path.glob(f"*{self.suffix}")]
+
+    def _file(self, game_id: str) -> Path:
+        return self.path / f"{game_id}{self.suffix}"
+
+
+class SQLiteBackend(StorageBackend):
+    """All games in one SQLite file (WAL mode); each batch is one transaction.
+
+    Several processes may share the file (e.g. shards), each writing its own games.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS games (id TEXT PRIMARY KEY, snapshot BLOB NOT NULL)"
+            )
+
+    def read(self, game_id: str) -> bytes | None:
+        with self._lock:
+            row = self._db.execute("SELECT snapshot FROM games WHERE id = ?", (game_id,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def write(self, snapshots: Mapping[str, bytes]) -> None:
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT INTO games (id, snapshot) VALUES (?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET snapshot = excluded.snapshot",
+                snapshots.items(),
+            )
+
+    def delete(self, game_ids: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany("DELETE FROM games WHERE id = ?", ((id_,) for id_ in game_ids))
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM games")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class WriteBehind:
+    """Coalescing, asynchronous writer in front of a :class:`StorageBackend`.
+
+    :meth:`mark_dirty` records *how* to snapshot a game, not the snapshot:
+    however many commands hit a game between two passes, the background thread
+    serializes and writes it once. A pass starts ``interval`` seconds after the
+    first change it picks up (immediately on :meth:`flush`). :meth:`read` sees
+    snapshots that are queued or being written, so nothing is lost in between.
+
+    A pass that fails is logged and its games are queued again, behind any
+    newer change to them, and retried with backoff (up to ``max_retry_delay``
+    seconds apart), so a snapshot of a game that already left memory is kept
+    until it is written. The next :meth:`flush` or :meth:`close` re-raises the
+    error to its caller; :meth:`close` makes one last attempt only.
+    """
+
+    max_retry_delay = 5.0
+
+    def __init__(self, backend: StorageBackend, *, interval: float = 0.05) -> None:
+        if interval < 0:
+            raise ValueError("interval must be non-negative")
+        self.backend = backend
+        self.interval = interval
+        self._pending: dict[str, _Pending] = {}
+        self._inflight: dict[str, _Pending] = {}
+        self._changed = threading.Condition()
+        self._requested = 0
+        self._completed = 0
+        self._stopping = False
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, game_id: str, snapshot: Snapshot) -> None:
+        self._enqueue(game_id, snapshot)
+
+    def put(self, game_id: str, data: bytes) -> None:
+        """Queue an already serialized snapshot (e.g. of a game leaving memory)."""
+        self._enqueue(game_id, data)
+
+    def delete(self, game_id: str) -> None:
+        self._enqueue(game_id, None)
+
+    def read(self, game_id: str) -> bytes | None:
+        with self._changed:
+            for queue in (self._pending, self._inflight):
+                if game_id in queue:
+                    item = queue[game_id]
+                    if item is None or isinstance(item, bytes):
+                        return item
+        return self.backend.read(game_id)
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written.
+
+        Raises the first write error since the previous flush, if any.
+        """
+        with self._changed:
+            if self._stopping:
+                return
+            self._requested += 1
+            target = self._requested
+            self._changed.notify_all()
+            self._changed.wait_for(lambda: self._completed >= target)
+            self._raise_error_locked()
+
+    def close(self) -> None:
+        """Write what is queued, stop the thread and close the backend."""
+        with self._changed:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._changed.notify_all()
+        self._thread.join()
+        self.backend.close()
+        with self._changed:
+            self._raise_error_locked()
+
+    def _raise_error_locked(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _enqueue(self, game_id: str, item: _Pending) -> None:
+        with self._changed:
+            wake = not self._pending
+            self._pending[game_id] = item
+            if wake:  # otherwise the writer is already on its way
+                self._changed.notify_all()
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: self._pending or self._stopping or self._requested > self._completed
+                )
+                if self._requested == self._completed and not self._stopping:
+                    # Let a burst of commands land in the same pass (or back off after a failure).
+                    self._changed.wait_for(
+                        lambda: self._stopping or self._requested > self._completed,
+                        self._retry_delay(failures) if failures else self.interval,
+                    )
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+                requested, stopping = self._requested, self._stopping
+            try:
+                self._write(batch)
+            except Exception as exc:
+                logger.exception("Failed to write %d game snapshot(s)", len(batch))
+                error: Exception | None = exc
+            else:
+                error = None
+            with self._changed:
+                if error is None:
+                    failures = 0
+                else:
+                    failures += 1
+                    if self._error is None:
+                        self._error = error
+                    # Retry the batch; whatever was queued for a game since supersedes it.
+                    self._pending = {**batch, **self._pending}
+                self._inflight = {}
+                self._completed = requested
+                self._changed.notify_all()
+            if stopping:
+                return
+
+    def _retry_delay(self, failures: int) -> float:
+        return min(max(self.interval, 0.01) * 2.0**failures, self.max_retry_delay)
+
+    def _write(self, batch: dict[str, _Pending]) -> None:
+        snapshots: dict[str, bytes] = {}
+        deleted: list[str] = []
+        for game_id, item in batch.items():
+            if item is None:
+                deleted.append(game_id)
+                continue
+            data = item if isinstance(item, bytes) else item()
+            if data is not None:
+                snapshots[game_id] = data
+        if snapshots:
+            self.backend.write(snapshots)
+        if deleted:
+            self.backend.delete(deleted)
@@ -1,9 +1,31 @@
+import asyncio
+import json
+import runpy
+import sys
+import threading
+import time
 from pathlib import Path
 
+import pytest
+from fastapi import HTTPException, WebSocketDisconnect
 from fastapi.testclient import TestClient
 
 from open_arbitrage import api
 from open_arbitrage.api import GameStore, app
+from open_arbitrage.engine import (
+    AdvanceDay,
+    ArrayMarket,
+    Buy,
+    GameOutcome,
+    GameState,
+    Rules,
+    Sell,
+    apply_command,
+    create_default_state,
+    state_from_bytes,
+    state_to_dict,
+)
+from open_arbitrage.storage import MemoryBackend
 
 client = TestClient(app)
 
@@ -27,6 +49,50 @@ def test_create_and_get_game():
     assert resp.json()["seed"] == 42
 
 
+def test_http_state_omits_rng_state_unless_requested():
+    resp = client.post("/games", json={"seed": 4})
+    game_id = resp.json()["game_id"]
+    assert "rng_state" not in resp.json()["state"]
+    assert "rng_state" not in client.get(f"/games/{game_id}").json()
+    assert "rng_state" in client.get(f"/games/{game_id}", params={"exclude": ""}).json()
+
+    body = client.get(f"/games/{game_id}", params={"fields": "rng_state,day"}).json()
+    assert set(body) == {"rng_state", "day"}
+
+
+def test_field_projection_on_reads_and_commands():
+    game_id = _create(seed=4)
+    body = client.get(f"/games/{game_id}", params={"fields": "cash, board"}).json()
+    assert set(body) == {"cash", "board"}
+    assert len(body["board"]) == 6
+
+    resp = client.post(
+        f"/games/{game_id}/commands",
+        params={"fields": "cash,inventory"},
+        json={"type": "buy", "args": {"good_name": "coffee", "quantity": 1}},
+    )
+    assert set(resp.json()) == {"cash", "inventory"}
+
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        params={"exclude": "market,rules,rng_state,event_log"},
+        json={"commands": [{"type": "advance_day"}]},
+    )
+    assert "market" not in resp.json()["state"] and resp.json()["state"]["day"] == 1
+
+
+def test_unknown_projection_field_is_rejected_before_running_the_command():
+    game_id = _create(seed=4)
+    resp = client.post(
+        f"/games/{game_id}/commands",
+        params={"fields": "cash,nope"},
+        json={"type": "advance_day"},
+    )
+    assert resp.status_code == 400 and "nope" in resp.json()["detail"]
+    assert client.get(f"/games/{game_id}", params={"fields": "day"}).json() == {"day": 0}
+    assert client.get(f"/games/{game_id}", params={"exclude": "nope"}).status_code == 400
+
+
 def test_games_are_isolated():
     a = _create(seed=1)
     b = _create(seed=2)
@@ -81,11 +147,90 @@ def test_all_command_types_execute():
         {"type": "sell", "args": {"good_name": "coffee", "quantity": 1}},
         {"type": "travel", "args": {"destination_index": 0}},
         {"type": "advance_day", "args": {"days": 1}},
+        {"type": "advance_day", "args": {"days": 5, "exact": False}},
     ):
         resp = client.post(f"/games/{game_id}/commands", json=payload)
         assert resp.status_code == 200, payload
 
 
+def test_batch_runs_commands_in_order_with_one_final_state():
+    game_id = _create(seed=1)
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        json={
+            "commands": [
+                {"type": "buy", "args": {"good_name": "coffee", "quantity": 3}},
+                {"type": "travel", "args": {"destination_index": 2}},
+                {"type": "sell", "args": {"good_name": "coffee", "quantity": 2}},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [r["status"] for r in body["results"]] == ["ok", "ok", "ok"]
+    assert body["state"]["city_index"] == 2
+    assert body["state"]["inventory"]["holdings"] == {"coffee": 1}
+
+
+def test_batch_stop_on_first_error():
+    game_id = _create(seed=1)
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        json={
+            "commands": [
+                {"type": "buy", "args": {"good_name": "coffee", "quantity": 1}},
+                {"type": "sell", "args": {"good_name": "wine", "quantity": 1}},
+                {"type": "bogus"},
+                {"type": "advance_day"},
+            ]
+        },
+    )
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["ok", "error", "not_run", "not_run"]
+    assert results[1]["detail"] == "Insufficient inventory"
+    assert resp.json()["state"]["day"] == 0
+
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        json={
+            "commands": [{"type": "travel", "args": {"destination_index": "x"}}, {"type": "bogus"}]
+        },
+    )
+    assert [r["status"] for r in resp.json()["results"]] == ["error", "not_run"]
+
+
+def test_batch_skip_on_error_keeps_going():
+    game_id = _create(seed=1)
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        json={
+            "on_error": "skip",
+            "commands": [
+                {"type": "sell", "args": {"good_name": "coffee", "quantity": 1}},
+                {"type": "bogus"},
+                {"type": "buy", "args": {}},
+                {"type": "advance_day", "args": {"days": 2}},
+            ],
+        },
+    )
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["error", "error", "error", "ok"]
+    assert "Unsupported" in results[1]["detail"] and "good_name" in results[2]["detail"]
+    assert resp.json()["state"]["day"] == 2
+
+
+def test_batch_validation_and_unknown_game():
+    game_id = _create(seed=1)
+    assert client.post(f"/games/{game_id}/commands/batch", json={"commands": []}).status_code == 422
+    resp = client.post(
+        f"/games/{game_id}/commands/batch",
+        json={"commands": [{"type": "advance_day"}], "on_error": "retry"},
+    )
+    assert resp.status_code == 422
+    resp = client.post("/games/nope/commands/batch", json={"commands": [{"type": "advance_day"}]})
+    assert resp.status_code == 404
+
+
 def test_command_validation_errors():
     game_id = _create(seed=2)
     resp = client.post(f"/games/{game_id}/commands", json={"type": "buy", "args": {}})
@@ -97,6 +242,11 @@ def test_command_validation_errors():
     resp = client.post(f"/games/{game_id}/commands", json={"type": "unknown", "args": {}})
     assert resp.status_code == 400 and "Unsupported" in resp.json()["detail"]
 
+    resp = client.post(
+        f"/games/{game_id}/commands", json={"type": "advance_day", "args": {"exact": "false"}}
+    )
+    assert resp.status_code == 400 and "exact" in resp.json()["detail"]
+
     resp = client.post(
         f"/games/{game_id}/commands",
         json={"type": "buy", "args": {"good_name": "coffee", "quantity": 0}},
@@ -123,7 +273,8 @@ def test_event_log_persistence(tmp_path: Path):
     game_id, state = store.create(api.CreateGamePayload(seed=1))
     state.event_log = [{"kind": "demo", "day": 0, "city": "X", "details": {}}]
 
-    store._persist_new_events(game_id, state, previous_len=0)
+    store._publish_new_events(game_id, store._session(game_id), since_seq=0)
+    store.close()
 
     contents = log_path.read_text(encoding="utf-8").strip()
     assert '"kind": "demo"' in contents
@@ -135,11 +286,667 @@ def test_event_log_persistence_no_path_or_no_events(tmp_path: Path):
     store = GameStore(event_log_path=None)
     game_id, state = store.create(api.CreateGamePayload(seed=1))
     state.event_log = [{"kind": "demo", "day": 0, "city": "X", "details": {}}]
-    store._persist_new_events(game_id, state, previous_len=0)
+    store._publish_new_events(game_id, store._session(game_id), since_seq=0)
 
     # Path configured but no new events -> file not created.
     log_path = tmp_path / "noop.jsonl"
     store2 = GameStore(event_log_path=log_path)
     game_id2, state2 = store2.create(api.CreateGamePayload(seed=1))
-    store2._persist_new_events(game_id2, state2, previous_len=0)
+    store2._publish_new_events(game_id2, store2._session(game_id2), since_seq=0)
+    store2.close()
+    store.close()
     assert not log_path.exists()
+
+
+def test_app_shutdown_closes_the_store(monkeypatch):
+    closed: list[str] = []
+    monkeypatch.setattr(api._store, "start", lambda: None)
+    monkeypatch.setattr(api._store, "close", lambda: closed.append("store"))
+    monkeypatch.setattr(api._jobs, "close", lambda: closed.append("jobs"))
+    with TestClient(app):
+        assert closed == []
+    assert closed == ["jobs", "store"]
+
+
+def test_commands_stream_events_to_the_log(tmp_path: Path):
+    log_path = tmp_path / "logs" / "events.jsonl"
+    store = GameStore(event_log_path=log_path)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    state.rules.daily_event_chance = 1.0
+    store.run_command(game_id, AdvanceDay(days=3))
+    store.close()
+
+    lines = log_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(state.event_log) > 0
+    assert all(f'"game_id": "{game_id}"' in line for line in lines)
+
+
+def test_events_past_the_log_limit_still_reach_the_file(tmp_path: Path):
+    log_path = tmp_path / "events.jsonl"
+    store = GameStore(event_log_path=log_path)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    state.rules.daily_event_chance = 1.0
+    state.rules.event_log_limit = 2
+    for _ in range(3):
+        store.run_command(game_id, AdvanceDay(days=2))
+    store.close()
+
+    seqs = [json.loads(line)["seq"] for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert len(state.event_log) == 2
+    assert seqs == list(range(1, state.event_log.last_seq + 1))
+
+
+def test_event_feed_endpoint_pages_by_cursor():
+    game_id = _create(seed=3)
+    api._store.get(game_id).rules.daily_event_chance = 1.0
+    assert client.get(f"/games/{game_id}/events").json() == {
+        "events": [],
+        "cursor": 0,
+        "truncated": False,
+    }
+
+    client.post(f"/games/{game_id}/commands", json={"type": "advance_day", "args": {"days": 4}})
+    page = client.get(f"/games/{game_id}/events", params={"since": 0}).json()
+    seqs = [event["seq"] for event in page["events"]]
+    assert seqs == list(range(1, len(seqs) + 1)) and seqs
+    assert page["cursor"] == seqs[-1]
+    assert page["truncated"] is False
+
+    later = client.get(f"/games/{game_id}/events", params={"since": page["cursor"]}).json()
+    assert later["events"] == [] and later["cursor"] == page["cursor"]
+
+    assert client.get("/games/missing/events").status_code == 404
+    assert client.get(f"/games/{game_id}/events", params={"timeout": 99}).status_code == 422
+
+
+def test_event_feed_long_poll_wakes_on_new_events():
+    store = GameStore(feed_retention=2)
+    game_id, state = store.create(api.CreateGamePayload(seed=3))
+    state.rules.daily_event_chance = 1.0
+
+    def play() -> None:
+        time.sleep(0.05)
+        store.run_command(game_id, AdvanceDay(days=5))
+
+    worker = threading.Thread(target=play)
+    worker.start()
+    events = store.read_events(game_id, since=0, timeout=5.0)
+    worker.join()
+    assert events and events[0]["seq"] >= 1
+    # Retention is bounded: only the newest two survive for late readers.
+    assert len(store.read_events(game_id, since=0)) == 2
+
+    waiting: list[list[dict]] = []
+    reader = threading.Thread(
+        target=lambda: waiting.append(store.read_events(game_id, since=10_000, timeout=5.0))
+    )
+    reader.start()
+    time.sleep(0.05)
+    store.delete(game_id)
+    reader.join(timeout=5.0)
+    assert waiting == [[]]
+    store.close()
+
+
+def test_websocket_streams_deltas_per_command():
+    game_id = _create(seed=5)
+    with client.websocket_connect(f"/games/{game_id}/ws") as ws:
+        hello = ws.receive_json()
+        assert hello["type"] == "state"
+        assert hello["state"]["cash"] == 2_000.0
+        assert "rng_state" not in hello["state"]
+
+        ws.send_json({"id": 1, "type": "buy", "args": {"good_name": "coffee", "quantity": 2}})
+        reply = ws.receive_json()
+        assert reply["type"] == "delta" and reply["id"] == 1
+        assert set(reply["delta"]) == {"cash", "inventory"}
+        assert reply["delta"]["inventory"] == {"holdings": {"coffee": 2}}
+
+        ws.send_json({"type": "advance_day", "args": {"days": 1}})
+        delta = ws.receive_json()["delta"]
+        assert delta["day"] == 1
+        assert "board" in delta and "market" not in delta
+
+        ws.send_json({"id": "x", "type": "sell", "args": {"good_name": "coffee", "quantity": 9}})
+        assert ws.receive_json() == {"type": "error", "detail": "Insufficient inventory", "id": "x"}
+
+        ws.send_json({"type": "teleport"})
+        assert ws.receive_json()["detail"] == "Unsupported command type"
+
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json(["no", "type"])
+        assert ws.receive_json()["type"] == "error"
+
+        # Another client's change shows up in this client's next delta.
+        api._store.get(game_id).cash += 1.0
+        ws.send_json({"type": "repay", "args": {"amount": 5}})
+        assert ws.receive_json()["delta"]["cash"] == api._store.get(game_id).cash
+
+
+def test_websocket_closes_when_game_is_missing_or_deleted():
+    with client.websocket_connect("/games/missing/ws") as ws:
+        assert ws.receive_json() == {"type": "error", "detail": "Game not found"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 4404
+
+    game_id = _create(seed=5)
+    with client.websocket_connect(f"/games/{game_id}/ws") as ws:
+        ws.receive_json()
+        client.delete(f"/games/{game_id}")
+        ws.send_json({"type": "advance_day"})
+        assert ws.receive_json()["detail"] == "Game not found"
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+
+
+def test_eviction_settings_are_validated(tmp_path: Path):
+    with pytest.raises(ValueError, match="spill_dir"):
+        GameStore(max_sessions=2)
+    with pytest.raises(ValueError, match="max_sessions"):
+        GameStore(spill_dir=tmp_path, max_sessions=0)
+    with pytest.raises(ValueError, match="idle_ttl"):
+        GameStore(spill_dir=tmp_path, idle_ttl=0)
+
+
+def test_lru_games_spill_to_disk_and_rehydrate_transparently(tmp_path: Path):
+    store = GameStore(spill_dir=tmp_path / "spill", max_sessions=2)
+    twin = GameStore()
+    ids = []
+    for seed in (1, 2, 3):
+        game_id, state = store.create(api.CreateGamePayload(seed=seed))
+        state.rules.daily_event_chance = 1.0
+        store.run_command(game_id, AdvanceDay(days=3))
+        ids.append(game_id)
+    twin_id, twin_state = twin.create(api.CreateGamePayload(seed=1))
+    twin_state.rules.daily_event_chance = 1.0
+    twin.run_command(twin_id, AdvanceDay(days=3))
+
+    assert store.resident_ids() == ids[1:]
+    assert sorted(store.ids()) == sorted(ids)
+    store.flush()
+    assert (tmp_path / "spill" / f"{ids[0]}.oasn").exists()
+
+    # Touching the spilled game loads it back (evicting the new LRU) and play continues.
+    state = store.run_command(ids[0], AdvanceDay(days=2))
+    twin.run_command(twin_id, AdvanceDay(days=2))
+    assert state_to_dict(state) == state_to_dict(twin.get(twin_id))
+    assert store.resident_ids() == [ids[2], ids[0]]
+    assert store.read_events(ids[0], since=0) == list(state.event_log)
+
+    store.delete(ids[1])
+    store.flush()
+    assert not (tmp_path / "spill" / f"{ids[1]}.oasn").exists()
+    with pytest.raises(HTTPException):
+        store.get(ids[1])
+    store.close()
+
+
+def test_spilled_games_load_outside_the_registry_lock(tmp_path: Path, monkeypatch):
+    store = GameStore(spill_dir=tmp_path, max_sessions=2)
+    spilled_id, spilled = store.create(api.CreateGamePayload(seed=1))
+    resident_id, _ = store.create(api.CreateGamePayload(seed=2))
+    store.create(api.CreateGamePayload(seed=3))
+    assert spilled_id not in store.resident_ids()
+    decode = api.state_from_bytes
+    decoding = threading.Event()
+    release = threading.Event()
+    decoded: list[GameState] = []
+
+    def slow_decode(data: bytes) -> GameState:
+        decoding.set()
+        assert release.wait(10)
+        decoded.append(decode(data))
+        return decoded[-1]
+
+    monkeypatch.setattr(api, "state_from_bytes", slow_decode)
+    loaded: list[GameState] = []
+    readers = [
+        threading.Thread(target=lambda: loaded.append(store.get(spilled_id))) for _ in range(3)
+    ]
+    for reader in readers:
+        reader.start()
+    assert decoding.wait(10)
+    # Other games stay reachable while the spilled one is decoded.
+    assert store.get(resident_id) is not None
+    assert spilled_id in store.ids()
+    release.set()
+    for reader in readers:
+        reader.join()
+    assert len(decoded) == 1
+    assert loaded == decoded * 3
+    assert state_to_dict(loaded[0]) == state_to_dict(spilled)
+    store.close()
+
+
+def test_idle_games_are_evicted_after_ttl_unless_busy(tmp_path: Path):
+    now = [0.0]
+    store = GameStore(spill_dir=tmp_path, idle_ttl=10.0, clock=lambda: now[0])
+    idle_id, _ = store.create(api.CreateGamePayload(seed=1))
+    busy_id, _ = store.create(api.CreateGamePayload(seed=2))
+    now[0] = 5.0
+    active_id, _ = store.create(api.CreateGamePayload(seed=3))
+
+    busy = store._sessions[busy_id]
+    now[0] = 12.0
+    with busy.lock:
+        store.get(active_id)
+    assert store.resident_ids() == [busy_id, active_id]
+    assert sorted(store.ids()) == sorted([idle_id, busy_id, active_id])
+
+    now[0] = 30.0
+    store.get(idle_id)
+    assert store.resident_ids() == [idle_id]
+
+
+def test_idle_games_are_swept_on_an_idle_server(tmp_path: Path, monkeypatch):
+    store = GameStore(spill_dir=tmp_path, idle_ttl=0.05)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    store.create(api.CreateGamePayload(seed=2))
+    serialize = api.state_to_bytes
+    serialized_under_lock = []
+
+    def outside_the_registry_lock(spilled: GameState) -> bytes:
+        # The registry lock is not reentrant: this times out if the sweeper holds it.
+        free = store._lock.acquire(timeout=5)
+        if free:
+            store._lock.release()
+        serialized_under_lock.append(not free)
+        return serialize(spilled)
+
+    monkeypatch.setattr(api, "state_to_bytes", outside_the_registry_lock)
+    deadline = time.monotonic() + 10
+    while store.resident_ids():
+        assert time.monotonic() < deadline, "idle games were not swept"
+        time.sleep(0.01)
+    assert serialized_under_lock and not any(serialized_under_lock)
+    assert game_id in store.ids()
+    assert state_to_dict(store.get(game_id)) == state_to_dict(state)
+    store.close()
+
+
+def test_command_waiting_on_an_evicted_session_retries(tmp_path: Path, monkeypatch):
+    store = GameStore(spill_dir=tmp_path, max_sessions=1)
+    game_id, _ = store.create(api.CreateGamePayload(seed=1))
+    stale = store._sessions[game_id]
+    store.create(api.CreateGamePayload(seed=2))
+    assert stale.evicted
+
+    lookups = iter([stale])
+    real_session = store._session
+    monkeypatch.setattr(store, "_session", lambda gid: next(lookups, None) or real_session(gid))
+    state = store.run_command(game_id, AdvanceDay(days=1))
+    assert state.day == 1
+    assert state is not stale.state
+
+    stale = store._sessions[game_id]
+    store.create(api.CreateGamePayload(seed=3))
+    lookups = iter([stale])
+    assert store.run_sliced(game_id, AdvanceDay(days=2)) is True
+    assert store.get(game_id).day == 3
+
+
+def test_sync_commands_report_errors():
+    store = GameStore()
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    with pytest.raises(HTTPException) as invalid:
+        store.run_command(game_id, AdvanceDay(days=0))
+    assert invalid.value.status_code == 400
+    _, errors = store.run_batch(
+        game_id, [Sell(good_name="coffee", quantity=1), AdvanceDay()], stop_on_error=True
+    )
+    assert errors == ["Insufficient inventory"] and state.day == 0
+    with pytest.raises(ValueError, match="Insufficient inventory"):
+        store.run_sliced(game_id, Sell(good_name="coffee", quantity=1))
+
+
+def test_long_command_on_one_game_does_not_block_another(monkeypatch):
+    store = GameStore()
+    slow_id, slow_state = store.create(api.CreateGamePayload(seed=1))
+    fast_id, _ = store.create(api.CreateGamePayload(seed=2))
+    started, release = threading.Event(), threading.Event()
+    real_apply = api.apply_command
+
+    def blocking_apply(state, command):
+        if state is slow_state:
+            started.set()
+            assert release.wait(timeout=10)
+        real_apply(state, command)
+
+    monkeypatch.setattr(api, "apply_command", blocking_apply)
+    slow = threading.Thread(target=store.run_command, args=(slow_id, AdvanceDay(days=500)))
+    slow.start()
+    try:
+        assert started.wait(timeout=10)
+        # The slow game is mid-command; another game, the registry and listing still respond.
+        state = store.run_command(fast_id, Buy(good_name="coffee", quantity=1))
+        assert state.inventory.quantity("coffee") == 1
+        assert sorted(store.ids()) == sorted([slow_id, fast_id])
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join(timeout=10)
+    assert slow_state.day == 500
+
+
+def test_command_that_raced_a_delete_gets_404(monkeypatch):
+    store = GameStore()
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    session = store._session(game_id)
+    store.delete(game_id)
+    # Simulate a command that looked the session up just before the delete landed.
+    monkeypatch.setattr(store, "_session", lambda _: session)
+
+    with pytest.raises(HTTPException) as exc_info:
+        store.run_command(game_id, AdvanceDay())
+    assert exc_info.value.status_code == 404
+    assert state.day == 0
+
+
+async def _until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0)
+
+
+def test_long_commands_share_the_loop_slice_by_slice(tmp_path: Path):
+    # One day per slice; storage allows a single resident game.
+    store = GameStore(spill_dir=tmp_path, max_sessions=1, slice_seconds=0.0)
+    slow_id, slow_state = store.create(api.CreateGamePayload(seed=1))
+    session = store._sessions[slow_id]
+    reference = create_default_state(seed=1)
+    apply_command(reference, AdvanceDay(days=100))
+
+    async def scenario() -> None:
+        slow = asyncio.ensure_future(store.arun_command(slow_id, AdvanceDay(days=100)))
+        queued = asyncio.ensure_future(store.arun_command(slow_id, Buy("coffee", 1)))
+        await _until(lambda: slow_state.day >= 10)
+        # Between slices the game's lock is free and other games run, while the
+        # slow game's next command waits and the game itself stays resident.
+        assert not session.lock.locked()
+        fast_id, _ = store.create(api.CreateGamePayload(seed=2))
+        state = await store.arun_command(fast_id, Buy(good_name="coffee", quantity=1))
+        assert state.inventory.quantity("coffee") == 1
+        assert 10 <= slow_state.day < 100 and not queued.done()
+        assert slow_id in store.resident_ids()
+        await asyncio.gather(slow, queued)
+
+    asyncio.run(scenario())
+    assert slow_state.inventory.quantity("coffee") == 1
+    reference.inventory.add("coffee", 1)
+    reference.cash = slow_state.cash
+    assert state_to_dict(slow_state) == state_to_dict(reference)
+    assert session.pins == 0
+    store.close()
+
+
+def test_cancelled_batch_holds_the_game_until_it_finishes():
+    store = GameStore(slice_seconds=0.0)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+
+    async def scenario() -> None:
+        batch = [AdvanceDay(days=20), Buy(good_name="coffee", quantity=1)]
+        slow = asyncio.ensure_future(store.arun_batch(game_id, batch, stop_on_error=True))
+        await _until(lambda: state.day > 0)
+        slow.cancel()
+        after = asyncio.ensure_future(store.arun_command(game_id, AdvanceDay(days=1)))
+        await asyncio.sleep(0)
+        assert not after.done()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        assert (await after).day == 21
+
+    asyncio.run(scenario())
+    assert state.inventory.quantity("coffee") == 1
+    store.close()
+
+
+def test_jobs_cannot_act_between_the_commands_of_a_batch(monkeypatch):
+    store = GameStore(slice_seconds=0.0)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    state.rules.max_days = None
+    state.rules.win_net_worth = float("inf")
+    stop = threading.Event()
+    job = threading.Thread(
+        target=store.run_sliced,
+        args=(game_id, AdvanceDay(days=10**6)),
+        kwargs={"should_stop": stop.is_set},
+    )
+    job.start()
+    days_seen: list[int] = []
+    start_command = api.start_command
+
+    def recording(game: GameState, command):
+        days_seen.append(game.day)
+        return start_command(game, command)
+
+    monkeypatch.setattr(api, "start_command", recording)
+    switch_interval = sys.getswitchinterval()
+    try:
+        deadline = time.monotonic() + 10
+        while state.day == 0:
+            assert time.monotonic() < deadline, "the job never started"
+            time.sleep(0.001)
+        batch = [Buy("coffee", 1), Sell("coffee", 1)] * 200
+        sys.setswitchinterval(1e-6)  # let the job thread in as often as it can
+        asyncio.run(store.arun_batch(game_id, batch, stop_on_error=False))
+    finally:
+        sys.setswitchinterval(switch_interval)
+        stop.set()
+        job.join()
+    batch_days = days_seen[-len(batch) :]
+    assert len(set(batch_days)) == 1
+    store.close()
+
+
+def test_sliced_commands_fail_cleanly_when_interrupted():
+    store = GameStore(slice_seconds=0.0)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    other_id, _ = store.create(api.CreateGamePayload(seed=2))
+
+    async def scenario() -> None:
+        # Another client ends the game between slices.
+        slow = asyncio.ensure_future(store.arun_command(game_id, AdvanceDay(days=50)))
+        await _until(lambda: state.day > 0)
+        state.status = GameOutcome.WON
+        with pytest.raises(HTTPException) as finished:
+            await slow
+        assert finished.value.status_code == 400
+        assert finished.value.detail == "Game is finished"
+
+        # A batch holds the game throughout: a delete waits for it to finish.
+        batch = [AdvanceDay(days=50), AdvanceDay()]
+        slow = asyncio.ensure_future(store.arun_batch(other_id, batch, stop_on_error=False))
+        await _until(lambda: store.get(other_id).day > 0)
+        deleted = asyncio.ensure_future(asyncio.to_thread(store.delete, other_id))
+        finished_state, errors = await slow
+        assert finished_state.day == 51 and errors == [None, None]
+        await deleted
+        with pytest.raises(HTTPException) as missing:
+            store.get(other_id)
+        assert missing.value.status_code == 404
+
+    asyncio.run(scenario())
+    store.close()
+
+
+def test_async_commands_reload_spilled_games_and_respect_deletes(tmp_path: Path, monkeypatch):
+    store = GameStore(spill_dir=tmp_path, max_sessions=1)
+    game_id, _ = store.create(api.CreateGamePayload(seed=1))
+    stale = store._sessions[game_id]
+    store.create(api.CreateGamePayload(seed=2))
+    assert stale.evicted
+
+    lookups = iter([stale])
+    real_session = store._session
+    monkeypatch.setattr(store, "_session", lambda gid: next(lookups, None) or real_session(gid))
+
+    async def scenario() -> None:
+        state = await store.arun_command(game_id, AdvanceDay(days=1))
+        assert state.day == 1 and state is not stale.state
+        assert await store.aget(game_id) is state
+        session = store._sessions[game_id]
+        await store.adelete(game_id)
+        # A command that looked the session up just before the delete landed.
+        monkeypatch.setattr(store, "_session", lambda _: session)
+        with pytest.raises(HTTPException) as missing:
+            await store.arun_command(game_id, AdvanceDay())
+        assert missing.value.status_code == 404
+
+    asyncio.run(scenario())
+    assert state_to_dict(stale.state)["day"] == 0
+    store.close()
+
+
+def test_world_clock_settings_are_validated(tmp_path: Path):
+    with pytest.raises(ValueError, match="tick_interval must be positive"):
+        GameStore(tick_interval=0)
+    with pytest.raises(ValueError, match="max_sessions or idle_ttl"):
+        GameStore(spill_dir=tmp_path, idle_ttl=60, tick_interval=1.0)
+
+
+def test_tick_advances_every_ongoing_game_like_advance_day():
+    backend = MemoryBackend()
+    store = GameStore(storage=backend)
+    twin = GameStore()
+    pairs = []
+    for seed in range(5):
+        game_id, state = store.create(api.CreateGamePayload(seed=seed))
+        twin_id, twin_state = twin.create(api.CreateGamePayload(seed=seed))
+        # The world switches list-backed markets to arrays, which draw differently.
+        twin_state.market = ArrayMarket.from_market(twin_state.market)
+        for rules in (state.rules, twin_state.rules):
+            rules.daily_event_chance = 1.0
+        pairs.append((game_id, state, twin_id, twin_state))
+    finished_id, finished = store.create(api.CreateGamePayload(seed=9))
+    finished.status = GameOutcome.WON
+    gone_id, _ = store.create(api.CreateGamePayload(seed=10))
+
+    assert store.tick() == 6
+    store.delete(gone_id)
+    assert store.tick() == 5
+    assert store.ticks == 2
+    store.flush()
+    for game_id, state, twin_id, twin_state in pairs:
+        twin.run_command(twin_id, AdvanceDay(days=2))
+        assert state_to_dict(state) == state_to_dict(twin_state)
+        assert store.read_events(game_id, since=0) == list(state.event_log)
+        assert state_to_dict(state_from_bytes(backend.read(game_id))) == state_to_dict(state)
+    assert any(state.event_log for _, state, _, _ in pairs)
+    assert store.get(finished_id).day == 0
+    store.close()
+
+
+def test_loop_keeps_serving_while_a_tick_holds_the_game_locks():
+    store = GameStore()
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    session = store._sessions[game_id]
+
+    async def scenario() -> None:
+        session.lock.acquire()  # as a long tick would
+        command = asyncio.ensure_future(store.arun_command(game_id, Buy("coffee", 1)))
+        beats = 0
+        while beats < 20:
+            await asyncio.sleep(0)
+            beats += 1  # other coroutines keep running while the command waits
+        assert not command.done()
+        session.lock.release()
+        await command
+
+    asyncio.run(scenario())
+    assert state.inventory.quantity("coffee") == 1
+    store.close()
+
+
+def test_responses_render_the_state_under_the_game_lock():
+    store = GameStore()
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    session = store._sessions[game_id]
+    view = api.StateView(fields=["day"])
+
+    async def scenario() -> None:
+        session.lock.acquire()  # a job or tick mid-day
+        render = asyncio.ensure_future(store.arender(game_id, view))
+        command = asyncio.ensure_future(store.arun_rendered(game_id, AdvanceDay(), view))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert not render.done() and not command.done()
+        state.day = 7
+        session.lock.release()
+        assert await render == {"day": 7}
+        assert await command == {"day": 8}
+
+    asyncio.run(scenario())
+    store.close()
+
+
+def test_world_clock_ticks_in_the_background(monkeypatch):
+    store = GameStore(tick_interval=0.01)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    assert isinstance(state.market, ArrayMarket)
+    time.sleep(0.05)
+    assert state.day == 0 and store.ticks == 0  # the clock waits for start()
+    store.start()
+    deadline = time.monotonic() + 10
+    while state.day < 3:
+        assert time.monotonic() < deadline, "the clock did not tick"
+        time.sleep(0.01)
+    # Players still send their own commands between ticks.
+    store.run_command(game_id, Buy(good_name="coffee", quantity=1))
+    store.close()
+    day = state.day
+    time.sleep(0.05)
+    assert state.day == day and store.ticks >= 3
+
+    monkeypatch.setenv("OPEN_ARBITRAGE_TICK_SECONDS", "30")
+    module = runpy.run_module("open_arbitrage.api")
+    assert module["_store"].tick_interval == 30.0
+    assert not module["_store"]._world_clock._thread.is_alive()  # importing ticks nothing
+    module["_store"].close()
+
+
+def test_seeded_games_are_cloned_from_templates():
+    store = GameStore()
+    _, first = store.create(api.CreateGamePayload(seed=3, inventory_capacity=4))
+    _, second = store.create(api.CreateGamePayload(seed=3, travel_cost=1.0))
+    assert len(store._templates) == 1
+    assert first.inventory.capacity == first.rules.inventory_capacity == 4
+    assert second.rules.travel_cost == 1.0 and first.rules is not second.rules
+    fresh = create_default_state(seed=3)
+    fresh.rules.travel_cost = 1.0
+    assert state_to_dict(second) == state_to_dict(fresh)
+    store.close()
+
+
+def test_seedless_games_come_from_a_refilled_pool():
+    with pytest.raises(ValueError, match="seedless_pool"):
+        GameStore(seedless_pool=-1)
+    store = GameStore(seedless_pool=2)
+    pool = store._seedless
+    assert not pool._ready and not pool._thread.is_alive()  # nothing built until started
+    store.start()
+
+    def until_full() -> None:
+        deadline = time.monotonic() + 10
+        while len(pool._ready) < 2:
+            assert time.monotonic() < deadline, "the pool was not refilled"
+            time.sleep(0.005)
+
+    until_full()
+    ready = list(pool._ready)
+    _, state = store.create(api.CreateGamePayload(inventory_capacity=9, max_days=30))
+    assert state is ready[0]
+    assert state.seed is None and state.day == 0
+    assert state.inventory.capacity == state.rules.inventory_capacity == 9
+    assert state.rules.max_days == 30
+    until_full()
+
+    store.close()
+    assert not pool._thread.is_alive()
+
+    # A dry pool builds the game on the spot.
+    dry = api._SeedlessPool(0, array_market=True)
+    state = dry.take()
+    assert isinstance(state.market, ArrayMarket) and state.rules == Rules()
+    dry.close()
@@ -114,3 +114,32 @@ def test_cli_main_entrypoint_runs(monkeypatch):
     monkeypatch.setattr(cli, "app", fake_app)
     cli.main()
     assert invoked.get("ran") is True
+
+
+def test_serve_runs_a_shard_supervisor(monkeypatch, tmp_path):
+    calls: list[str] = []
+
+    class FakeSupervisor:
+        def __init__(self, count, *, host, port, socket_dir):
+            calls.append(f"init {count} {host}:{port} {socket_dir}")
+            self.address = (host, port)
+
+        def start(self):
+            calls.append("start")
+
+        def wait(self):
+            calls.append("wait")
+
+        def stop(self):
+            calls.append("stop")
+
+    monkeypatch.setattr(cli, "ShardSupervisor", FakeSupervisor)
+    result = runner.invoke(cli.app, ["serve", "-n", "3", "--socket-dir", str(tmp_path)])
+    assert result.exit_code == 0
+    assert calls == [f"init 3 127.0.0.1:8000 {tmp_path}", "start", "wait", "stop"]
+    assert "Serving 3 shards on http://127.0.0.1:8000" in result.stdout
+
+    calls.clear()
+    monkeypatch.setattr(cli.tempfile, "mkdtemp", lambda prefix: str(tmp_path / prefix))
+    assert runner.invoke(cli.app, ["serve"]).exit_code == 0
+    assert calls[0].endswith(str(tmp_path / "open-arbitrage-"))
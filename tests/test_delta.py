@@ -0,0 +1,61 @@
+import pytest
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    Buy,
+    DeltaTracker,
+    Rules,
+    Travel,
+    apply_command,
+    create_default_state,
+)
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+def test_diff_reports_only_changed_fields(array_market):
+    state = create_default_state(seed=2, array_market=array_market)
+    tracker = DeltaTracker(state)
+    assert tracker.diff(state) == {}
+
+    apply_command(state, Buy(good_name="coffee", quantity=2))
+    delta = tracker.diff(state)
+    assert set(delta) == {"cash", "inventory"}
+    assert delta["inventory"] == {"holdings": {"coffee": 2}}
+    assert tracker.diff(state) == {}
+
+    apply_command(state, Travel(destination_index=1))
+    delta = tracker.diff(state)
+    assert {"day", "city_index", "cash", "loan", "board"} <= set(delta)
+    assert delta["loan"] == {"balance": state.loan.balance}
+    cells = {(cell["city_index"], cell["good"]): cell["value"] for cell in delta["board"]}
+    assert len(cells) == len(state.cities) * len(state.market.goods)
+    assert cells[(1, "coffee")] == state.market.quote(1, "coffee").value
+
+
+def test_diff_carries_new_events_and_status():
+    state = create_default_state(
+        seed=4, rules=Rules(daily_event_chance=1.0, max_days=3, win_net_worth=1e12)
+    )
+    tracker = DeltaTracker(state)
+    apply_command(state, AdvanceDay(days=3))
+    delta = tracker.diff(state)
+    assert delta["status"] == "lost"
+    assert [event["seq"] for event in delta["events"]] == [
+        event["seq"] for event in state.event_log
+    ]
+    assert "events" not in tracker.diff(state)
+
+
+def test_unchanged_cells_are_not_resent():
+    state = create_default_state(seed=5, array_market=True)
+    tracker = DeltaTracker(state)
+    state.market.values[2, 3] *= 1.01
+    assert tracker.diff(state) == {
+        "board": [
+            {
+                "city_index": 2,
+                "good": state.market.goods[3].name,
+                "value": float(state.market.values[2, 3]),
+            }
+        ]
+    }
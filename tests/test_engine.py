@@ -1,10 +1,13 @@
+import dataclasses
 import random
 
 import pytest
 
 from open_arbitrage.engine import (
     AdvanceDay,
+    ArrayMarket,
     Buy,
+    EventLog,
     GameOutcome,
     Inventory,
     LoanAccount,
@@ -12,12 +15,15 @@ from open_arbitrage.engine import (
     Rules,
     Sell,
     SetSeed,
+    Stepper,
     Travel,
     apply_command,
     ask_price,
     bid_price,
+    clone_state,
     create_default_state,
     net_worth,
+    start_command,
     state_from_dict,
     state_to_dict,
 )
@@ -101,6 +107,166 @@ def test_advance_day_compounds_loan_and_moves_prices():
     assert any(a != b for a, b in zip(after, before, strict=True))
 
 
+def test_fast_forward_is_deterministic_and_backend_independent():
+    rules = Rules(max_days=None)
+    states = [
+        create_default_state(seed=31, rules=rules),
+        create_default_state(seed=31, rules=rules),
+        create_default_state(seed=31, rules=rules, array_market=True),
+    ]
+    states[0].inventory.holdings = {"coffee": 40, "grain": 40}
+    states[1].inventory.holdings = {"coffee": 40, "grain": 40}
+    states[2].inventory.holdings = {"coffee": 40, "grain": 40}
+    for state in states:
+        apply_command(state, AdvanceDay(days=600, exact=False))  # spans several chunks
+
+    payloads = [state_to_dict(state) for state in states]
+    assert payloads[0] == payloads[1]
+    payloads[2]["market"]["backend"] = "list"
+    assert payloads[2] == payloads[0]
+    assert states[0].day == 600
+    assert any(event["day"] > 256 for event in states[0].event_log)
+
+
+def test_fast_forward_differs_from_exact_but_keeps_the_dynamics():
+    rules = Rules(daily_event_chance=0.0, max_days=None)
+    exact = create_default_state(seed=32, rules=rules)
+    fast = create_default_state(seed=32, rules=rules)
+    apply_command(exact, AdvanceDay(days=50))
+    apply_command(fast, AdvanceDay(days=50, exact=False))
+
+    assert fast.day == exact.day == 50
+    assert fast.loan.balance == pytest.approx(exact.loan.balance)
+    assert fast.loan.balance == pytest.approx(10_000.0 * 1.01**50)
+    assert fast.event_log == []
+    for board in fast.market.boards:
+        for quote in board:
+            assert quote.min_value <= quote.value <= quote.max_value
+            assert quote.last_value != quote.value
+    assert state_to_dict(fast)["market"] != state_to_dict(exact)["market"]
+
+
+def test_fast_forward_events_record_their_day_and_settle_interest_first():
+    rules = Rules(
+        daily_event_chance=1.0,
+        daily_event_weights=only_daily("creditor_call"),
+        city_event_multipliers={},
+        max_days=None,
+    )
+    state = create_default_state(seed=33, rules=rules)
+    state.cash = 1_000_000.0
+    apply_command(state, AdvanceDay(days=3, exact=False))
+
+    assert [event["day"] for event in state.event_log] == [0, 1, 2]
+    balance = 10_000.0
+    for event in state.event_log:
+        balance = (balance - event["details"]["paid"]) * 1.01
+    assert state.loan.balance == pytest.approx(balance)
+
+
+# --- Stepped commands -----------------------------------------------------
+
+
+def _stepped(state, command, max_days):
+    stepper = start_command(state, command)
+    steps = 1
+    while not stepper.step(max_days):
+        steps += 1
+    assert stepper.days_done == stepper.days_total
+    return steps
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+@pytest.mark.parametrize(
+    "command",
+    [AdvanceDay(days=300), AdvanceDay(days=600, exact=False), Travel(destination_index=1)],
+    ids=["exact", "fast", "travel"],
+)
+def test_stepped_commands_match_apply_command(command, array_market):
+    rules = Rules(
+        max_days=None,
+        daily_event_chance=0.3,
+        travel_event_chance=1.0,
+        travel_event_weights={"weather_delay": 1.0, "customs_fine": 0.0},
+    )
+    reference = create_default_state(seed=41, rules=rules, array_market=array_market)
+    reference.inventory.holdings = {"coffee": 40, "grain": 40}
+    apply_command(reference, command)
+    expected = state_to_dict(reference)
+    assert reference.event_log  # events (and a weather delay) were exercised
+
+    for max_days in (1, 7, 255, 256, 1_000):
+        state = create_default_state(seed=41, rules=rules, array_market=array_market)
+        state.inventory.holdings = {"coffee": 40, "grain": 40}
+        steps = _stepped(state, command, max_days)
+        assert state_to_dict(state) == expected
+        assert steps == max(-(-reference.day // max_days), 1)
+
+
+def test_stepper_shows_progress_between_steps():
+    state = create_default_state(seed=42, rules=Rules(daily_event_chance=0.0, max_days=30))
+    stepper = start_command(state, AdvanceDay(days=40, exact=False))
+    assert (stepper.days_done, stepper.days_total) == (0, 40)
+
+    assert stepper.step(10) is False
+    assert state.day == stepper.days_done == 10
+    assert state.loan.balance == pytest.approx(10_000.0 * 1.01**10)
+    # The outcome is only judged once the whole command has run.
+    assert stepper.step(25) is False and state.status is GameOutcome.ONGOING
+    assert stepper.step() is True
+    assert state.day == 40 and state.status is GameOutcome.LOST
+    assert stepper.step() is True
+    with pytest.raises(ValueError, match="max_days"):
+        start_command(create_default_state(seed=42), AdvanceDay(days=2)).step(0)
+
+
+def test_stepper_deadline_and_stop_hook_end_a_step_early(monkeypatch):
+    state = create_default_state(seed=43, rules=Rules(max_days=None))
+    stepper = start_command(state, AdvanceDay(days=50))
+    assert stepper.step(deadline=0.0) is False  # already passed: one day, then stop
+    assert stepper.days_done == 1
+
+    calls = []
+    assert stepper.step(should_stop=lambda: len(calls) >= 3 or bool(calls.append(1))) is False
+    assert stepper.days_done == 5
+
+    clock = iter([1.0, 2.0, 3.0])
+    monkeypatch.setattr("open_arbitrage.engine.core.time.monotonic", lambda: next(clock))
+    assert stepper.step(deadline=2.5) is False
+    assert stepper.days_done == 8
+
+
+def test_stepper_tolerates_other_commands_between_steps():
+    state = create_default_state(seed=44, rules=Rules(daily_event_chance=0.0, max_days=None))
+    state.cash = 20_000.0
+    stepper = start_command(state, AdvanceDay(days=20, exact=False))
+    stepper.step(10)
+    apply_command(state, RepayLoan(amount=5_000))
+    balance = state.loan.balance
+    assert stepper.step() is True
+    assert state.day == 20
+    assert state.loan.balance == pytest.approx(balance * 1.01**10)
+
+    # Another command may end the game; the stepper then refuses to go on.
+    stepper = start_command(state, AdvanceDay(days=5))
+    state.status = GameOutcome.WON
+    with pytest.raises(ValueError, match="Game is finished"):
+        stepper.step()
+
+
+def test_instant_commands_finish_when_started():
+    state = create_default_state(seed=45)
+    for command in (Buy(good_name="coffee", quantity=1), Travel(destination_index=0)):
+        stepper = start_command(state, command)
+        assert isinstance(stepper, Stepper)
+        assert stepper.finished and stepper.days_total == 0 and stepper.step() is True
+    assert state.inventory.quantity("coffee") == 1 and state.day == 0
+    with pytest.raises(ValueError, match="Insufficient inventory"):
+        start_command(state, Sell(good_name="grain", quantity=1))
+    with pytest.raises(TypeError):
+        Stepper(state, 1)  # type: ignore[abstract]
+
+
 def test_advance_day_rejects_non_positive():
     state = create_default_state(seed=3)
     with pytest.raises(ValueError):
@@ -152,6 +318,16 @@ def test_net_worth_uses_bid_value_of_inventory():
     assert net_worth(state) == pytest.approx(bid_price(state, "coffee") * 4)
 
 
+def test_net_worth_sums_every_holding_at_its_bid():
+    state = create_default_state(seed=2)
+    state.cash = 10.0
+    state.loan.balance = 3.0
+    state.inventory.holdings = {"coffee": 4, "silk": 2}
+    assert net_worth(state) == pytest.approx(
+        7.0 + bid_price(state, "coffee") * 4 + bid_price(state, "silk") * 2
+    )
+
+
 # --- Serialization & determinism -----------------------------------------
 
 
@@ -170,6 +346,82 @@ def test_state_serialization_is_fully_deterministic():
     assert state_to_dict(s1) == state_to_dict(s2)
 
 
+def test_array_market_state_plays_and_round_trips():
+    rules = Rules(daily_event_chance=1.0, travel_event_chance=1.0)
+    s1 = create_default_state(seed=9, rules=rules, array_market=True)
+    assert isinstance(s1.market, ArrayMarket)
+    # Same seed -> same starting board regardless of backend.
+    list_backed = create_default_state(seed=9, rules=rules)
+    assert state_to_dict(s1)["market"]["boards"] == state_to_dict(list_backed)["market"]["boards"]
+
+    apply_command(s1, Buy(good_name="coffee", quantity=3))
+    apply_command(s1, Travel(destination_index=2))
+    apply_command(s1, AdvanceDay(days=4))
+
+    payload = state_to_dict(s1)
+    assert payload["market"]["backend"] == "array"
+    s2 = state_from_dict(payload)
+    assert isinstance(s2.market, ArrayMarket)
+    assert state_to_dict(s2) == payload
+
+    apply_command(s1, AdvanceDay(days=3))
+    apply_command(s2, AdvanceDay(days=3))
+    assert state_to_dict(s1) == state_to_dict(s2)
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+def test_fork_is_independent_and_replays_identically(array_market):
+    rules = Rules(daily_event_chance=1.0)
+    original = create_default_state(seed=4, rules=rules, array_market=array_market)
+    apply_command(original, Buy(good_name="coffee", quantity=2))
+    apply_command(original, AdvanceDay(days=2))
+
+    fork = original.fork()
+    assert state_to_dict(fork) == state_to_dict(original)
+    assert fork.rules is original.rules
+    assert fork.cities is original.cities
+    assert fork.market.goods is original.market.goods
+    assert type(fork.market) is type(original.market)
+
+    # Branches share nothing mutable...
+    apply_command(fork, Buy(good_name="wine", quantity=1))
+    apply_command(fork, AdvanceDay(days=3))
+    assert original.inventory.quantity("wine") == 0
+    assert original.day == 2
+    assert len(original.event_log) < len(fork.event_log)
+    assert state_to_dict(original) != state_to_dict(fork)
+
+    # ...and the same commands give the same game.
+    twin = clone_state(original)
+    for state in (original, twin):
+        apply_command(state, Travel(destination_index=3))
+        apply_command(state, AdvanceDay(days=5))
+    assert state_to_dict(twin) == state_to_dict(original)
+
+
+def test_state_to_dict_projection_builds_only_selected_sections(monkeypatch):
+    state = create_default_state(seed=9)
+    full = state_to_dict(state)
+
+    assert state_to_dict(state, fields=["cash", "day"]) == {"day": 0, "cash": full["cash"]}
+    trimmed = state_to_dict(state, exclude={"rng_state", "rules"})
+    assert set(trimmed) == set(full) - {"rng_state", "rules"}
+    board = state_to_dict(state, fields=["board"])["board"]
+    assert board == full["market"]["boards"][state.city_index]
+    assert "board" not in full
+
+    def explode(_rng):  # pragma: no cover - must not be called
+        raise AssertionError("rng_state was serialized")
+
+    monkeypatch.setattr("open_arbitrage.engine.core._encode_rng_state", explode)
+    state_to_dict(state, exclude=["rng_state"])
+
+    with pytest.raises(ValueError, match="Unknown state field"):
+        state_to_dict(state, fields=["cash", "bogus"])
+    with pytest.raises(ValueError, match="Unknown state field"):
+        state_to_dict(state, exclude=["bogus"])
+
+
 def test_state_from_dict_falls_back_to_seed_when_no_rng_state():
     state = create_default_state(seed=15)
     payload = state_to_dict(state)
@@ -196,6 +448,68 @@ def test_state_from_dict_version_guard():
 # --- Events ---------------------------------------------------------------
 
 
+def test_event_log_is_a_sequenced_ring_buffer():
+    log = EventLog(limit=3)
+    for day in range(5):
+        log.append({"kind": "note", "day": day})
+    assert len(log) == 3
+    assert [event["seq"] for event in log] == [3, 4, 5]
+    assert log.last_seq == 5
+    assert log[0]["day"] == 2 and log[-1]["day"] == 4
+    assert [event["seq"] for event in log[-2:]] == [4, 5]
+
+    assert [event["seq"] for event in log.events_since(3)] == [4, 5]
+    assert [event["seq"] for event in log.events_since(0)] == [3, 4, 5]
+    assert log.events_since(5) == []
+
+    clone = log.copy()
+    clone.append({"kind": "note", "day": 9})
+    assert log.last_seq == 5 and clone.last_seq == 6
+    assert clone != log
+    assert log == log.copy()
+    assert log == list(log)
+    assert log != "not a log"
+    assert "limit=3" in repr(log)
+
+    log.limit = 2
+    assert [event["seq"] for event in log] == [4, 5]
+    log.limit = None
+    assert log.limit is None
+
+
+def test_event_log_numbers_legacy_events_and_survives_round_trip():
+    payload = state_to_dict(create_default_state(seed=1))
+    payload["event_log"] = [{"kind": "old", "day": 0, "city": "Sydney", "details": {}}] * 2
+    state = state_from_dict(payload)
+    assert [event["seq"] for event in state.event_log] == [1, 2]
+
+    state.rules.daily_event_chance = 1.0
+    apply_command(state, AdvanceDay(days=3))
+    assert state.event_log.last_seq > 2
+    restored = state_from_dict(state_to_dict(state))
+    assert restored.event_log == state.event_log
+    assert restored.event_log.last_seq == state.event_log.last_seq
+
+
+def test_event_log_accepts_plain_lists():
+    base = create_default_state(seed=2, rules=Rules(daily_event_chance=1.0))
+    state = dataclasses.replace(base, event_log=[])
+    apply_command(state, AdvanceDay(days=2))
+    assert [event["seq"] for event in state.event_log] == [1, 2]
+
+    state.event_log = [{"kind": "note", "day": 0, "city": "Sydney", "details": {}}]
+    assert isinstance(state.event_log, EventLog)
+    apply_command(state, AdvanceDay())
+    assert [event["seq"] for event in state.event_log] == [1, 2]
+
+
+def test_event_log_limit_follows_rules():
+    state = create_default_state(seed=2, rules=Rules(daily_event_chance=1.0, event_log_limit=4))
+    apply_command(state, AdvanceDay(days=10))
+    assert len(state.event_log) == 4
+    assert state.event_log[-1]["seq"] == state.event_log.last_seq > 4
+
+
 def test_daily_event_demand_spike_modifies_current_city():
     rules = Rules(daily_event_chance=1.0, daily_event_weights=only_daily("demand_spike"))
     state = create_default_state(seed=10, rules=rules)
@@ -350,6 +664,21 @@ def test_inventory_validation_branches():
         inventory.remove("x", 1)
 
 
+def test_loan_compound_closed_form():
+    daily = LoanAccount(balance=100.0, rate=0.01, max_balance=200.0)
+    closed = LoanAccount(balance=100.0, rate=0.01, max_balance=200.0)
+    daily.compound(0)
+    closed.compound_closed_form(0)
+    assert daily.balance == closed.balance == 100.0
+    daily.compound(30)
+    closed.compound_closed_form(30)
+    expected = 100.0
+    for _ in range(30):
+        expected += expected * 0.01
+    assert daily.balance == expected  # bit-identical to the daily loop
+    assert closed.balance == pytest.approx(expected)
+
+
 def test_loan_repay_requires_positive_amount():
     loan = LoanAccount(balance=100.0, rate=0.01, max_balance=200.0)
     with pytest.raises(ValueError):
@@ -406,6 +735,57 @@ def test_weighted_choice_branches():
     assert _weighted_choice({"a": 1.0}, OutOfRangeRng()) is None
 
 
+def test_compiled_rules_are_cached_until_rules_change():
+    state = create_default_state(seed=4)
+    compiled = state.compiled_rules()
+    assert state.compiled_rules() is compiled
+    assert compiled.daily_chance[state.cities.index("Zurich")] == pytest.approx(0.33)
+    assert compiled.daily_chance[state.cities.index("Sydney")] == pytest.approx(0.3)
+    assert compiled.spoilage_weights is not None
+    assert compiled.spoilage_weights["grain"] == 1.4
+    assert compiled.spoilage_weights["coffee"] == 1.0
+
+    state.rules.daily_event_chance = 0.0
+    recompiled = state.compiled_rules()
+    assert recompiled is not compiled
+    assert set(recompiled.daily_chance) == {0.0}
+
+    state.rules = Rules(spoilage_item_multipliers={})
+    assert state.compiled_rules().spoilage_weights is None
+
+
+def test_spoilage_weighs_goods_outside_the_catalog_as_one(monkeypatch):
+    state = create_default_state(seed=4)
+    state.inventory.holdings = {"gold": 5}
+    monkeypatch.setattr("open_arbitrage.engine.core._mid_price", lambda state, good: 1.0)
+    _event_spoilage(state)
+    assert state.inventory.quantity("gold") < 5
+    assert state.event_log[-1]["details"]["good"] == "gold"
+
+
+def test_rules_copy_is_independent():
+    rules = Rules(travel_cost=5.0)
+    state = create_default_state(seed=4, rules=rules)
+    compiled = state.compiled_rules()
+    clone = rules.copy()
+    assert clone == rules and clone is not rules
+    clone.daily_event_weights["theft"] = 99.0
+    clone.travel_cost = 1.0
+    assert rules.daily_event_weights["theft"] == 0.8 and rules.travel_cost == 5.0
+    assert state.compiled_rules() is compiled
+    state.rules = clone
+    assert state.compiled_rules() is not compiled
+
+
+def test_compiled_weight_table_draws_like_a_linear_scan():
+    weights = {"a": 0.5, "skip": 0.0, "b": 1.25, "c": 0.25}
+    for seed in range(50):
+        rng = random.Random(seed)
+        roll = rng.uniform(0, 2.0)
+        expected = "a" if roll <= 0.5 else "b" if roll <= 1.75 else "c"
+        assert _weighted_choice(weights, random.Random(seed)) == expected
+
+
 def test_apply_daily_and_travel_event_guard_paths():
     state = create_default_state(seed=4, rules=Rules(daily_event_chance=1.0))
     state.rules.city_event_multipliers = {state.current_city(): 0.0}
@@ -431,31 +811,63 @@ def test_apply_daily_and_travel_event_guard_paths():
     assert _apply_travel_event(disabled) == 0
 
 
-def test_event_theft_and_spoilage_paths():
-    state = create_default_state(seed=7)
+@pytest.mark.parametrize("rng_scheme", [1, 2])
+def test_event_theft_and_spoilage_paths(rng_scheme):
+    rules = Rules(rng_scheme=rng_scheme)
+    state = create_default_state(seed=7, rules=rules)
     state.inventory.holdings = {"coffee": 3}
     _event_theft(state)
     assert state.event_log[-1]["kind"] == "theft"
     assert state.last_loss_value > 0
 
-    empty = create_default_state(seed=8)
+    empty = create_default_state(seed=8, rules=rules)
     _event_spoilage(empty)
     _event_theft(empty)
     assert empty.event_log == []
 
-    zero_qty = create_default_state(seed=9)
+    zero_qty = create_default_state(seed=9, rules=Rules(rng_scheme=rng_scheme))
     zero_qty.inventory.holdings = {"coffee": 1, "wine": 0}
     zero_qty.rules.spoilage_item_multipliers = {"coffee": 0.0, "wine": 10.0}
     _event_spoilage(zero_qty)
     assert zero_qty.event_log == []
 
-    no_multipliers = create_default_state(seed=10)
+    no_multipliers = create_default_state(seed=10, rules=Rules(rng_scheme=rng_scheme))
     no_multipliers.rules.spoilage_item_multipliers = {}
     no_multipliers.inventory.holdings = {"coffee": 2}
     _event_spoilage(no_multipliers)
     assert no_multipliers.event_log[-1]["kind"] == "spoilage"
 
 
+def test_bulk_theft_removes_units_without_replacement():
+    state = create_default_state(seed=7, rules=Rules(inventory_capacity=None))
+    state.inventory.holdings = {"coffee": 60_000, "wine": 40_000, "silk": 0}
+    _event_theft(state)
+    removed = state.event_log[-1]["details"]["removed"]
+    assert set(removed) <= {"coffee", "wine"}
+    assert 5_000 <= sum(removed.values()) <= 20_000
+    assert state.inventory.quantity("coffee") == 60_000 - removed.get("coffee", 0)
+    # Stolen proportionally to holdings (hypergeometric mean is 60%).
+    assert removed["coffee"] / sum(removed.values()) == pytest.approx(0.6, abs=0.05)
+
+
+def test_spoilage_with_all_zero_weights_does_nothing():
+    state = create_default_state(seed=3)
+    state.rules.spoilage_item_multipliers = {"coffee": 0.0}
+    state.inventory.holdings = {"coffee": 5}
+    _event_spoilage(state)
+    assert state.event_log == []
+
+
+def test_saves_without_rng_scheme_replay_under_scheme_one():
+    payload = state_to_dict(create_default_state(seed=15))
+    assert payload["rules"]["rng_scheme"] == 2
+    del payload["rules"]["rng_scheme"]
+    assert state_from_dict(payload).rules.rng_scheme == 1
+    payload["rules"]["rng_scheme"] = 99
+    with pytest.raises(ValueError, match="rng_scheme"):
+        state_from_dict(payload)
+
+
 def test_event_creditor_call_with_zero_cash():
     state = create_default_state(seed=10, rules=Rules(daily_event_chance=1.0))
     state.cash = 0.0
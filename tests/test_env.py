@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from open_arbitrage.engine import Rules, net_worth
+from open_arbitrage.engine.core import ask_price, bid_price
+from open_arbitrage.env import Action, VectorEnv
+
+
+def test_reset_packs_observations_from_engine_state():
+    env = VectorEnv(3)
+    obs = env.reset([1, 2, 3])
+    goods = len(env.good_names)
+    assert obs["bid"].shape == obs["ask"].shape == obs["holdings"].shape == (3, goods)
+    for row, state in enumerate(env.states):
+        for column, name in enumerate(env.good_names):
+            assert obs["ask"][row, column] == pytest.approx(ask_price(state, name))
+            assert obs["bid"][row, column] == pytest.approx(bid_price(state, name))
+        assert obs["cash"][row] == state.cash
+        assert obs["loan"][row] == state.loan.balance
+        assert obs["day"][row] == state.day
+        assert obs["city"][row] == state.city_index
+    assert not obs["holdings"].any()
+    assert (obs["status"] == 0).all()
+
+
+@pytest.mark.parametrize("array_market", [True, False])
+def test_step_applies_actions_and_rewards_net_worth_delta(array_market):
+    env = VectorEnv(4, array_market=array_market)
+    env.reset([5, 5, 5, 5])
+    before = [net_worth(state) for state in env.states]
+    actions = np.array(
+        [
+            [Action.ADVANCE, 0, 2],
+            [Action.BUY, 0, 3],
+            [Action.TRAVEL, 1, 0],
+            [Action.REPAY, 0, 100],
+        ]
+    )
+    obs, reward, done, info = env.step(actions)
+    assert obs["day"].tolist() == [2, 0, 1, 0]
+    assert obs["holdings"][1, 0] == 3
+    assert obs["city"][2] == 1
+    assert obs["loan"][3] < obs["loan"][1]
+    assert not info["invalid"].any()
+    assert not done.any()
+    for row, state in enumerate(env.states):
+        assert reward[row] == pytest.approx(net_worth(state) - before[row])
+
+    obs, reward, done, info = env.step([[Action.SELL, 0, 3]] * 4)
+    assert info["invalid"].tolist() == [True, False, True, True]
+    assert obs["holdings"][1, 0] == 0
+
+
+def test_finished_games_are_frozen_with_zero_reward():
+    env = VectorEnv(2, rules=Rules(max_days=3))
+    env.reset([1, None])
+    obs, reward, done, _ = env.step([[Action.ADVANCE, 0, 5], [Action.ADVANCE, 0, 1]])
+    assert done.tolist() == [True, False]
+    assert obs["status"][0] != 0
+    obs, reward, done, info = env.step([[Action.ADVANCE, 0, 1]] * 2)
+    assert reward[0] == 0.0
+    assert done[0] and not info["invalid"][0]
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError, match="positive"):
+        VectorEnv(0)
+    env = VectorEnv(2)
+    with pytest.raises(RuntimeError, match="reset"):
+        env.step([[0, 0, 1]] * 2)
+    with pytest.raises(ValueError, match="Expected 2 seeds"):
+        env.reset([1])
+    env.reset([1, 2])
+    with pytest.raises(ValueError, match="shape"):
+        env.step([[0, 0, 1]])
+    _, _, _, info = env.step([[9, 0, 0], [Action.BUY, 99, 1]])
+    assert info["invalid"].all()
+    _, _, _, info = env.step([[Action.BUY, -1, 1], [Action.SELL, -1, 1]])
+    assert info["invalid"].all()
+    assert all(not state.inventory.holdings for state in env.states)
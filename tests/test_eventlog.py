@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from open_arbitrage.eventlog import EventFeed, EventLogWriter
+
+
+def _event(kind: str) -> dict:
+    return {"kind": kind, "day": 0, "city": "X", "details": {}}
+
+
+def _lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_writer_batches_by_size_and_keeps_the_handle_open(tmp_path: Path):
+    path = tmp_path / "nested" / "events.jsonl"
+    writer = EventLogWriter(path, batch_size=2, flush_interval=60.0)
+    try:
+        writer.submit("g1", [_event("a"), _event("b")])
+        deadline = time.monotonic() + 5
+        while not path.exists() or len(_lines(path)) < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        handle = writer._handle
+
+        writer.submit("g2", [_event("c")])
+        writer.flush()
+        assert writer._handle is handle and not handle.closed
+    finally:
+        writer.close()
+
+    assert [(line["game_id"], line["kind"]) for line in _lines(path)] == [
+        ("g1", "a"),
+        ("g1", "b"),
+        ("g2", "c"),
+    ]
+    assert writer._handle.closed
+
+
+def test_writer_flushes_on_interval(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    writer = EventLogWriter(path, batch_size=1_000, flush_interval=0.05)
+    try:
+        writer.submit("g", [_event("a")])
+        deadline = time.monotonic() + 5
+        while not path.exists() or not path.read_text(encoding="utf-8"):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        writer.close()
+    assert _lines(path)[0]["kind"] == "a"
+
+
+def test_writer_close_is_idempotent_and_final(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    writer = EventLogWriter(path)
+    writer.submit("g", [])
+    writer.close()
+    writer.close()
+    assert not path.exists()  # nothing was ever written
+    with pytest.raises(RuntimeError):
+        writer.submit("g", [_event("late")])
+
+
+def test_writer_survives_and_reports_write_errors(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    path.mkdir()  # opening a directory for append fails
+    writer = EventLogWriter(path, flush_interval=60.0)
+    writer.submit("g", [_event("lost")])
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.flush()  # reported once; the thread is still running
+
+    writer.submit("g", [{**_event("bad"), "details": object()}])
+    with pytest.raises(TypeError):
+        writer.close()
+
+
+def test_writer_validates_settings(tmp_path: Path):
+    with pytest.raises(ValueError):
+        EventLogWriter(tmp_path / "e.jsonl", batch_size=0)
+    with pytest.raises(ValueError):
+        EventLogWriter(tmp_path / "e.jsonl", flush_interval=0)
+
+
+def _sequenced(*seqs: int) -> list[dict]:
+    return [{**_event("e"), "seq": seq} for seq in seqs]
+
+
+def test_feed_reads_since_cursor_with_bounded_retention():
+    feed = EventFeed(retention=3)
+    assert feed.read(0) == []
+    feed.publish(_sequenced(1, 2))
+    feed.publish([])
+    feed.publish(_sequenced(3, 4))
+    assert feed.last_seq == 4
+    assert [event["seq"] for event in feed.read(0)] == [2, 3, 4]
+    assert [event["seq"] for event in feed.read(3)] == [4]
+    assert feed.read(4) == []
+
+
+def test_feed_long_poll_times_out_or_wakes():
+    feed = EventFeed()
+    started = time.monotonic()
+    assert feed.read(0, timeout=0.05) == []
+    assert time.monotonic() - started >= 0.04
+
+    threading.Timer(0.05, feed.publish, args=(_sequenced(1),)).start()
+    assert [event["seq"] for event in feed.read(0, timeout=5.0)] == [1]
+
+    feed.close()
+    started = time.monotonic()
+    assert feed.read(1, timeout=5.0) == []
+    assert time.monotonic() - started < 1.0
+
+
+def test_feed_async_long_polls_share_one_loop():
+    feed = EventFeed()
+
+    async def scenario() -> None:
+        assert await feed.read_async(0) == []
+        assert await feed.read_async(0, timeout=0.02) == []
+        threads = threading.active_count()
+        readers = [asyncio.ensure_future(feed.read_async(0, timeout=5.0)) for _ in range(300)]
+        # Events at or below a reader's cursor do not end its wait.
+        stale = asyncio.ensure_future(feed.read_async(5, timeout=5.0))
+        await asyncio.sleep(0.02)
+        assert threading.active_count() == threads
+        threading.Timer(0.02, feed.publish, args=(_sequenced(1),)).start()
+        woken = await asyncio.gather(*readers)
+        assert all([event["seq"] for event in events] == [1] for events in woken)
+        assert not stale.done()
+        feed.close()
+        assert await stale == []
+        assert feed._waiters == {}
+
+    asyncio.run(scenario())
+
+
+def test_feed_rejects_non_positive_retention():
+    with pytest.raises(ValueError, match="retention"):
+        EventFeed(retention=0)
@@ -0,0 +1,258 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from open_arbitrage import api
+from open_arbitrage.api import GameStore, app
+from open_arbitrage.engine import AdvanceDay, Buy, GameOutcome, Sell, state_to_dict
+from open_arbitrage.jobs import Job, JobLimitError, JobManager, JobStatus
+
+client = TestClient(app)
+
+
+def _wait(manager: JobManager, job_id: str) -> Job:
+    deadline = time.monotonic() + 10
+    while True:
+        job = manager.get(job_id)
+        assert job is not None
+        if job.finished:
+            return job
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.005)
+
+
+def _gate(monkeypatch, store: GameStore) -> tuple[threading.Event, threading.Event]:
+    """Pause every slice after the first until ``release`` is set."""
+    first_done, release = threading.Event(), threading.Event()
+    real_slice = store._slice
+
+    def gated(*args, **kwargs):
+        if first_done.is_set():
+            assert release.wait(timeout=10)
+        result = real_slice(*args, **kwargs)
+        first_done.set()
+        return result
+
+    monkeypatch.setattr(store, "_slice", gated)
+    return first_done, release
+
+
+def test_sliced_advance_matches_the_plain_command():
+    store = GameStore(slice_seconds=0.0)  # one day per slice
+    jobs = JobManager(store)
+    game_id, state = store.create(api.CreateGamePayload(seed=8))
+    ref_id, reference = store.create(api.CreateGamePayload(seed=8))
+
+    commands = [Buy(good_name="coffee", quantity=2), AdvanceDay(days=95, exact=False)]
+    job = jobs.submit(game_id, commands, stop_on_error=True)
+    assert job.status is JobStatus.QUEUED or job.status is JobStatus.RUNNING
+    done = _wait(jobs, job.id)
+    store.run_batch(ref_id, commands, stop_on_error=True)
+
+    assert done.status is JobStatus.SUCCEEDED
+    assert done.to_dict()["progress"] == {
+        "commands_done": 2,
+        "commands_total": 2,
+        "days_done": 95,
+        "days_total": 95,
+    }
+    assert state_to_dict(state) == state_to_dict(reference)
+    assert [job.id for job in jobs.for_game(game_id)] == [job.id]
+    jobs.close()
+
+
+def test_job_reports_progress_and_stops_when_cancelled(monkeypatch):
+    store = GameStore(slice_seconds=0.0)
+    jobs = JobManager(store)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    first_done, release = _gate(monkeypatch, store)
+
+    job = jobs.submit(game_id, [AdvanceDay(days=100), AdvanceDay()], stop_on_error=True)
+    assert first_done.wait(timeout=10)
+    running = jobs.get(job.id)
+    assert running.status is JobStatus.RUNNING
+    assert running.days_done == 1
+    assert [result["status"] for result in running.to_dict()["results"]] == ["pending", "pending"]
+
+    cancelled = jobs.cancel(job.id)
+    release.set()
+    done = _wait(jobs, job.id)
+    assert done.status is JobStatus.CANCELLED
+    assert state.day == done.days_done < 100
+    assert [result["status"] for result in done.to_dict()["results"]] == ["not_run", "not_run"]
+    assert cancelled.id == job.id
+    assert jobs.cancel("missing") is None
+    jobs.close()
+
+
+def test_cancelling_between_commands_skips_the_rest(monkeypatch):
+    store = GameStore()
+    jobs = JobManager(store)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    real_run_sliced = store.run_sliced
+
+    def then_cancel(*args, **kwargs):
+        result = real_run_sliced(*args, **kwargs)
+        for job in jobs.for_game(game_id):
+            jobs.cancel(job.id)
+        return result
+
+    monkeypatch.setattr(store, "run_sliced", then_cancel)
+    job = jobs.submit(game_id, [AdvanceDay(days=2), AdvanceDay()], stop_on_error=True)
+    done = _wait(jobs, job.id)
+    assert done.status is JobStatus.CANCELLED
+    assert [result["status"] for result in done.to_dict()["results"]] == ["ok", "not_run"]
+    assert state.day == 2
+    jobs.close()
+
+
+def test_queued_jobs_are_bounded_and_cancel_without_running(monkeypatch):
+    store = GameStore(slice_seconds=0.0)
+    jobs = JobManager(store, max_workers=1, max_queued=1)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    first_done, release = _gate(monkeypatch, store)
+
+    blocker = jobs.submit(game_id, [AdvanceDay(days=10)], stop_on_error=True)
+    assert first_done.wait(timeout=10)
+    queued = jobs.submit(game_id, [Buy(good_name="coffee", quantity=1)], stop_on_error=True)
+    with pytest.raises(JobLimitError):
+        jobs.submit(game_id, [AdvanceDay()], stop_on_error=True)
+
+    assert jobs.cancel(queued.id).status is JobStatus.CANCELLED
+    release.set()
+    assert _wait(jobs, blocker.id).status is JobStatus.SUCCEEDED
+    jobs.close()
+    assert jobs.get(queued.id).errors == []
+    assert state.inventory.quantity("coffee") == 0
+
+
+def test_job_errors_follow_the_batch_rules():
+    store = GameStore()
+    jobs = JobManager(store)
+    game_id, state = store.create(api.CreateGamePayload(seed=2))
+    state.rules.max_days = 30
+
+    skipped = jobs.submit(
+        game_id, [Sell(good_name="coffee", quantity=5), AdvanceDay(days=3)], stop_on_error=False
+    )
+    done = _wait(jobs, skipped.id)
+    assert done.status is JobStatus.SUCCEEDED
+    assert done.errors == ["Insufficient inventory", None]
+    assert done.to_dict()["results"][0] == {
+        "index": 0,
+        "status": "error",
+        "detail": "Insufficient inventory",
+    }
+
+    # The game ends partway through the advance; like the plain command, the
+    # advance still runs to the end and the next command fails.
+    ended = jobs.submit(game_id, [AdvanceDay(days=500), AdvanceDay()], stop_on_error=True)
+    done = _wait(jobs, ended.id)
+    assert state.status is not GameOutcome.ONGOING
+    assert done.days_done == state.day - 3 == 500
+    assert done.status is JobStatus.FAILED
+    assert done.errors == [None, "Game is finished"]
+    assert done.error is None
+    jobs.close()
+
+
+def test_job_fails_when_its_game_is_deleted(monkeypatch):
+    store = GameStore(slice_seconds=0.0)
+    jobs = JobManager(store, retention=1)
+    game_id, _ = store.create(api.CreateGamePayload(seed=1))
+    first_done, release = _gate(monkeypatch, store)
+
+    job = jobs.submit(game_id, [AdvanceDay(days=50)], stop_on_error=True)
+    assert first_done.wait(timeout=10)
+    store.delete(game_id)
+    release.set()
+    done = _wait(jobs, job.id)
+    assert done.status is JobStatus.FAILED
+    assert done.error == "Game not found"
+    assert done.to_dict()["results"] == [{"index": 0, "status": "not_run"}]
+
+    # Only the newest finished job is retained.
+    other_id, _ = store.create(api.CreateGamePayload(seed=2))
+    _wait(jobs, jobs.submit(other_id, [AdvanceDay()], stop_on_error=True).id)
+    assert jobs.get(job.id) is None
+    jobs.close()
+
+
+def test_job_fails_on_an_unexpected_error(monkeypatch):
+    store = GameStore()
+    jobs = JobManager(store)
+    game_id, _ = store.create(api.CreateGamePayload(seed=1))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("engine exploded")
+
+    monkeypatch.setattr(store, "run_sliced", broken)
+    done = _wait(jobs, jobs.submit(game_id, [AdvanceDay()], stop_on_error=True).id)
+    assert done.status is JobStatus.FAILED
+    assert done.error == "engine exploded"
+    jobs.close()
+
+
+def test_job_manager_validates_settings():
+    with pytest.raises(ValueError, match="max_workers"):
+        JobManager(GameStore(), max_workers=0)
+
+
+# --- HTTP -------------------------------------------------------------------
+
+
+def test_job_endpoints_run_poll_and_cancel():
+    game_id = client.post("/games", json={"seed": 4}).json()["game_id"]
+    resp = client.post(
+        f"/games/{game_id}/jobs",
+        json={
+            "commands": [
+                {"type": "advance_day", "args": {"days": 40}},
+                {"type": "repay", "args": {"amount": 1}},
+            ]
+        },
+    )
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["game_id"] == game_id and body["progress"]["days_total"] == 40
+
+    done = _wait(api._jobs, body["job_id"])
+    polled = client.get(f"/games/{game_id}/jobs/{body['job_id']}").json()
+    assert polled == done.to_dict()
+    assert polled["status"] == "succeeded"
+    assert [result["status"] for result in polled["results"]] == ["ok", "ok"]
+    assert client.get(f"/games/{game_id}", params={"fields": "day"}).json() == {"day": 40}
+    assert client.get(f"/games/{game_id}/jobs").json()["jobs"] == [polled]
+
+    cancelled = client.post(f"/games/{game_id}/jobs/{body['job_id']}/cancel")
+    assert cancelled.status_code == 200 and cancelled.json()["status"] == "succeeded"
+
+    other_id = client.post("/games", json={}).json()["game_id"]
+    assert client.get(f"/games/{other_id}/jobs/{body['job_id']}").status_code == 404
+    assert client.post(f"/games/{other_id}/jobs/{body['job_id']}/cancel").status_code == 404
+    assert client.get(f"/games/{game_id}/jobs/missing").status_code == 404
+
+
+def test_job_endpoint_validates_before_queueing(monkeypatch):
+    game_id = client.post("/games", json={}).json()["game_id"]
+    bad_type = client.post(
+        f"/games/{game_id}/jobs", json={"commands": [{"type": "advance_day"}, {"type": "fly"}]}
+    )
+    assert bad_type.status_code == 400
+    assert bad_type.json()["detail"] == "commands[1]: Unsupported command type"
+    bad_value = client.post(
+        f"/games/{game_id}/jobs",
+        json={"commands": [{"type": "advance_day", "args": {"days": "many"}}]},
+    )
+    assert bad_value.status_code == 400 and bad_value.json()["detail"].startswith("commands[0]: ")
+    assert (
+        client.post("/games/missing/jobs", json={"commands": [{"type": "advance_day"}]}).status_code
+        == 404
+    )
+    assert client.get(f"/games/{game_id}/jobs").json() == {"jobs": []}
+
+    monkeypatch.setattr(api._jobs, "max_queued", 0)
+    full = client.post(f"/games/{game_id}/jobs", json={"commands": [{"type": "advance_day"}]})
+    assert full.status_code == 429
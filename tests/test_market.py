@@ -1,8 +1,17 @@
 import random
 
+import numpy as np
 import pytest
 
-from open_arbitrage.market import Good, Market, Quote, _step_quote, build_market
+from open_arbitrage.market import (
+    ArrayMarket,
+    Good,
+    Market,
+    MarketStack,
+    Quote,
+    _step_quote,
+    build_market,
+)
 
 CITIES = ("A", "B", "C")
 
@@ -71,6 +80,16 @@ def test_market_quote_and_board_validation():
         market.quote(0, "unobtainium")
 
 
+def test_good_index_resolves_columns():
+    market = build_market(_default_goods(), CITIES, random.Random(0))
+    assert market.good_index("coffee") == 0
+    assert market.good_index("watches") == 1
+    assert market.quote(2, "watches") is market.boards[2][1]
+    with pytest.raises(ValueError, match="Unknown good"):
+        market.good_index("unobtainium")
+    assert _array_market().good_index("watches") == 1
+
+
 def test_fluctuate_keeps_prices_within_bounds():
     rng = random.Random(7)
     market = build_market(_default_goods(), CITIES, rng)
@@ -124,3 +143,159 @@ def test_step_quote_clamps_to_bounds():
 def test_market_is_plain_dataclass():
     market = Market(goods=_default_goods(), boards=[])
     assert market.good_names() == ["coffee", "watches"]
+
+
+# --- Array-backed market ----------------------------------------------------
+
+
+def _array_market(seed: int = 1) -> ArrayMarket:
+    return ArrayMarket.from_market(build_market(_default_goods(), CITIES, random.Random(seed)))
+
+
+def test_array_market_round_trips_list_market_exactly():
+    market = build_market(_default_goods(), CITIES, random.Random(5))
+    arrays = ArrayMarket.from_market(market)
+
+    assert arrays.values.shape == (len(CITIES), 2)
+    assert arrays.values.dtype == np.float64
+    assert arrays.to_market() == market
+
+
+def test_array_market_views_are_live():
+    market = _array_market()
+    quote = market.quote(1, "watches")
+    assert quote.good == "watches"
+    assert quote.value == market.values[1, 1]
+
+    quote.value = 42.0
+    quote.last_value = 41.0
+    quote.base_value = 40.0
+    quote.min_value = 4.0
+    quote.max_value = 160.0
+    assert market.values[1, 1] == 42.0
+    assert market.last_values[1, 1] == 41.0
+    assert market.base_values[1, 1] == 40.0
+    assert (market.min_values[1, 1], market.max_values[1, 1]) == (4.0, 160.0)
+    assert market.board(1)[1] is quote
+    assert market.quote(1, "watches").max_value == 160.0
+
+
+def test_array_market_validation():
+    market = _array_market()
+    with pytest.raises(ValueError):
+        market.board(len(CITIES))
+    with pytest.raises(ValueError):
+        market.quote(0, "unobtainium")
+    with pytest.raises(AttributeError):
+        market.boards = []
+    with pytest.raises(ValueError, match="shape"):
+        ArrayMarket(
+            _default_goods(),
+            values=np.ones((2, 3)),
+            base_values=np.ones((2, 2)),
+            min_values=np.ones((2, 2)),
+            max_values=np.ones((2, 2)),
+            last_values=np.ones((2, 2)),
+        )
+
+
+def test_array_market_fluctuate_bounds_and_determinism():
+    a, b = _array_market(11), _array_market(11)
+    rng_a, rng_b = random.Random(99), random.Random(99)
+    for _ in range(500):
+        before = a.values.copy()
+        a.fluctuate(rng_a, reversion=0.15, volatility=0.2)
+        b.fluctuate(rng_b, reversion=0.15, volatility=0.2)
+        assert np.array_equal(a.last_values, before)
+        assert np.all(a.values >= a.min_values) and np.all(a.values <= a.max_values)
+    assert np.array_equal(a.values, b.values)
+    assert rng_a.getstate() == rng_b.getstate()
+
+
+def test_array_market_mean_reverts_without_noise():
+    market = _array_market()
+    market.values[:] = market.base_values * 2.0
+    market.fluctuate(random.Random(0), reversion=0.5, volatility=0.0)
+    assert np.all(market.values > market.base_values)
+    assert np.all(market.values < market.base_values * 2.0)
+
+
+@pytest.mark.parametrize("backend", ["list", "array"])
+def test_scale_prices_clamps_every_city(backend):
+    market = build_market(_default_goods(), CITIES, random.Random(4))
+    if backend == "array":
+        market = ArrayMarket.from_market(market)
+    market.board(0)[0].value = market.board(0)[0].max_value * 0.9
+    before = market.mid_prices()
+
+    market.scale_prices(2.0)
+
+    assert market.board(0)[0].value == market.board(0)[0].max_value
+    assert market.board(1)[1].value == pytest.approx(before[1, 1] * 2.0)
+
+
+# --- Stacked markets --------------------------------------------------------
+
+
+def test_market_stack_steps_members_like_fluctuate():
+    stacked = [_array_market(seed) for seed in range(10)]
+    alone = [_array_market(seed) for seed in range(10)]
+    stack = MarketStack(len(CITIES), 2)
+    for market in stacked:
+        stack.add(market)
+    stack.add(stacked[0])  # already a member
+    assert len(stack) == 10 and stacked[3] in stack and alone[3] not in stack
+    assert stack.markets == stacked
+
+    rngs = [random.Random(seed) for seed in range(10)]
+    twins = [random.Random(seed) for seed in range(10)]
+    volatility = np.linspace(0.05, 0.3, 10)
+    for _ in range(50):
+        noise = np.stack(
+            [
+                np.random.default_rng(rng.getrandbits(64)).standard_normal((len(CITIES), 2))
+                for rng in rngs
+            ]
+        )
+        stack.step(noise, reversion=0.1, volatility=volatility)
+        for market, rng, sigma in zip(alone, twins, volatility, strict=True):
+            market.fluctuate(rng, reversion=0.1, volatility=sigma)
+    for market, twin in zip(stacked, alone, strict=True):
+        assert market.to_market() == twin.to_market()
+
+
+def test_market_stack_members_stay_live_as_it_changes():
+    markets = [_array_market(seed) for seed in range(3)]
+    stack = MarketStack(len(CITIES), 2)
+    for market in markets:
+        stack.add(market)
+
+    stack.discard(markets[0])
+    stack.discard(markets[0])  # not a member any more
+    assert stack.markets == [markets[2], markets[1]]
+    before = [market.values.copy() for market in markets]
+    stack.step(np.ones((2, len(CITIES), 2)), reversion=0.0, volatility=0.1)
+    assert np.array_equal(markets[0].values, before[0])
+    for market, old in zip(markets[1:], before[1:], strict=True):
+        assert np.array_equal(market.last_values, old)
+        assert np.all(market.values >= old) and np.any(market.values > old)
+
+    # Members keep writing through to their rows after the stack grows.
+    for seed in range(3, 12):
+        stack.add(_array_market(seed))
+    markets[2].quote(0, "coffee").value = 11.0
+    stack.step(np.zeros((len(stack), len(CITIES), 2)), reversion=0.0, volatility=0.0)
+    assert markets[2].values[0, 0] == pytest.approx(11.0)
+    assert markets[2].last_values[0, 0] == 11.0
+
+    stack.discard(stack.markets[-1])
+    assert len(stack) == 10
+
+
+def test_market_stack_validation():
+    stack = MarketStack(2, 2)
+    with pytest.raises(ValueError, match="shape"):
+        stack.add(_array_market())
+    with pytest.raises(ValueError, match="noise"):
+        stack.step(np.zeros((1, 2, 2)), reversion=0.1, volatility=0.1)
+    stack.step(np.zeros((0, 2, 2)), reversion=0.1, volatility=0.1)
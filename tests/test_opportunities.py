@@ -0,0 +1,63 @@
+import pytest
+
+from open_arbitrage.engine import Rules, create_default_state, scan_opportunities
+
+
+def _brute_force(state, lot):
+    spread = state.rules.trade_spread
+    trips = []
+    for buy in range(len(state.cities)):
+        for sell in range(len(state.cities)):
+            if buy == sell:
+                continue
+            for good in state.market.good_names():
+                ask = state.market.quote(buy, good).value * (1 + spread)
+                bid = state.market.quote(sell, good).value * (1 - spread)
+                profit = bid - ask - state.rules.travel_cost / lot
+                if profit > 0:
+                    trips.append((profit, buy, sell, good))
+    trips.sort(key=lambda trip: -trip[0])
+    return trips
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+def test_scan_matches_brute_force_ranking(array_market):
+    state = create_default_state(seed=5, array_market=array_market)
+    expected = _brute_force(state, state.rules.inventory_capacity)
+
+    found = scan_opportunities(state, top_k=len(expected) + 10)
+
+    assert len(found) == len(expected) > 0
+    for opp, (profit, buy, sell, good) in zip(found, expected, strict=True):
+        assert (opp.buy_city_index, opp.sell_city_index, opp.good) == (buy, sell, good)
+        assert opp.profit_per_unit == pytest.approx(profit)
+        assert opp.ask == pytest.approx(state.market.quote(buy, good).value * 1.02)
+        assert opp.bid == pytest.approx(state.market.quote(sell, good).value * 0.98)
+
+
+def test_scan_top_k_keeps_the_best():
+    state = create_default_state(seed=5)
+    every = scan_opportunities(state, top_k=1_000)
+    best = scan_opportunities(state, top_k=3)
+    assert best == every[:3]
+    assert [o.profit_per_unit for o in best] == sorted(
+        (o.profit_per_unit for o in best), reverse=True
+    )
+
+
+def test_scan_amortizes_travel_cost_over_lot():
+    state = create_default_state(seed=5, rules=Rules(inventory_capacity=None))
+    single = scan_opportunities(state, top_k=1)
+    bulk = scan_opportunities(state, top_k=1, lot_size=100)
+    assert bulk[0].profit_per_unit > (single[0].profit_per_unit if single else 0.0)
+
+    priced_out = create_default_state(seed=5, rules=Rules(travel_cost=1e9))
+    assert scan_opportunities(priced_out) == []
+
+
+def test_scan_validates_arguments():
+    state = create_default_state(seed=5)
+    with pytest.raises(ValueError):
+        scan_opportunities(state, top_k=0)
+    with pytest.raises(ValueError):
+        scan_opportunities(state, lot_size=0)
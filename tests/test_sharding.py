@@ -0,0 +1,310 @@
+import http.client
+import json
+import runpy
+import socket
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from starlette.types import Receive, Scope, Send
+
+from open_arbitrage import api
+from open_arbitrage.api import GameStore
+from open_arbitrage.sharding import (
+    FORWARDED_HEADER,
+    HashRing,
+    ShardConfig,
+    ShardRouter,
+    ShardSupervisor,
+)
+from open_arbitrage.storage import MemoryBackend
+
+# --- Hash ring --------------------------------------------------------------
+
+
+def test_hash_ring_spreads_keys_and_moves_few_on_resize():
+    keys = [f"game-{n}" for n in range(4_000)]
+    ring = HashRing(["a", "b", "c", "d"])
+    shares = Counter(map(ring.owner, keys))
+    assert set(shares) == {"a", "b", "c", "d"}
+    assert all(600 < share < 1_400 for share in shares.values())
+    assert [ring.owner(key) for key in keys] == [
+        HashRing(["d", "c", "b", "a"]).owner(key) for key in keys
+    ]
+
+    grown = HashRing(["a", "b", "c", "d", "e"])
+    moved = [key for key in keys if grown.owner(key) != ring.owner(key)]
+    assert all(grown.owner(key) == "e" for key in moved)
+    assert len(moved) < len(keys) // 3
+
+
+def test_hash_ring_and_shard_config_validation(tmp_path: Path):
+    with pytest.raises(ValueError, match="at least one node"):
+        HashRing([])
+    with pytest.raises(ValueError, match="points"):
+        HashRing(["a"], points=0)
+    with pytest.raises(ValueError, match="count"):
+        ShardConfig(index=0, count=0, socket_dir=tmp_path)
+    with pytest.raises(ValueError, match="index"):
+        ShardConfig(index=2, count=2, socket_dir=tmp_path)
+    with pytest.raises(ValueError, match="count"):
+        ShardSupervisor(0, socket_dir=tmp_path)
+
+
+def test_shard_config_from_env(tmp_path: Path):
+    assert ShardConfig.from_env({}) is None
+    shard = ShardConfig.from_env(
+        {
+            "OPEN_ARBITRAGE_SHARD_COUNT": "3",
+            "OPEN_ARBITRAGE_SHARD_INDEX": "1",
+            "OPEN_ARBITRAGE_SHARD_SOCKET_DIR": str(tmp_path),
+        }
+    )
+    assert shard == ShardConfig(index=1, count=3, socket_dir=tmp_path)
+    assert shard.name == "shard-1"
+    assert shard.peers == ["shard-0", "shard-2"]
+    assert shard.socket_path("shard-2") == tmp_path / "shard-2.sock"
+
+
+def test_store_creates_and_loads_only_owned_games(tmp_path: Path):
+    shard = ShardConfig(index=0, count=4, socket_dir=tmp_path)
+    store = GameStore(owns=shard.owns)
+    ids = [store.create(api.CreateGamePayload(seed=n))[0] for n in range(20)]
+    assert all(shard.owner(game_id) == "shard-0" for game_id in ids)
+
+    backend = MemoryBackend()
+    backend.write({f"g{n}": b"snapshot" for n in range(100)})
+    sharded = GameStore(storage=backend, owns=shard.owns)
+    assert sorted(sharded.ids()) == sorted(filter(shard.owns, backend.ids()))
+    sharded.close()
+
+
+def test_api_reads_shard_settings_from_the_environment(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("OPEN_ARBITRAGE_SHARD_COUNT", "2")
+    monkeypatch.setenv("OPEN_ARBITRAGE_SHARD_INDEX", "1")
+    monkeypatch.setenv("OPEN_ARBITRAGE_SHARD_SOCKET_DIR", str(tmp_path))
+    monkeypatch.setenv("OPEN_ARBITRAGE_EVENT_LOG_PATH", str(tmp_path / "events.jsonl"))
+    module = runpy.run_module("open_arbitrage.api")
+    store = module["_store"]
+    assert store.event_log_path == tmp_path / "events.shard-1.jsonl"
+    assert [middleware.cls for middleware in module["app"].user_middleware] == [ShardRouter]
+    game_id, _ = store.create(api.CreateGamePayload())
+    assert module["_shard"].owns(game_id)
+    store.close()
+
+
+# --- Router (in process: shard-0 in a TestClient, shard-1 behind a socket) --
+
+
+class _Counting:
+    """Counts the requests that reach the peer shard."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "lifespan":
+            self.calls += 1
+        await api.app(scope, receive, send)
+
+
+@pytest.fixture
+def peer(tmp_path: Path) -> Iterator[_Counting]:
+    """``api.app`` served as shard-1 on its unix socket (sharing the test store)."""
+    counting = _Counting()
+    config = uvicorn.Config(
+        counting, uds=str(tmp_path / "shard-1.sock"), log_level="warning", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield counting
+    server.should_exit = True
+    thread.join()
+
+
+def _router(tmp_path: Path) -> ShardRouter:
+    return ShardRouter(api.app, ShardConfig(index=0, count=2, socket_dir=tmp_path))
+
+
+def _game_on(router: ShardRouter, client: TestClient, owner: str) -> str:
+    while True:
+        game_id = client.post("/games", json={"seed": 3}).json()["game_id"]
+        if router.shard.owner(game_id) == owner:
+            return game_id
+
+
+def test_router_forwards_requests_for_other_shards_games(tmp_path: Path, peer: _Counting):
+    router = _router(tmp_path)
+    client = TestClient(router)
+    local_id = _game_on(router, client, "shard-0")
+    remote_id = _game_on(router, client, "shard-1")
+    created = peer.calls  # creation is always local
+    assert created == 0
+
+    assert client.get(f"/games/{local_id}").status_code == 200
+    assert peer.calls == 0
+
+    resp = client.post(
+        f"/games/{remote_id}/commands",
+        params={"fields": "cash,inventory"},
+        json={"type": "buy", "args": {"good_name": "coffee", "quantity": 2}},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json()["inventory"]["holdings"] == {"coffee": 2}
+    assert client.get(f"/games/{remote_id}", params={"fields": "day"}).json() == {"day": 0}
+    assert client.delete(f"/games/{remote_id}").status_code == 204
+    assert client.get(f"/games/{remote_id}").status_code == 404
+    assert peer.calls == 4
+    assert len(router._idle["shard-1"]) == 1  # one pooled keep-alive connection
+
+    # A peer that dropped the idle connection is retried on a fresh one.
+    router._idle["shard-1"][0].sock.shutdown(socket.SHUT_RDWR)
+    assert client.get(f"/games/{local_id}").status_code == 200
+    other_remote = _game_on(router, client, "shard-1")
+    assert client.get(f"/games/{other_remote}").status_code == 200
+    assert peer.calls == 5
+
+    assert client.get("/openapi.json").status_code == 200
+    assert peer.calls == 5
+    router.close()
+    assert router._idle == {}
+
+
+def test_router_resends_only_what_cannot_run_twice(
+    tmp_path: Path, peer: _Counting, monkeypatch: pytest.MonkeyPatch
+):
+    router = _router(tmp_path)
+    client = TestClient(router)
+    game_id = _game_on(router, client, "shard-1")
+    assert client.get(f"/games/{game_id}").status_code == 200
+    attempts: list[str] = []
+    exchange = router._exchange
+
+    def counted(owner, method, *args):
+        attempts.append(method)
+        return exchange(owner, method, *args)
+
+    def lose_the_reply() -> None:
+        # The pooled connection fails after the request went out.
+        (connection,) = router._idle["shard-1"]
+
+        def disconnected():
+            raise http.client.RemoteDisconnected("peer closed the connection")
+
+        monkeypatch.setattr(connection, "getresponse", disconnected)
+
+    monkeypatch.setattr(router, "_exchange", counted)
+    lose_the_reply()
+    resp = client.post(f"/games/{game_id}/commands", json={"type": "advance_day"})
+    assert resp.status_code == 503
+    assert attempts == ["POST"]  # the command may have run: never sent again
+
+    assert client.get(f"/games/{game_id}").status_code == 200
+    lose_the_reply()
+    assert client.get(f"/games/{game_id}").status_code == 200
+    assert attempts == ["POST", "GET", "GET", "GET"]
+    router.close()
+
+
+def test_router_merges_game_lists_from_every_shard(tmp_path: Path, peer: _Counting):
+    client = TestClient(_router(tmp_path))
+    game_id = client.post("/games", json={}).json()["game_id"]
+    games = client.get("/games").json()["games"]
+    assert game_id in games
+    assert len(games) == len(set(games))  # both shards share this test's store
+    assert peer.calls == 1
+
+
+def test_router_proxies_websockets(tmp_path: Path, peer: _Counting):
+    router = _router(tmp_path)
+    client = TestClient(router)
+    game_id = _game_on(router, client, "shard-1")
+    with client.websocket_connect(f"/games/{game_id}/ws") as ws:
+        assert ws.receive_json()["state"]["day"] == 0
+        ws.send_text(json.dumps({"id": 1, "type": "advance_day"}))
+        reply = ws.receive_json()
+        assert reply["id"] == 1 and reply["delta"]["day"] == 1
+    assert peer.calls == 1
+
+    missing = next(
+        f"missing-{n}" for n in range(100) if router.shard.owner(f"missing-{n}") == "shard-1"
+    )
+    with client.websocket_connect(f"/games/{missing}/ws") as ws:
+        assert ws.receive_json()["type"] == "error"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 4404
+
+
+def test_router_reports_unreachable_shards(tmp_path: Path):
+    router = _router(tmp_path)
+    client = TestClient(router)
+    game_id = next(f"g{n}" for n in range(100) if router.shard.owner(f"g{n}") == "shard-1")
+
+    def assert_unavailable() -> None:
+        resp = client.get(f"/games/{game_id}")
+        assert resp.status_code == 503
+        assert resp.json() == {"detail": "Shard unavailable: shard-1"}
+        assert client.get("/games").status_code == 503
+        with (
+            pytest.raises(WebSocketDisconnect) as closed,
+            client.websocket_connect(f"/games/{game_id}/ws"),
+        ):
+            pass  # pragma: no cover - the connection is refused
+        assert closed.value.code == 1011
+
+    assert_unavailable()  # no socket at all
+    with socket.socket(socket.AF_UNIX) as dead:
+        dead.bind(str(tmp_path / "shard-1.sock"))
+        assert_unavailable()  # a socket nobody accepts on
+
+
+def test_forwarded_requests_are_served_locally(tmp_path: Path):
+    client = TestClient(_router(tmp_path))
+    resp = client.get("/games/not-here", headers={FORWARDED_HEADER: "shard-1"})
+    assert resp.status_code == 404
+
+
+# --- Supervisor (real shard processes) --------------------------------------
+
+
+def test_supervisor_partitions_games_across_processes(tmp_path: Path):
+    supervisor = ShardSupervisor(2, port=0, socket_dir=tmp_path, log_level="warning")
+    supervisor.start()
+    try:
+        host, port = supervisor.address
+        deadline = time.monotonic() + 60
+        while not all((tmp_path / f"shard-{n}.sock").exists() for n in range(2)):
+            assert time.monotonic() < deadline, "shards did not start"
+            time.sleep(0.05)
+        with httpx.Client(base_url=f"http://{host}:{port}", timeout=10) as client:
+            created = [client.post("/games", json={"seed": n}).json()["game_id"] for n in range(8)]
+            for game_id in created:
+                assert client.get(f"/games/{game_id}", params={"fields": "day"}).json() == {
+                    "day": 0
+                }
+            assert sorted(client.get("/games").json()["games"]) == sorted(created)
+
+        ring = ShardConfig(index=0, count=2, socket_dir=tmp_path)
+        for n in range(2):
+            transport = httpx.HTTPTransport(uds=str(tmp_path / f"shard-{n}.sock"))
+            with httpx.Client(transport=transport, base_url="http://shard") as shard:
+                own = shard.get("/games", headers={FORWARDED_HEADER: "test"}).json()["games"]
+            assert all(ring.owner(game_id) == f"shard-{n}" for game_id in own)
+    finally:
+        for process in supervisor.processes:
+            process.terminate()
+        supervisor.wait()
+        supervisor.stop()
+    assert supervisor.processes == []
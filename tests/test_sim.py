@@ -0,0 +1,90 @@
+import pytest
+
+from open_arbitrage.engine import AdvanceDay, Buy, GameOutcome, Rules, Sell, scan_opportunities
+from open_arbitrage.engine.core import Travel
+from open_arbitrage.sim import play_game, simulate
+
+RULES = Rules(max_days=60)
+
+
+def arbitrage_policy(state):
+    """Carry the best trip's good from where it is cheap to where it is dear."""
+    if state.inventory.holdings:
+        good = next(iter(state.inventory.holdings))
+        return [Sell(good_name=good, quantity=state.inventory.quantity(good))]
+    best = scan_opportunities(state, top_k=1)
+    if not best:
+        return []
+    trip = best[0]
+    if trip.buy_city_index != state.city_index:
+        return [Travel(destination_index=trip.buy_city_index)]
+    quantity = min(int(state.cash // trip.ask) - 1, state.rules.inventory_capacity or 100)
+    if quantity < 1:
+        return []
+    return [Buy(good_name=trip.good, quantity=quantity), Travel(trip.sell_city_index)]
+
+
+def idle_policy(_state):
+    return []
+
+
+def clumsy_policy(_state):
+    return [Sell(good_name="coffee", quantity=1), AdvanceDay(days=5)]
+
+
+def test_play_game_runs_to_completion():
+    result = play_game(arbitrage_policy, 3, rules=RULES)
+    assert result.seed == 3
+    assert result.status is not GameOutcome.ONGOING
+    assert result.status is GameOutcome.WON or result.days >= RULES.max_days
+    assert result.turns > 0
+
+
+def stuck_policy(_state):
+    return [Sell(good_name="coffee", quantity=1)]
+
+
+def test_play_game_counts_rejected_commands_and_respects_max_turns():
+    result = play_game(clumsy_policy, 1, rules=Rules(max_days=None), max_turns=4)
+    assert result.status is GameOutcome.ONGOING
+    assert result.turns == 4
+    assert result.rejected_commands == 4
+    assert result.days == 20
+
+
+def test_turn_with_nothing_applied_still_advances_the_clock():
+    result = play_game(stuck_policy, 1, rules=Rules(max_days=7))
+    assert result.status is GameOutcome.LOST
+    assert result.days == 7
+    assert result.turns == result.rejected_commands == 7
+
+
+def test_simulate_is_deterministic_regardless_of_worker_count():
+    seeds = list(range(12))
+    serial = simulate(arbitrage_policy, seeds, rules=RULES, workers=1)
+    parallel = simulate(arbitrage_policy, seeds, rules=RULES, workers=3, chunk_size=2)
+
+    assert parallel.results == serial.results
+    assert [result.seed for result in serial.results] == seeds
+
+
+def test_simulation_report_statistics():
+    report = simulate(idle_policy, [1, 2, 3], rules=Rules(max_days=10), workers=1)
+    summary = report.summary()
+
+    assert summary["games"] == 3
+    assert report.win_rate == summary["win_rate"] == 0.0
+    assert summary["loss_rate"] == 1.0
+    assert summary["days_min"] == summary["days_max"] == 10
+    assert summary["net_worth_min"] <= summary["net_worth_median"] <= summary["net_worth_max"]
+    assert summary["net_worth_mean"] == pytest.approx(report.net_worths.mean())
+    assert report.days_survived.tolist() == [10, 10, 10]
+
+
+def test_simulate_validates_arguments():
+    with pytest.raises(ValueError):
+        simulate(idle_policy, [])
+    with pytest.raises(ValueError):
+        simulate(idle_policy, [1], chunk_size=0)
+    with pytest.raises(ValueError):
+        simulate(idle_policy, [1], workers=0)
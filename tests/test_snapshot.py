@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    ArrayMarket,
+    Buy,
+    Rules,
+    Travel,
+    apply_command,
+    create_default_state,
+    state_from_bytes,
+    state_to_bytes,
+    state_to_dict,
+)
+from open_arbitrage.engine.snapshot import SNAPSHOT_MAGIC
+
+
+def _played(array_market: bool):
+    rules = Rules(daily_event_chance=1.0, travel_event_chance=1.0, max_days=None)
+    state = create_default_state(seed=41, rules=rules, array_market=array_market)
+    apply_command(state, Buy(good_name="grain", quantity=30))
+    apply_command(state, Travel(destination_index=4))
+    apply_command(state, AdvanceDay(days=6))
+    state.rng.gauss(0.0, 1.0)  # leave a cached gauss_next in the RNG state
+    return state
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+def test_snapshot_round_trip_is_identical(array_market):
+    state = _played(array_market)
+    restored = state_from_bytes(state_to_bytes(state))
+
+    assert state_to_dict(restored) == state_to_dict(state)
+    assert isinstance(restored.market, ArrayMarket) is array_market
+    assert restored.rng.getstate() == state.rng.getstate()
+
+    apply_command(state, AdvanceDay(days=5))
+    apply_command(restored, AdvanceDay(days=5))
+    assert state_to_dict(restored) == state_to_dict(state)
+
+
+def test_snapshot_is_much_smaller_than_json():
+    state = _played(array_market=False)
+    blob = state_to_bytes(state)
+    assert blob.startswith(SNAPSHOT_MAGIC)
+    assert len(blob) < len(json.dumps(state_to_dict(state))) / 2
+
+
+def test_restored_arrays_are_writable():
+    restored = state_from_bytes(state_to_bytes(_played(array_market=True)))
+    assert isinstance(restored.market, ArrayMarket)
+    assert restored.market.values.flags.writeable
+    assert restored.market.values.dtype == np.float64
+
+
+def test_snapshot_rejects_bad_input():
+    blob = state_to_bytes(create_default_state(seed=1))
+    with pytest.raises(ValueError, match="Not an Open Arbitrage snapshot"):
+        state_from_bytes(b"XXXX" + blob[4:])
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        state_from_bytes(blob[:4] + b"\x63\x00" + blob[6:])
+    with pytest.raises(ValueError, match="Corrupt snapshot"):
+        state_from_bytes(blob[:-10])
+    with pytest.raises(ValueError, match="trailing bytes"):
+        state_from_bytes(blob + b"\x00")
+    with pytest.raises(ValueError, match="Corrupt snapshot"):
+        state_from_bytes(b"OA")
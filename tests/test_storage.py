@@ -0,0 +1,245 @@
+import time
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from open_arbitrage import api
+from open_arbitrage.api import GameStore
+from open_arbitrage.engine import AdvanceDay, Buy, Sell, state_to_dict
+from open_arbitrage.storage import (
+    DirectoryBackend,
+    MemoryBackend,
+    SQLiteBackend,
+    StorageBackend,
+    WriteBehind,
+)
+
+BACKENDS = ["memory", "directory", "sqlite"]
+
+
+def _backend(kind: str, tmp_path: Path) -> StorageBackend:
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "directory":
+        return DirectoryBackend(tmp_path / "games")
+    return SQLiteBackend(tmp_path / "db" / "games.sqlite3")
+
+
+# --- Backend contract -------------------------------------------------------
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_backend_round_trips_snapshots(kind: str, tmp_path: Path):
+    backend = _backend(kind, tmp_path)
+    assert backend.ids() == []
+    assert backend.read("a") is None
+
+    backend.write({"a": b"one", "b": b"two"})
+    backend.write({"a": b"three"})
+    assert backend.read("a") == b"three"
+    assert sorted(backend.ids()) == ["a", "b"]
+
+    backend.delete(["a", "missing"])
+    assert backend.read("a") is None
+    assert backend.ids() == ["b"]
+    backend.close()
+
+
+# --- GameStore with and without persistence --------------------------------
+
+STORES = ["none", *BACKENDS]
+
+
+@pytest.fixture(params=STORES)
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[GameStore]:
+    backend = None if request.param == "none" else _backend(request.param, tmp_path)
+    game_store = GameStore(storage=backend)
+    yield game_store
+    game_store.close()
+
+
+def test_store_plays_games_the_same_with_any_backend(store: GameStore):
+    game_id, _ = store.create(api.CreateGamePayload(seed=11))
+    store.run_command(game_id, Buy(good_name="coffee", quantity=3))
+    state, errors = store.run_batch(
+        game_id, [AdvanceDay(days=2), Sell(good_name="coffee", quantity=9)], stop_on_error=False
+    )
+    assert errors == [None, "Insufficient inventory"]
+    assert state.day == 2
+    assert store.ids() == [game_id]
+
+    reference = GameStore()
+    ref_id, _ = reference.create(api.CreateGamePayload(seed=11))
+    reference.run_command(ref_id, Buy(good_name="coffee", quantity=3))
+    reference.run_command(ref_id, AdvanceDay(days=2))
+    assert state_to_dict(store.get(game_id)) == state_to_dict(reference.get(ref_id))
+
+    store.delete(game_id)
+    store.flush()
+    assert store.ids() == []
+    with pytest.raises(HTTPException):
+        store.get(game_id)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_games_survive_a_restart(kind: str, tmp_path: Path):
+    backend = _backend(kind, tmp_path)
+    first = GameStore(storage=backend)
+    game_id, _ = first.create(api.CreateGamePayload(seed=3))
+    state = first.run_command(game_id, AdvanceDay(days=4))
+    deleted_id, _ = first.create(api.CreateGamePayload(seed=4))
+    first.delete(deleted_id)
+    expected = state_to_dict(state)
+    first.flush()
+    if kind != "memory":  # a memory backend lives only as long as its object
+        first.close()
+        backend = _backend(kind, tmp_path)
+
+    second = GameStore(storage=backend)
+    assert second.ids() == [game_id]
+    assert second.resident_ids() == []
+    assert state_to_dict(second.get(game_id)) == expected
+    second.run_command(game_id, AdvanceDay(days=1))
+    second.close()
+
+
+def test_store_rejects_conflicting_storage_options(tmp_path: Path):
+    with pytest.raises(ValueError, match="either storage or spill_dir"):
+        GameStore(storage=MemoryBackend(), spill_dir=tmp_path)
+
+
+def test_game_missing_from_storage_is_not_found():
+    backend = MemoryBackend()
+    backend.write({"ghost": b"never read"})
+    store = GameStore(storage=backend)
+    backend.delete(["ghost"])
+    with pytest.raises(HTTPException) as missing:
+        store.get("ghost")
+    assert missing.value.status_code == 404
+    assert store.ids() == []
+    store.close()
+
+
+# --- Write-behind -----------------------------------------------------------
+
+
+def test_write_behind_coalesces_changes_per_game():
+    backend = MemoryBackend()
+    writer = WriteBehind(backend, interval=60.0)
+    calls: list[int] = []
+
+    def snapshot() -> bytes:
+        calls.append(1)
+        return b"latest"
+
+    for _ in range(100):
+        writer.mark_dirty("g", snapshot)
+    writer.mark_dirty("gone", lambda: None)
+    writer.flush()
+    assert calls == [1]
+    assert backend.read("g") == b"latest"
+    assert backend.ids() == ["g"]
+    writer.close()
+    writer.close()
+    writer.flush()
+
+
+def test_write_behind_reads_through_queued_work():
+    backend = MemoryBackend()
+    backend.write({"old": b"stored", "doomed": b"stored"})
+    writer = WriteBehind(backend, interval=60.0)
+    writer.put("new", b"queued")
+    writer.delete("doomed")
+    writer.mark_dirty("old", lambda: b"fresh")
+    assert writer.read("new") == b"queued"
+    assert writer.read("doomed") is None
+    assert writer.read("old") == b"stored"  # not snapshotted until the next pass
+    writer.close()
+    assert backend.read("new") == b"queued"
+    assert backend.read("old") == b"fresh"
+    assert backend.read("doomed") is None
+
+
+class _FailingBackend(MemoryBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.failures = 1
+
+    def write(self, snapshots: Mapping[str, bytes]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().write(snapshots)
+
+
+def test_write_behind_survives_and_reports_backend_errors():
+    backend = _FailingBackend()
+    writer = WriteBehind(backend, interval=60.0)
+    writer.put("retried", b"old")
+    with pytest.raises(OSError, match="disk full"):
+        writer.flush()
+    assert writer.read("retried") == b"old"  # queued again, still readable
+    writer.put("retried", b"new")
+    writer.put("kept", b"written")
+    writer.flush()  # the error is reported once; the writer is still running
+    assert backend.read("retried") == b"new"
+    assert sorted(backend.ids()) == ["kept", "retried"]
+
+    backend.failures = 1
+    writer.put("last", b"dropped")
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+
+
+def test_write_behind_retries_failed_passes_with_backoff():
+    backend = _FailingBackend()
+    backend.failures = 3
+    writer = WriteBehind(backend, interval=0.0)
+    writer.put("game", b"snapshot")
+    deadline = time.monotonic() + 10
+    while backend.read("game") is None:
+        assert time.monotonic() < deadline, "the failed write was not retried"
+        time.sleep(0.01)
+    assert backend.failures == 0
+    with pytest.raises(OSError, match="disk full"):
+        writer.flush()
+    writer.close()
+
+
+def test_evicted_game_survives_a_failed_write():
+    backend = _FailingBackend()
+    store = GameStore(storage=backend, max_sessions=1, write_interval=60.0)
+    spilled_id, _ = store.create(api.CreateGamePayload(seed=1))
+    expected = state_to_dict(store.run_command(spilled_id, AdvanceDay(days=5)))
+    store.create(api.CreateGamePayload(seed=2))  # evicts the first game
+    assert spilled_id not in store.resident_ids()
+    with pytest.raises(OSError, match="disk full"):
+        store.flush()
+    assert state_to_dict(store.get(spilled_id)) == expected
+    store.flush()
+    assert spilled_id in backend.ids()
+    store.close()
+
+
+def test_write_behind_validates_interval():
+    with pytest.raises(ValueError, match="interval"):
+        WriteBehind(MemoryBackend(), interval=-1)
+
+
+def test_flush_covers_storage_and_event_log(tmp_path: Path):
+    backend = MemoryBackend()
+    store = GameStore(tmp_path / "events.jsonl", storage=backend)
+    game_id, state = store.create(api.CreateGamePayload(seed=1))
+    state.rules.daily_event_chance = 1.0
+    store.run_command(game_id, AdvanceDay(days=2))
+    store.flush()
+    assert backend.ids() == [game_id]
+    assert (tmp_path / "events.jsonl").read_text(encoding="utf-8")
+
+    # A save queued just before the game left memory writes nothing.
+    session = store._sessions[game_id]
+    store.delete(game_id)
+    assert api._snapshot(session) is None
+    store.close()
@@ -0,0 +1,66 @@
+import pytest
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    Buy,
+    Rules,
+    StateTemplates,
+    apply_command,
+    create_default_state,
+    state_to_dict,
+)
+
+
+def _play(state):
+    apply_command(state, Buy(good_name="coffee", quantity=3))
+    apply_command(state, AdvanceDay(days=20))
+    return state_to_dict(state)
+
+
+@pytest.mark.parametrize("array_market", [False, True])
+def test_cloned_games_match_fresh_ones(array_market):
+    templates = StateTemplates()
+    rules = Rules(inventory_capacity=7, daily_event_chance=1.0)
+    first = templates.create(5, rules, array_market=array_market)
+    second = templates.create(5, rules, array_market=array_market)
+    fresh = create_default_state(
+        5, Rules(inventory_capacity=7, daily_event_chance=1.0), array_market=array_market
+    )
+    assert len(templates) == 1
+    assert first.rules is second.rules is rules
+    assert second.inventory.capacity == 7
+    assert second.rng.getstate() == fresh.rng.getstate()
+    assert state_to_dict(second) == state_to_dict(fresh) == state_to_dict(first)
+
+    # Playing one clone leaves the template (and the next clone) pristine.
+    played = _play(second)
+    assert _play(templates.create(5, rules, array_market=array_market)) == played
+    assert _play(first) == played
+
+
+def test_templates_are_keyed_by_what_shapes_the_board():
+    templates = StateTemplates()
+    templates.create(1)
+    templates.create(1, array_market=True)
+    wide = templates.create(1, Rules(city_price_spread=(0.5, 2.0)))
+    assert len(templates) == 3
+    assert state_to_dict(wide) == state_to_dict(
+        create_default_state(1, Rules(city_price_spread=(0.5, 2.0)))
+    )
+    # Other rules do not change the starting board, so they share a template.
+    templates.create(1, Rules(travel_cost=5.0, max_days=10))
+    assert len(templates) == 3
+
+
+def test_seedless_games_are_built_fresh_and_old_templates_dropped():
+    templates = StateTemplates(max_templates=2)
+    a, b = templates.create(), templates.create()
+    assert a.seed is None and a.rng.getstate() != b.rng.getstate()
+    assert len(templates) == 0
+
+    for seed in (1, 2, 1, 3):
+        templates.create(seed)
+    assert list(templates._templates) == [(1, (0.7, 1.3), False), (3, (0.7, 1.3), False)]
+
+    with pytest.raises(ValueError, match="max_templates"):
+        StateTemplates(max_templates=0)
@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+
+from open_arbitrage.engine import (
+    AdvanceDay,
+    ArrayMarket,
+    GameOutcome,
+    World,
+    apply_command,
+    build_market,
+    create_default_state,
+    state_to_dict,
+)
+
+
+def _pair(seed: int, **rules):
+    """Two identical array-market games: one for the world, one played alone."""
+    states = [create_default_state(seed=seed, array_market=True) for _ in range(2)]
+    for state in states:
+        for name, value in rules.items():
+            setattr(state.rules, name, value)
+    return states
+
+
+def test_tick_is_advance_day_for_every_game():
+    world = World()
+    pairs = [_pair(seed, daily_event_chance=0.5) for seed in range(12)]
+    pairs.append(_pair(99, price_volatility=0.3, price_reversion=0.05))
+    pairs.append(_pair(7, max_days=5))
+    for _ in range(30):
+        advanced = world.tick([ticked for ticked, _ in pairs])
+        for ticked, alone in pairs:
+            if alone.status is GameOutcome.ONGOING:
+                apply_command(alone, AdvanceDay())
+                assert any(state is ticked for state in advanced)
+    for ticked, alone in pairs:
+        assert state_to_dict(ticked) == state_to_dict(alone)
+        assert ticked.rng.getstate() == alone.rng.getstate()
+    assert pairs[-1][0].day == 5 and pairs[-1][0].status is not GameOutcome.ONGOING
+    assert len(world) == len(pairs) - 1  # the finished game left
+
+
+def test_games_join_and_leave_between_ticks():
+    world = World()
+    first, second, third = (create_default_state(seed=seed) for seed in (1, 2, 3))
+    listed = first.market
+
+    assert world.tick([first, second]) == [first, second]
+    assert isinstance(first.market, ArrayMarket)  # list-backed markets switch over
+    assert first.market.to_market().boards[0][0].base_value == listed.boards[0][0].base_value
+    assert len(world) == 2
+
+    # Leaving hands the game its own arrays back; the remaining games keep ticking.
+    kept = first.market.values.copy()
+    assert world.tick([second, third]) == [second, third]
+    assert len(world) == 2
+    assert np.array_equal(first.market.values, kept)
+    first.market.values[:] = 1.0
+    assert world.tick([second, third, first]) == [second, third, first]
+    assert (first.day, second.day, third.day) == (2, 3, 2)
+
+    assert world.tick([]) == []
+    assert len(world) == 0
+
+
+def test_tick_skips_finished_games():
+    world = World()
+    state = create_default_state(seed=4)
+    state.status = GameOutcome.LOST
+    assert world.tick([state]) == []
+    assert state.day == 0 and len(world) == 0
+
+
+def test_games_with_different_boards_stack_separately():
+    world = World()
+    small = create_default_state(seed=5, array_market=True)
+    small.cities = small.cities[:2]
+    small.market = ArrayMarket.from_market(
+        build_market(small.market.goods, small.cities, random.Random(5))
+    )
+    big = create_default_state(seed=6, array_market=True)
+    assert world.tick([small, big]) == [small, big]
+    assert small.day == big.day == 1
+    assert sorted(world._stacks) == [(2, len(small.market.goods)), big.market.values.shape]